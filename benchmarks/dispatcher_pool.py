@@ -0,0 +1,97 @@
+# ============================================================
+#
+# Copyright (C) 2018 Jan Moringen <jmoringe@techfak.uni-bielefeld.de>
+#
+# This file may be licensed under the terms of the
+# GNU Lesser General Public License Version 3 (the ``LGPL''),
+# or (at your option) any later version.
+#
+# Software distributed under the License is distributed
+# on an ``AS IS'' basis, WITHOUT WARRANTY OF ANY KIND, either
+# express or implied. See the LGPL for the specific language
+# governing rights and limitations.
+#
+# You should have received a copy of the LGPL along with this
+# program. If not, go to http://www.gnu.org/licenses/lgpl.html
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# The development of this software was supported by:
+#   CoR-Lab, Research Institute for Cognition and Robotics
+#     Bielefeld University
+#
+# ============================================================
+
+
+"""
+Measures the throughput of :obj:`rsb.util.OrderedQueueDispatcherPool`
+depending on the number of registered handlers and worker threads.
+
+For each combination, messages are pushed into the pool until the
+requested number of deliveries (messages times handlers) is reached.
+The time until all handlers have received all messages is reported
+as deliveries per second.
+"""
+
+import argparse
+import logging
+import threading
+import time
+
+from rsb.util import OrderedQueueDispatcherPool
+
+
+class Handler(object):
+
+    def __init__(self, count, finished):
+        self.__remaining = count
+        self.__finished = finished
+
+    def __call__(self, message):
+        self.__remaining -= 1
+        if not self.__remaining:
+            self.__finished.release()
+
+
+def deliver(handler, message):
+    handler(message)
+
+
+def measure(handlerCount, threadCount, count):
+    pool = OrderedQueueDispatcherPool(threadCount, deliver)
+    finished = threading.Semaphore(0)
+    for _ in range(handlerCount):
+        pool.registerReceiver(Handler(count, finished))
+    pool.start()
+
+    start = time.perf_counter()
+    for i in range(count):
+        pool.push(i)
+    for _ in range(handlerCount):
+        finished.acquire()
+    elapsed = time.perf_counter() - start
+
+    pool.stop()
+    return handlerCount * count / elapsed
+
+
+if __name__ == '__main__':
+    # Pacify logger.
+    logging.basicConfig()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--deliveries', type=int, default=100000,
+                        help='number of deliveries per measurement')
+    parser.add_argument('--handlers', type=int, nargs='+',
+                        default=[1, 10, 100])
+    parser.add_argument('--threads', type=int, nargs='+',
+                        default=[1, 2, 5, 10])
+    arguments = parser.parse_args()
+
+    print('%8s %8s %24s'
+          % ('handlers', 'threads', 'throughput [deliveries/s]'))
+    for handlerCount in arguments.handlers:
+        for threadCount in arguments.threads:
+            rate = measure(handlerCount, threadCount,
+                           max(1, arguments.deliveries // handlerCount))
+            print('%8d %8d %24.0f' % (handlerCount, threadCount, rate))
@@ -0,0 +1,124 @@
+# ============================================================
+#
+# Copyright (C) 2018 Jan Moringen <jmoringe@techfak.uni-bielefeld.de>
+#
+# This file may be licensed under the terms of the
+# GNU Lesser General Public License Version 3 (the ``LGPL''),
+# or (at your option) any later version.
+#
+# Software distributed under the License is distributed
+# on an ``AS IS'' basis, WITHOUT WARRANTY OF ANY KIND, either
+# express or implied. See the LGPL for the specific language
+# governing rights and limitations.
+#
+# You should have received a copy of the LGPL along with this
+# program. If not, go to http://www.gnu.org/licenses/lgpl.html
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# The development of this software was supported by:
+#   CoR-Lab, Research Institute for Cognition and Robotics
+#     Bielefeld University
+#
+# ============================================================
+
+
+"""
+Measures how publishing through the in-process
+:obj:`rsb.transport.local.Bus` scales with the number of publishing
+threads.
+
+Each thread publishes into its own scope, so the threads do not share
+any sinks. For comparison, the same workload is dispatched through a
+bus which holds a lock during dispatch. Sinks can simulate work which
+releases the interpreter lock, such as I/O, with ``--sink-delay``.
+"""
+
+import argparse
+import logging
+import threading
+import time
+
+from rsb import Event, Scope
+from rsb.transport.local import Bus
+
+
+class Sink(object):
+
+    def __init__(self, scope, delay):
+        self.__scope = scope
+        self.__delay = delay
+
+    def getScope(self):
+        return self.__scope
+
+    def handle(self, event):
+        if self.__delay:
+            time.sleep(self.__delay)
+
+
+class LockingBus(Bus):
+    """
+    Holds a lock while dispatching, like the bus did before it used
+    snapshots of its sinks.
+    """
+
+    def __init__(self):
+        super(LockingBus, self).__init__()
+        self.__lock = threading.RLock()
+
+    def handle(self, event):
+        with self.__lock:
+            super(LockingBus, self).handle(event)
+
+
+def measure(bus, threadCount, count):
+    events = [Event(scope=Scope('/benchmark/thread%d/data' % i))
+              for i in range(threadCount)]
+    barrier = threading.Barrier(threadCount + 1)
+
+    def publish(event):
+        barrier.wait()
+        for _ in range(count):
+            bus.handle(event)
+
+    threads = [threading.Thread(target=publish, args=(event,))
+               for event in events]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return threadCount * count / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    # Pacify logger.
+    logging.basicConfig()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=2000,
+                        help='number of publishes per thread')
+    parser.add_argument('--threads', type=int, nargs='+',
+                        default=[1, 2, 4, 8])
+    parser.add_argument('--scopes', type=int, default=2000,
+                        help='number of additional subscribed scopes')
+    parser.add_argument('--sink-delay', type=float, default=100,
+                        help='time in microseconds spent in each sink')
+    arguments = parser.parse_args()
+
+    delay = arguments.sink_delay / 1e6
+    buses = [('snapshot', Bus()), ('locking', LockingBus())]
+    for (_, bus) in buses:
+        for i in range(arguments.scopes):
+            bus.addSink(Sink(Scope('/other/scope%d' % i), delay))
+        for i in range(max(arguments.threads)):
+            bus.addSink(Sink(Scope('/benchmark/thread%d' % i), delay))
+
+    print('%8s %22s %22s' % ('threads', 'snapshot [events/s]',
+                             'locking [events/s]'))
+    for threadCount in arguments.threads:
+        rates = [measure(bus, threadCount, arguments.count)
+                 for (_, bus) in buses]
+        print('%8d %22.0f %22.0f' % (threadCount, rates[0], rates[1]))
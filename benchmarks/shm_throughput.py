@@ -0,0 +1,138 @@
+# ============================================================
+#
+# Copyright (C) 2018 Jan Moringen <jmoringe@techfak.uni-bielefeld.de>
+#
+# This file may be licensed under the terms of the
+# GNU Lesser General Public License Version 3 (the ``LGPL''),
+# or (at your option) any later version.
+#
+# Software distributed under the License is distributed
+# on an ``AS IS'' basis, WITHOUT WARRANTY OF ANY KIND, either
+# express or implied. See the LGPL for the specific language
+# governing rights and limitations.
+#
+# You should have received a copy of the LGPL along with this
+# program. If not, go to http://www.gnu.org/licenses/lgpl.html
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# The development of this software was supported by:
+#   CoR-Lab, Research Institute for Cognition and Robotics
+#     Bielefeld University
+#
+# ============================================================
+
+
+"""
+Compares the throughput of the shared memory transport with the
+socket transport for a publisher and a subscriber in different
+processes on the same host.
+
+For each payload size, the publisher sends a fixed number of events as
+fast as possible. The number of received events is reported along with
+the throughput since the shared memory transport drops events for
+subscribers which fall behind by more than the size of the ring
+buffer.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+
+import rsb
+from rsb import ParticipantConfig
+
+
+def makeConfig(transport, options):
+    config = dict(('transport.%s.%s' % (transport, key), value)
+                  for (key, value) in options.items())
+    config['transport.%s.enabled' % transport] = '1'
+    config['introspection.enabled'] = '0'
+    return ParticipantConfig.fromDict(config)
+
+
+def makeConfigs(transport, port, path, size):
+    if transport == 'shm':
+        options = {'path': path, 'size': str(size)}
+        return makeConfig('shm', options), makeConfig('shm', options)
+    options = {'host': 'localhost', 'port': str(port), 'nodelay': '1'}
+    return (makeConfig('socket', dict(options, server='1')),
+            makeConfig('socket', dict(options, server='0')))
+
+
+def subscribe(config, count, ready, results):
+    received = []
+    with rsb.createListener('/benchmark/throughput', config=config) \
+            as listener:
+        listener.addHandler(lambda event: received.append(time.time()))
+        ready.set()
+        deadline = time.time() + 60
+        while len(received) < count and time.time() < deadline:
+            time.sleep(0.01)
+            # Stop waiting once events stop arriving.
+            if received and time.time() - received[-1] > 2:
+                break
+    results.put((len(received), received[-1] if received else 0))
+
+
+def measure(transport, port, path, ringSize, payloadSize, count):
+    publisherConfig, subscriberConfig = makeConfigs(transport, port,
+                                                    path, ringSize)
+    payload = b'x' * payloadSize
+
+    ready = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    with rsb.createInformer('/benchmark/throughput', dataType=bytes,
+                            config=publisherConfig) as informer:
+        process = multiprocessing.Process(
+            target=subscribe,
+            args=(subscriberConfig, count, ready, results))
+        process.start()
+        ready.wait()
+        time.sleep(0.5)
+
+        start = time.time()
+        for _ in range(count):
+            informer.publishData(payload)
+        received, last = results.get()
+        process.join()
+
+    return received, last - start
+
+
+if __name__ == '__main__':
+    # Pacify logger.
+    logging.basicConfig()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=55700)
+    parser.add_argument('--count', type=int, default=1000,
+                        help='number of events per measurement')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1024, 100 * 1024, 1024 * 1024],
+                        help='payload sizes in bytes')
+    parser.add_argument('--ring-size', type=int, default=64 * 1024 * 1024,
+                        help='size of the shared memory ring buffer')
+    arguments = parser.parse_args()
+
+    print('%10s %10s %12s %12s %12s' % ('transport', 'size [B]',
+                                        'received', 'events/s', 'MB/s'))
+    for (i, size) in enumerate(arguments.sizes):
+        for transport in ['socket', 'shm']:
+            path = os.path.join(tempfile.gettempdir(),
+                                'rsb-shm-benchmark-' + uuid.uuid4().hex)
+            try:
+                received, elapsed = measure(
+                    transport, arguments.port + i, path,
+                    arguments.ring_size, size, arguments.count)
+            finally:
+                if os.path.exists(path):
+                    os.unlink(path)
+            rate = received / elapsed if elapsed > 0 else 0
+            print('%10s %10d %7d/%-4d %12.1f %12.1f'
+                  % (transport, size, received, arguments.count,
+                     rate, rate * size / 1e6))
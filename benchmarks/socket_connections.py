@@ -0,0 +1,185 @@
+# ============================================================
+#
+# Copyright (C) 2018 Jan Moringen <jmoringe@techfak.uni-bielefeld.de>
+#
+# This file may be licensed under the terms of the
+# GNU Lesser General Public License Version 3 (the ``LGPL''),
+# or (at your option) any later version.
+#
+# Software distributed under the License is distributed
+# on an ``AS IS'' basis, WITHOUT WARRANTY OF ANY KIND, either
+# express or implied. See the LGPL for the specific language
+# governing rights and limitations.
+#
+# You should have received a copy of the LGPL along with this
+# program. If not, go to http://www.gnu.org/licenses/lgpl.html
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# The development of this software was supported by:
+#   CoR-Lab, Research Institute for Cognition and Robotics
+#     Bielefeld University
+#
+# ============================================================
+
+
+"""
+Compares the thread-per-connection I/O model of the socket transport
+with the selector-based one (the ``io`` option of the socket transport)
+as the number of connected clients grows.
+
+For each client count and I/O model, a :obj:`rsb.transport.socket.BusServer`
+is started and the given number of raw socket clients each send a
+number of notifications to it. The server is configured to receive
+the notifications through an in-direction connector. The achieved
+throughput and the number of threads in the process are reported.
+
+Note that the server forwards each notification to all other clients,
+so the total amount of work grows quadratically with the number of
+clients.
+"""
+
+import argparse
+import logging
+import selectors
+import socket
+import threading
+import time
+
+from rsb import Scope
+from rsb.converter import getGlobalConverterMap
+from rsb.transport.socket import (BusServer, InPushConnector,
+                                  NotificationFrame)
+
+from socket_fanout import makeNotification
+
+
+class Counter(object):
+
+    def __init__(self):
+        self.count = 0
+        self.condition = threading.Condition()
+
+    def __call__(self, event):
+        with self.condition:
+            self.count += 1
+            self.condition.notify_all()
+
+    def waitFor(self, count, timeout):
+        end = time.time() + timeout
+        with self.condition:
+            while self.count < count and time.time() < end:
+                self.condition.wait(end - time.time())
+            return self.count
+
+
+def connectClients(port, count):
+    clients = []
+    for _ in range(count):
+        client = socket.create_connection(('localhost', port))
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        handshake = b''
+        while len(handshake) < 4:
+            handshake += client.recv(4 - len(handshake))
+        clients.append(client)
+    return clients
+
+
+def exchange(clients, frame, messages, counter, expected, timeout):
+    # All clients are serviced by one selector so that the benchmark
+    # itself does not need a thread per client. Besides sending, the
+    # receive buffers of the clients have to be drained since the
+    # server forwards each notification to all other clients.
+    selector = selectors.DefaultSelector()
+    for client in clients:
+        client.setblocking(False)
+        selector.register(client, selectors.EVENT_READ | selectors.EVENT_WRITE,
+                          memoryview(frame * messages))
+    end = time.time() + timeout
+    while counter.count < expected and time.time() < end:
+        for key, mask in selector.select(0.001):
+            client, pending = key.fileobj, key.data
+            if mask & selectors.EVENT_READ:
+                try:
+                    client.recv(1 << 20)
+                except BlockingIOError:
+                    pass
+            if mask & selectors.EVENT_WRITE:
+                try:
+                    pending = pending[client.send(pending):]
+                except BlockingIOError:
+                    pass
+                selector.modify(client,
+                                selectors.EVENT_READ | (selectors.EVENT_WRITE
+                                                        if pending else 0),
+                                pending)
+    selector.close()
+
+
+def disconnect(server, clients):
+    # Shutting down the clients makes the server remove the
+    # respective connections.
+    for client in clients:
+        client.setblocking(True)
+        client.shutdown(socket.SHUT_WR)
+    while server.connections:
+        time.sleep(0.01)
+    for client in clients:
+        client.close()
+
+
+def run(port, clientCount, messages, selector, frame):
+    server = BusServer('localhost', port, True, selector=selector)
+    server.activate()
+    counter = Counter()
+    connector = InPushConnector(converters=getGlobalConverterMap(bytes))
+    connector.setScope(Scope('/benchmark'))
+    connector.setObserverAction(counter)
+    server.addConnector(connector)
+
+    clients = connectClients(port, clientCount)
+    while len(server.connections) < clientCount:
+        time.sleep(0.01)
+    threads = threading.active_count()
+
+    expected = clientCount * messages
+    start = time.perf_counter()
+    exchange(clients, frame, messages, counter, expected, timeout=60)
+    elapsed = time.perf_counter() - start
+    received = counter.count
+
+    disconnect(server, clients)
+    server.removeConnector(connector)
+    server.deactivate()
+    return received / elapsed, threads, received == expected
+
+
+if __name__ == '__main__':
+    # Pacify logger.
+    logging.basicConfig()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=55700)
+    parser.add_argument('--size', type=int, default=128,
+                        help='payload size in bytes')
+    parser.add_argument('--messages', type=int, default=200,
+                        help='number of notifications sent by each client')
+    parser.add_argument('--clients', type=int, nargs='+',
+                        default=[1, 10, 50, 100, 200])
+    arguments = parser.parse_args()
+
+    notification = makeNotification(arguments.size)
+    notification.scope = b'/benchmark/connections/'
+    frame = NotificationFrame(notification=notification).frame
+
+    print('%8s %10s %14s %8s' % ('clients', 'io', 'msgs/s', 'threads'))
+    port = arguments.port
+    for clientCount in arguments.clients:
+        for io in ['threads', 'selector']:
+            rate, threads, complete = run(port, clientCount,
+                                          arguments.messages,
+                                          io == 'selector', frame)
+            port += 1
+            print('%8d %10s %14.0f %8d%s'
+                  % (clientCount, io, rate, threads,
+                     '' if complete else ' (incomplete)'))
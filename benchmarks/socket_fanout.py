@@ -0,0 +1,110 @@
+# ============================================================
+#
+# Copyright (C) 2018 Jan Moringen <jmoringe@techfak.uni-bielefeld.de>
+#
+# This file may be licensed under the terms of the
+# GNU Lesser General Public License Version 3 (the ``LGPL''),
+# or (at your option) any later version.
+#
+# Software distributed under the License is distributed
+# on an ``AS IS'' basis, WITHOUT WARRANTY OF ANY KIND, either
+# express or implied. See the LGPL for the specific language
+# governing rights and limitations.
+#
+# You should have received a copy of the LGPL along with this
+# program. If not, go to http://www.gnu.org/licenses/lgpl.html
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# The development of this software was supported by:
+#   CoR-Lab, Research Institute for Cognition and Robotics
+#     Bielefeld University
+#
+# ============================================================
+
+"""
+Measures how the cost of publishing a notification through a socket
+:obj:`rsb.transport.socket.BusServer` grows with the number of connected
+clients.
+
+For each client count, the time per publish is reported for the
+serialize-once fan-out performed by the bus and, for comparison, for
+serializing the notification once per connection.
+"""
+
+import argparse
+import logging
+import time
+import uuid
+
+from rsb.protocol.Notification_pb2 import Notification
+from rsb.transport.socket import BusClient, BusServer
+
+
+def makeNotification(size):
+    notification = Notification()
+    notification.event_id.sender_id = uuid.uuid4().bytes
+    notification.event_id.sequence_number = 0
+    notification.scope = b'/benchmark/fanout/'
+    notification.wire_schema = b'bytes'
+    notification.data = b'x' * size
+    notification.meta_data.create_time = 0
+    notification.meta_data.send_time = 0
+    return notification
+
+
+def waitForConnections(server, count):
+    while len(server.connections) < count:
+        time.sleep(0.01)
+
+
+def measure(function, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        function()
+    return (time.perf_counter() - start) / count
+
+
+if __name__ == '__main__':
+    # Pacify logger.
+    logging.basicConfig()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=55600)
+    parser.add_argument('--size', type=int, default=1024,
+                        help='payload size in bytes')
+    parser.add_argument('--count', type=int, default=2000,
+                        help='number of publishes per measurement')
+    parser.add_argument('--clients', type=int, nargs='+',
+                        default=[1, 2, 5, 10, 20, 40])
+    arguments = parser.parse_args()
+
+    notification = makeNotification(arguments.size)
+
+    print('%8s %18s %18s' % ('clients', 'once [us/publish]',
+                             'per-conn [us/publish]'))
+    for (i, clientCount) in enumerate(arguments.clients):
+        port = arguments.port + i
+        server = BusServer('localhost', port, True)
+        server.activate()
+        clients = [BusClient('localhost', port, True)
+                   for _ in range(clientCount)]
+        for client in clients:
+            client.activate()
+        waitForConnections(server, clientCount)
+
+        def serializeOnce():
+            server.handleOutgoing(notification)
+
+        def serializePerConnection():
+            for connection in server.connections:
+                connection.handle(notification)
+
+        once = measure(serializeOnce, arguments.count)
+        perConnection = measure(serializePerConnection, arguments.count)
+        print('%8d %18.1f %18.1f' % (clientCount,
+                                     once * 1e6, perConnection * 1e6))
+
+        for client in clients:
+            client.deactivate()
+        server.deactivate()
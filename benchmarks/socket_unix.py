@@ -0,0 +1,154 @@
+# ============================================================
+#
+# Copyright (C) 2018 Jan Moringen <jmoringe@techfak.uni-bielefeld.de>
+#
+# This file may be licensed under the terms of the
+# GNU Lesser General Public License Version 3 (the ``LGPL''),
+# or (at your option) any later version.
+#
+# Software distributed under the License is distributed
+# on an ``AS IS'' basis, WITHOUT WARRANTY OF ANY KIND, either
+# express or implied. See the LGPL for the specific language
+# governing rights and limitations.
+#
+# You should have received a copy of the LGPL along with this
+# program. If not, go to http://www.gnu.org/licenses/lgpl.html
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# The development of this software was supported by:
+#   CoR-Lab, Research Institute for Cognition and Robotics
+#     Bielefeld University
+#
+# ============================================================
+
+
+"""
+Compares latency and throughput of socket bus connections over TCP
+loopback and over Unix domain sockets (the ``unix`` option of the
+socket transport).
+
+Latency is measured as the round trip time of a notification sent by
+a :obj:`rsb.transport.socket.BusClient` to a
+:obj:`rsb.transport.socket.BusServer` which immediately sends it back.
+Throughput is measured as the rate at which the bus server receives
+notifications sent by the bus client.
+"""
+
+import argparse
+import logging
+import threading
+import time
+
+from rsb.transport.socket import (BusClient, BusServer, NotificationFrame,
+                                  defaultUnixSocketPath)
+
+from socket_fanout import makeNotification, waitForConnections
+
+
+class Echo(object):
+
+    # Connections look for this attribute when removing bus handlers.
+    bus = None
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self, frame):
+        self.connection.sendFrame(frame.detach().frame)
+
+
+class Counter(object):
+
+    bus = None
+
+    def __init__(self):
+        self.count = 0
+        self.condition = threading.Condition()
+
+    def __call__(self, frame):
+        with self.condition:
+            self.count += 1
+            self.condition.notify_all()
+
+    def waitFor(self, count):
+        with self.condition:
+            while self.count < count:
+                self.condition.wait()
+
+
+def measureLatency(server, client, frame, count):
+    echo = Echo(server.connections[0])
+    server.connections[0].addHandler(echo)
+    counter = Counter()
+    client.connections[0].addHandler(counter)
+
+    roundTrips = []
+    for i in range(count):
+        start = time.perf_counter()
+        client.connections[0].sendFrame(frame)
+        counter.waitFor(i + 1)
+        roundTrips.append(time.perf_counter() - start)
+
+    client.connections[0].removeHandler(counter)
+    server.connections[0].removeHandler(echo)
+    roundTrips.sort()
+    return roundTrips[len(roundTrips) // 2], roundTrips[
+        int(len(roundTrips) * 0.99)]
+
+
+def measureThroughput(server, client, frame, count):
+    counter = Counter()
+    server.connections[0].addHandler(counter)
+
+    start = time.perf_counter()
+    for _ in range(count):
+        client.connections[0].sendFrame(frame)
+    counter.waitFor(count)
+    elapsed = time.perf_counter() - start
+
+    server.connections[0].removeHandler(counter)
+    return count / elapsed, count * len(frame) / elapsed
+
+
+if __name__ == '__main__':
+    # Pacify logger.
+    logging.basicConfig()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=55800)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[100, 10000, 1000000],
+                        help='payload sizes in bytes')
+    parser.add_argument('--round-trips', type=int, default=2000)
+    parser.add_argument('--messages', type=int, default=20000)
+    arguments = parser.parse_args()
+
+    print('%6s %10s %14s %14s %12s %10s'
+          % ('family', 'size [B]', 'median [us]', 'p99 [us]',
+             'msgs/s', 'MB/s'))
+    port = arguments.port
+    for size in arguments.sizes:
+        frame = NotificationFrame(notification=makeNotification(size)).frame
+        for family in ['tcp', 'unix']:
+            unixPath = defaultUnixSocketPath(port) \
+                if family == 'unix' else None
+            server = BusServer('localhost', port, True, unixPath=unixPath)
+            server.activate()
+            client = BusClient('localhost', port, True, unixPath=unixPath)
+            client.activate()
+            waitForConnections(server, 1)
+
+            median, p99 = measureLatency(
+                server, client, frame,
+                max(10, arguments.round_trips * 100 // max(size, 100)))
+            rate, bandwidth = measureThroughput(
+                server, client, frame,
+                max(10, arguments.messages * 100 // max(size, 100)))
+            print('%6s %10d %14.1f %14.1f %12.0f %10.1f'
+                  % (family, size, median * 1e6, p99 * 1e6,
+                     rate, bandwidth / 1e6))
+
+            client.deactivate()
+            server.deactivate()
+            port += 1
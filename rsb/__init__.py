@@ -84,6 +84,8 @@ def __registerDefaultTransports():
         local.initialize()
         import rsb.transport.socket as socket
         socket.initialize()
+        import rsb.transport.shm as shm
+        shm.initialize()
 
 
 class QualityOfServiceSpec(object):
@@ -340,6 +342,9 @@ class ParticipantConfig(object):
 
     * Whether introspection should be enabled for the participant
       (enabled by default)
+    * The strategy according to which listeners dispatch events to
+      their handlers (``parallel`` by default, ``inline`` to call
+      handlers in the receiving thread)
 
     .. codeauthor:: jmoringe
     """
@@ -430,7 +435,8 @@ class ParticipantConfig(object):
                  transports=None,
                  options=None,
                  qos=None,
-                 introspection=False):
+                 introspection=False,
+                 receivingStrategy='parallel'):
         if transports is None:
             self.__transports = {}
         else:
@@ -447,6 +453,7 @@ class ParticipantConfig(object):
             self.__qos = qos
 
         self.__introspection = introspection
+        self.__receivingStrategy = receivingStrategy
 
     def getTransports(self, includeDisabled=False):
         return [t for t in list(self.__transports.values())
@@ -474,6 +481,14 @@ class ParticipantConfig(object):
 
     introspection = property(getIntrospection, setIntrospection)
 
+    def getReceivingStrategy(self):
+        return self.__receivingStrategy
+
+    def setReceivingStrategy(self, newValue):
+        self.__receivingStrategy = newValue
+
+    receivingStrategy = property(getReceivingStrategy, setReceivingStrategy)
+
     def __deepcopy__(self, memo):
         result = copy.copy(self)
         result.__transports = copy.deepcopy(self.__transports, memo)
@@ -482,9 +497,9 @@ class ParticipantConfig(object):
 
     def __str__(self):
         return 'ParticipantConfig[%s, options = %s, ' \
-               'qos = %s, introspection = %s]' \
+               'qos = %s, introspection = %s, receivingStrategy = %s]' \
                % (list(self.__transports.values()), self.__options, self.__qos,
-                  self.__introspection)
+                  self.__introspection, self.__receivingStrategy)
 
     def __repr__(self):
         return str(self)
@@ -511,7 +526,7 @@ class ParticipantConfig(object):
                     QualityOfServiceSpec().getOrdering().__str__())))
 
         # Transport options
-        for transport in ['spread', 'socket', 'inprocess']:
+        for transport in ['spread', 'socket', 'inprocess', 'shm']:
             transportOptions = dict(sectionOptions('transport.%s' % transport))
             if transportOptions:
                 result.__transports[transport] = cls.Transport(
@@ -522,6 +537,11 @@ class ParticipantConfig(object):
         result.__introspection = _configValueIsTrue(
             introspectionOptions.get('enabled', '1'))
 
+        # Event receiving options
+        receivingStrategyOptions = dict(sectionOptions('receivingstrategy'))
+        result.__receivingStrategy = receivingStrategyOptions.get(
+            'name', 'parallel')
+
         return result
 
     @classmethod
@@ -1771,6 +1791,10 @@ class Listener(Participant):
             configurator:
                 An in route configurator to manage the receiving of events from
                 in connectors and their filtering and dispatching.
+            receivingStrategy (rsb.eventprocessing.PushEventReceivingStrategy):
+                The strategy according to which events are dispatched to
+                handlers. If ``None``, the strategy is chosen according
+                to ``config``.
 
         See Also:
             :obj:`createListener`
@@ -1792,9 +1816,15 @@ class Listener(Participant):
             for connector in connectors:
                 connector.setQualityOfServiceSpec(
                     config.getQualityOfServiceSpec())
+            if receivingStrategy is None:
+                receivingStrategy = \
+                    rsb.eventprocessing.createPushEventReceivingStrategy(
+                        config.getReceivingStrategy())
             self.__configurator = rsb.eventprocessing.InPushRouteConfigurator(
                 connectors=connectors,
                 receivingStrategy=receivingStrategy)
+        self.__configurator.setQualityOfServiceSpec(
+            config.getQualityOfServiceSpec())
         self.__configurator.setScope(self.scope)
 
         self.__activate()
@@ -1808,6 +1838,22 @@ class Listener(Participant):
 
     transportURLs = property(getTransportURLs)
 
+    def getDroppedEvents(self):
+        """
+        Returns the number of events which have been discarded for
+        this participant because it could not keep up. Events are only
+        discarded for
+        :obj:`QualityOfServiceSpec.Reliability.UNRELIABLE` delivery or
+        if a transport is configured accordingly.
+
+        Returns:
+            int:
+                The number of discarded events.
+        """
+        return self.__configurator.getDroppedEvents()
+
+    droppedEvents = property(getDroppedEvents)
+
     def __activate(self):
         # TODO commonality with Informer... refactor
         with self.__mutex:
@@ -1959,6 +2005,8 @@ class Reader(Participant):
                     config.getQualityOfServiceSpec())
             self.__configurator = rsb.eventprocessing.InPullRouteConfigurator(
                 connectors=connectors, receivingStrategy=receivingStrategy)
+        self.__configurator.setQualityOfServiceSpec(
+            config.getQualityOfServiceSpec())
         self.__configurator.setScope(self.scope)
 
         self.__activate()
@@ -1972,6 +2020,22 @@ class Reader(Participant):
 
     transportURLs = property(getTransportURLs)
 
+    def getDroppedEvents(self):
+        """
+        Returns the number of events which have been discarded for
+        this participant because it could not keep up. Events are only
+        discarded for
+        :obj:`QualityOfServiceSpec.Reliability.UNRELIABLE` delivery or
+        if a transport is configured accordingly.
+
+        Returns:
+            int:
+                The number of discarded events.
+        """
+        return self.__configurator.getDroppedEvents()
+
+    droppedEvents = property(getDroppedEvents)
+
     def __activate(self):
         with self.__mutex:
             if self.__active:
@@ -32,7 +32,9 @@ transport layer and the client interface.
 """
 
 import abc
+import collections
 import copy
+import itertools
 import threading
 import queue
 
@@ -40,20 +42,248 @@ import rsb.util
 import rsb.filter
 
 
+class ScopeTrie(object):
+    """
+    Maps :ref:`Scopes <scope>` to values. The scopes are stored as a
+    tree of their components, so that all values associated to a scope
+    and its super-scopes can be found by following a single path from
+    the root scope.
+
+    In addition to modifying a trie in place, :obj:`copyWith` and
+    :obj:`copyWithout` create modified copies which share all nodes
+    not on the path to the modified scope with the original trie.
+    This allows using tries as immutable snapshots which can be read
+    without locking.
+
+    .. codeauthor:: jmoringe
+    """
+
+    class Node(object):
+
+        __slots__ = ('children', 'value', 'hasValue')
+
+        def __init__(self):
+            self.children = {}
+            self.value = None
+            self.hasValue = False
+
+        def copy(self):
+            result = ScopeTrie.Node()
+            result.children = dict(self.children)
+            result.value = self.value
+            result.hasValue = self.hasValue
+            return result
+
+    def __init__(self):
+        self.__root = ScopeTrie.Node()
+        self.__size = 0
+
+    def __len__(self):
+        return self.__size
+
+    def __bool__(self):
+        return self.__size > 0
+
+    def __path(self, scope):
+        node = self.__root
+        path = [node]
+        for component in scope.getComponents():
+            node = node.children.get(component)
+            if node is None:
+                return None
+            path.append(node)
+        return path
+
+    def __contains__(self, scope):
+        path = self.__path(scope)
+        return path is not None and path[-1].hasValue
+
+    def __getitem__(self, scope):
+        path = self.__path(scope)
+        if path is None or not path[-1].hasValue:
+            raise KeyError(scope)
+        return path[-1].value
+
+    def get(self, scope, default=None):
+        """
+        Returns the value associated to ``scope`` or ``default``.
+        """
+        path = self.__path(scope)
+        if path is None or not path[-1].hasValue:
+            return default
+        return path[-1].value
+
+    def __setitem__(self, scope, value):
+        node = self.__root
+        for component in scope.getComponents():
+            child = node.children.get(component)
+            if child is None:
+                child = ScopeTrie.Node()
+                node.children[component] = child
+            node = child
+        if not node.hasValue:
+            self.__size += 1
+        node.value = value
+        node.hasValue = True
+
+    def __delitem__(self, scope):
+        path = self.__path(scope)
+        if path is None or not path[-1].hasValue:
+            raise KeyError(scope)
+        node = path[-1]
+        node.value = None
+        node.hasValue = False
+        self.__size -= 1
+
+        # Remove nodes which neither have a value nor children.
+        components = scope.getComponents()
+        for i in range(len(components), 0, -1):
+            node = path[i]
+            if node.hasValue or node.children:
+                break
+            del path[i - 1].children[components[i - 1]]
+
+    def __copyPath(self, scope):
+        # Copy the existing nodes on the path to scope. The copy can
+        # be modified at scope without affecting this trie.
+        result = ScopeTrie()
+        node = self.__root.copy()
+        result.__root = node
+        result.__size = self.__size
+        for component in scope.getComponents():
+            child = node.children.get(component)
+            if child is None:
+                break
+            child = child.copy()
+            node.children[component] = child
+            node = child
+        return result
+
+    def copyWith(self, scope, value):
+        """
+        Returns a copy of the trie in which ``value`` is associated to
+        ``scope``. The trie itself is not modified.
+
+        Args:
+            scope (rsb.Scope):
+                The scope with which ``value`` should be associated.
+            value:
+                The value.
+
+        Returns:
+            ScopeTrie:
+                The modified copy.
+        """
+        result = self.__copyPath(scope)
+        result[scope] = value
+        return result
+
+    def copyWithout(self, scope):
+        """
+        Returns a copy of the trie in which no value is associated to
+        ``scope``. The trie itself is not modified.
+
+        Args:
+            scope (rsb.Scope):
+                The scope the value of which should be removed.
+
+        Returns:
+            ScopeTrie:
+                The modified copy.
+
+        Raises:
+            KeyError:
+                If no value is associated to ``scope``.
+        """
+        if scope not in self:
+            raise KeyError(scope)
+        result = self.__copyPath(scope)
+        del result[scope]
+        return result
+
+    def items(self):
+        """
+        Returns a generator yielding all scopes and their values.
+
+        Yields:
+            pairs:
+                Pairs of :obj:`rsb.Scope` objects and values in an
+                unspecified order.
+        """
+        stack = [(self.__root, [])]
+        while stack:
+            node, components = stack.pop()
+            if node.hasValue:
+                yield (rsb.Scope('/' + ''.join(component + '/'
+                                               for component in components)),
+                       node.value)
+            for (component, child) in node.children.items():
+                stack.append((child, components + [component]))
+
+    def values(self):
+        for (_, value) in self.items():
+            yield value
+
+    def matchingValues(self, scope):
+        """
+        Returns a generator yielding the values associated to ``scope``
+        and its super-scopes.
+
+        Yields:
+            values:
+                The values in order from the root scope to ``scope``.
+        """
+        node = self.__root
+        if node.hasValue:
+            yield node.value
+        for component in scope.getComponents():
+            node = node.children.get(component)
+            if node is None:
+                return
+            if node.hasValue:
+                yield node.value
+
+    def hasMatch(self, scope):
+        """
+        Returns:
+            bool:
+                ``True`` if a value is associated to ``scope`` or one of
+                its super-scopes.
+        """
+        for _ in self.matchingValues(scope):
+            return True
+        return False
+
+
 class ScopeDispatcher(object):
     """
     Maintains a map of :ref:`Scopes <scope>` to sink objects.
 
+    Sinks are stored in a :obj:`ScopeTrie`. In addition, the sinks
+    matching recently dispatched scope strings are cached, so that
+    :obj:`matchingSinksForString` usually costs a single dictionary
+    lookup. The cache is cleared when sinks are added or removed.
+
+    Instances are not thread-safe.
+
     .. codeauthor:: jmoringe
     """
-    def __init__(self):
-        self.__map = dict()
+    def __init__(self, cacheSize=1024):
+        """
+        Args:
+            cacheSize (int):
+                The maximum number of scope strings for which matching
+                sinks are cached.
+        """
+        self.__trie = ScopeTrie()
+        self.__cacheSize = cacheSize
+        self.__cache = collections.OrderedDict()
 
     def __len__(self):
-        return len(self.__map)
+        return len(self.__trie)
 
     def __bool__(self):
-        return bool(self.__map)
+        return bool(self.__trie)
 
     def addSink(self, scope, sink):
         """
@@ -65,13 +295,13 @@ class ScopeDispatcher(object):
             sink (object):
                 The arbitrary object that should be associated to `scope`.
         """
-        if scope in self.__map:
-            sinks = self.__map[scope]
-        else:
+        sinks = self.__trie.get(scope)
+        if sinks is None:
             sinks = list()
-            self.__map[scope] = sinks
+            self.__trie[scope] = sinks
 
         sinks.append(sink)
+        self.__cache.clear()
 
     def removeSink(self, scope, sink):
         """
@@ -84,10 +314,11 @@ class ScopeDispatcher(object):
                 The arbitrary object that should be disassociated from
                 `scope`.
         """
-        sinks = self.__map.get(scope)
+        sinks = self.__trie.get(scope)
         sinks.remove(sink)
         if not sinks:
-            del self.__map[scope]
+            del self.__trie[scope]
+        self.__cache.clear()
 
     def getSinks(self):
         """
@@ -98,7 +329,7 @@ class ScopeDispatcher(object):
                 A generator yielding all known sinks in an unspecified
                 order.
         """
-        for sinks in list(self.__map.values()):
+        for sinks in list(self.__trie.values()):
             for sink in sinks:
                 yield sink
 
@@ -116,12 +347,45 @@ class ScopeDispatcher(object):
                 A generator yielding all matching sinks in an
                 unspecified order.
         """
-        for sink in self.__map.get(scope, []):
-            yield sink
-        for scope in scope.superScopes():
-            for sink in self.__map.get(scope, []):
+        for sinks in self.__trie.matchingValues(scope):
+            for sink in sinks:
                 yield sink
 
+    def matchingSinksForString(self, scope):
+        """
+        Returns the sinks matching the scope designated by the string
+        `scope`.
+
+        Args:
+            scope (str or bytes):
+                The string representation of the scope, for example the
+                scope field of a notification. Bytes are decoded as
+                ASCII.
+
+        Returns:
+            tuple:
+                The matching sinks in an unspecified order.
+
+        Raises:
+            ValueError:
+                If `scope` is not a valid scope string.
+        """
+        cache = self.__cache
+        sinks = cache.get(scope)
+        if sinks is not None:
+            cache.move_to_end(scope)
+            return sinks
+
+        if isinstance(scope, bytes):
+            parsed = rsb.Scope(scope.decode('ASCII'))
+        else:
+            parsed = rsb.Scope(scope)
+        sinks = tuple(self.matchingSinks(parsed))
+        cache[scope] = sinks
+        if len(cache) > self.__cacheSize:
+            cache.popitem(last=False)
+        return sinks
+
 
 class BroadcastProcessor(object):
     """
@@ -202,6 +466,27 @@ class PushEventReceivingStrategy(EventReceivingStrategy):
     def handle(self, event):
         pass
 
+    def setQualityOfServiceSpec(self, qos):
+        """
+        Adapts the strategy to the quality of service requirements
+        ``qos``. The default implementation ignores the requirements.
+
+        Args:
+            qos (rsb.QualityOfServiceSpec):
+                The desired quality of service settings.
+        """
+        pass
+
+    def getDroppedEvents(self):
+        """
+        Returns:
+            int:
+                The number of events which have been discarded instead
+                of being dispatched because the handlers could not keep
+                up.
+        """
+        return 0
+
 
 class PullEventReceivingStrategy(EventReceivingStrategy):
     """
@@ -254,16 +539,47 @@ class ParallelEventReceivingStrategy(PushEventReceivingStrategy):
     handlers in individual threads in parallel. Each handler is called only
     sequentially but potentially from different threads.
 
+    Filters are evaluated once per event, in :obj:`handle`, and only
+    matching events are queued for the handlers.
+
+    Events are queued per handler. The queues are unbounded unless
+    :obj:`rsb.QualityOfServiceSpec.Reliability.UNRELIABLE` delivery is
+    requested, in which case each queue holds at most
+    ``unreliableCapacity`` events and events are discarded according
+    to ``unreliablePolicy`` when a handler cannot keep up.
+
     .. codeauthor:: jwienke
     """
 
-    def __init__(self, numThreads=5):
+    def __init__(self, numThreads=5, unreliableCapacity=100,
+                 unreliablePolicy=None):
+        """
+        Args:
+            numThreads (int):
+                The number of dispatching threads.
+            unreliableCapacity (int):
+                The maximum number of queued events per handler for
+                unreliable delivery.
+            unreliablePolicy:
+                Either ``DROP_OLDEST`` or ``DROP_NEWEST`` of
+                :obj:`rsb.util.BoundedQueue.OverflowPolicy`. Determines
+                which event is discarded for unreliable delivery.
+                Defaults to ``DROP_OLDEST`` since fresh events are
+                usually worth more than stale ones.
+        """
         self.__logger = rsb.util.getLoggerByClass(self.__class__)
+        if unreliablePolicy is None:
+            unreliablePolicy = \
+                rsb.util.BoundedQueue.OverflowPolicy.DROP_OLDEST
+        self.__unreliableCapacity = unreliableCapacity
+        self.__unreliablePolicy = unreliablePolicy
         self.__pool = rsb.util.OrderedQueueDispatcherPool(
             threadPoolSize=numThreads, delFunc=self.__deliver,
-            filterFunc=self.__filter)
+            queuePolicy=unreliablePolicy)
         self.__pool.start()
-        self.__filters = []
+        self.__dropped = 0
+        # Immutable snapshot which is replaced when filters change.
+        self.__filters = ()
         self.__filtersMutex = threading.RLock()
 
     def __del__(self):
@@ -274,21 +590,27 @@ class ParallelEventReceivingStrategy(PushEventReceivingStrategy):
         self.__logger.debug("Deactivating ParallelEventReceivingStrategy")
         if self.__pool:
             self.__pool.stop()
+            self.__dropped = self.__pool.dropped
             self.__pool = None
 
+    def setQualityOfServiceSpec(self, qos):
+        if qos.getReliability() == \
+                rsb.QualityOfServiceSpec.Reliability.UNRELIABLE:
+            self.__pool.setQueueLimits(self.__unreliableCapacity,
+                                       self.__unreliablePolicy)
+        else:
+            self.__pool.setQueueLimits(None, self.__unreliablePolicy)
+
+    def getDroppedEvents(self):
+        pool = self.__pool
+        if pool is None:
+            return self.__dropped
+        return pool.dropped
+
     def __deliver(self, action, event):
         # pylint: disable=no-self-use
         action(event)
 
-    def __filter(self, action, event):
-        with self.__filtersMutex:
-            filterCopy = list(self.__filters)
-
-        for flt in filterCopy:
-            if not flt.match(event):
-                return False
-        return True
-
     def handle(self, event):
         """
         Dispatches the event to all registered listeners.
@@ -298,6 +620,9 @@ class ParallelEventReceivingStrategy(PushEventReceivingStrategy):
                 event to dispatch
         """
         self.__logger.debug("Processing event %s", event)
+        for flt in self.__filters:
+            if not flt.match(event):
+                return
         event.metaData.setDeliverTime()
         self.__pool.push(event)
 
@@ -313,11 +638,12 @@ class ParallelEventReceivingStrategy(PushEventReceivingStrategy):
 
     def addFilter(self, theFilter):
         with self.__filtersMutex:
-            self.__filters.append(theFilter)
+            self.__filters = self.__filters + (theFilter,)
 
     def removeFilter(self, theFilter):
         with self.__filtersMutex:
-            self.__filters = [f for f in self.__filters if f != theFilter]
+            self.__filters = tuple(f for f in self.__filters
+                                   if f != theFilter)
 
 
 class FullyParallelEventReceivingStrategy(PushEventReceivingStrategy):
@@ -326,33 +652,58 @@ class FullyParallelEventReceivingStrategy(PushEventReceivingStrategy):
     handlers in individual threads in parallel. Each handler can be called
     in parallel for different requests.
 
+    Handlers are called by a :obj:`rsb.util.BoundedExecutor` which runs
+    at most ``maxWorkers`` handler calls concurrently and queues up to
+    ``queueCapacity`` further calls. When the queue is full,
+    :obj:`handle` blocks until space becomes available. For
+    :obj:`rsb.QualityOfServiceSpec.Reliability.UNRELIABLE` delivery,
+    the calls which do not fit into the queue are discarded instead.
+
     .. codeauthor:: jwienke
     """
 
-    def __init__(self):
+    def __init__(self, maxWorkers=32, queueCapacity=1000):
+        """
+        Args:
+            maxWorkers (int):
+                The maximum number of concurrent handler calls.
+            queueCapacity (int or None):
+                The maximum number of handler calls waiting for a
+                worker or ``None`` for no limit.
+        """
         self.__logger = rsb.util.getLoggerByClass(self.__class__)
         self.__filters = []
         self.__mutex = threading.RLock()
         self.__handlers = []
+        self.__executor = rsb.util.BoundedExecutor(
+            maxWorkers, queueCapacity, name='DispatcherThread')
+        # None means waiting for space in the queue.
+        self.__submitTimeout = None
+        self.__dropped = 0
 
     def deactivate(self):
-        pass
+        self.__executor.shutdown()
 
-    class Worker(threading.Thread):
-
-        def __init__(self, handler, event, filters):
-            threading.Thread.__init__(self, name='DispatcherThread')
-            self.handler = handler
-            self.event = event
-            self.filters = filters
+    def getExecutor(self):
+        """
+        Returns:
+            rsb.util.BoundedExecutor:
+                The executor which calls the handlers. Its counters can
+                be used as metrics.
+        """
+        return self.__executor
 
-        def run(self):
+    executor = property(getExecutor)
 
-            for f in self.filters:
-                if not f.match(self.event):
-                    return
+    def setQualityOfServiceSpec(self, qos):
+        if qos.getReliability() == \
+                rsb.QualityOfServiceSpec.Reliability.UNRELIABLE:
+            self.__submitTimeout = 0
+        else:
+            self.__submitTimeout = None
 
-            self.handler(self.event)
+    def getDroppedEvents(self):
+        return self.__dropped
 
     def handle(self, event):
         """
@@ -364,12 +715,22 @@ class FullyParallelEventReceivingStrategy(PushEventReceivingStrategy):
         """
         self.__logger.debug("Processing event %s", event)
         event.metaData.setDeliverTime()
-        workers = []
         with self.__mutex:
-            for h in self.__handlers:
-                workers.append(self.Worker(h, event, list(self.__filters)))
-        for w in workers:
-            w.start()
+            handlers = list(self.__handlers)
+            filters = list(self.__filters)
+        for f in filters:
+            if not f.match(event):
+                return
+        for handler in handlers:
+            try:
+                self.__executor.submit(handler, event,
+                                       timeout=self.__submitTimeout)
+            except rsb.util.QueueFullError:
+                with self.__mutex:
+                    self.__dropped += 1
+            except rsb.util.InterruptedError:
+                # The strategy has been deactivated.
+                return
 
     def addHandler(self, handler, wait):
         # We can ignore wait since the pool implements the desired
@@ -400,6 +761,10 @@ class NonQueuingParallelEventReceivingStrategy(PushEventReceivingStrategy):
     block on inserting events into this strategy. Callers must ensure that they
     are in no active call for #handle when deactivating this instance.
 
+    For :obj:`rsb.QualityOfServiceSpec.Reliability.UNRELIABLE`
+    delivery, the transport does not block. Instead, a buffered event
+    which has not been picked up yet is replaced by the new one.
+
     .. codeauthor:: jwienke
     """
 
@@ -409,6 +774,8 @@ class NonQueuingParallelEventReceivingStrategy(PushEventReceivingStrategy):
         self.__mutex = threading.RLock()
         self.__handlers = []
         self.__queue = queue.Queue(1)
+        self.__reliable = True
+        self.__dropped = 0
         self.__interrupted = False
         self.__thread = threading.Thread(target=self.__work)
         self.__thread.start()
@@ -440,7 +807,28 @@ class NonQueuingParallelEventReceivingStrategy(PushEventReceivingStrategy):
     def handle(self, event):
         self.__logger.debug("Processing event %s", event)
         event.metaData.setDeliverTime()
-        self.__queue.put(event, True)
+        if self.__reliable:
+            self.__queue.put(event, True)
+            return
+
+        while True:
+            try:
+                self.__queue.put(event, False)
+                return
+            except queue.Full:
+                pass
+            try:
+                self.__queue.get(False)
+                self.__dropped += 1
+            except queue.Empty:
+                pass
+
+    def setQualityOfServiceSpec(self, qos):
+        self.__reliable = qos.getReliability() != \
+            rsb.QualityOfServiceSpec.Reliability.UNRELIABLE
+
+    def getDroppedEvents(self):
+        return self.__dropped
 
     def addHandler(self, handler, wait):
         with self.__mutex:
@@ -459,6 +847,133 @@ class NonQueuingParallelEventReceivingStrategy(PushEventReceivingStrategy):
             self.__filters = [f for f in self.__filters if f != theFilter]
 
 
+class InlineEventReceivingStrategy(PushEventReceivingStrategy):
+    """
+    An :obj:`PushEventReceivingStrategy` that filters and dispatches
+    events to the handlers in the thread which calls :obj:`handle`,
+    usually the thread of the publisher for the in-process transport
+    or the receiving thread of the connector. This avoids thread
+    switches but delays the caller until all handlers have returned.
+
+    Handlers and filters are kept in immutable snapshots, so
+    dispatching does not contend with adding or removing them. Each
+    dispatch briefly locks a condition variable twice to register
+    and unregister itself, so that :obj:`removeHandler` can wait for
+    running dispatches. Exceptions raised by handlers are logged and
+    do not affect other handlers or the caller.
+
+    .. codeauthor:: jmoringe
+    """
+
+    def __init__(self):
+        self.__logger = rsb.util.getLoggerByClass(self.__class__)
+        self.__mutex = threading.Lock()
+        self.__handlers = ()
+        self.__filters = ()
+
+        # Running dispatches and their threads, for removeHandler
+        # with wait.
+        self.__condition = threading.Condition()
+        self.__dispatches = {}
+        self.__nextDispatch = itertools.count()
+
+    def deactivate(self):
+        pass
+
+    def handle(self, event):
+        """
+        Dispatches the event to all registered handlers.
+
+        Args:
+            event:
+                event to dispatch
+        """
+        event.metaData.setDeliverTime()
+        handlers = self.__handlers
+        if not handlers:
+            return
+        for f in self.__filters:
+            if not f.match(event):
+                return
+
+        dispatch = next(self.__nextDispatch)
+        with self.__condition:
+            self.__dispatches[dispatch] = threading.current_thread()
+        try:
+            for handler in handlers:
+                try:
+                    handler(event)
+                except Exception:
+                    self.__logger.exception('Handler %s failed for event %s',
+                                            handler, event)
+        finally:
+            with self.__condition:
+                del self.__dispatches[dispatch]
+                self.__condition.notify_all()
+
+    def addHandler(self, handler, wait):
+        with self.__mutex:
+            self.__handlers = self.__handlers + (handler,)
+
+    def removeHandler(self, handler, wait):
+        with self.__mutex:
+            handlers = list(self.__handlers)
+            handlers.remove(handler)
+            self.__handlers = tuple(handlers)
+
+        if not wait:
+            return
+
+        # Wait for dispatches which may still call handler except
+        # those in the current thread, which would never finish if
+        # handler removes itself.
+        thread = threading.current_thread()
+        with self.__condition:
+            pending = set(dispatch
+                          for (dispatch, dispatchThread)
+                          in self.__dispatches.items()
+                          if dispatchThread is not thread)
+            while pending:
+                self.__condition.wait()
+                pending.intersection_update(self.__dispatches)
+
+    def addFilter(self, theFilter):
+        with self.__mutex:
+            self.__filters = self.__filters + (theFilter,)
+
+    def removeFilter(self, theFilter):
+        with self.__mutex:
+            self.__filters = tuple(f for f in self.__filters
+                                   if f != theFilter)
+
+
+def createPushEventReceivingStrategy(name):
+    """
+    Creates a :obj:`PushEventReceivingStrategy` given its configuration
+    name.
+
+    Args:
+        name (str):
+            ``"parallel"`` for :obj:`ParallelEventReceivingStrategy` or
+            ``"inline"`` for :obj:`InlineEventReceivingStrategy`.
+
+    Returns:
+        PushEventReceivingStrategy:
+            The new strategy.
+
+    Raises:
+        ValueError:
+            If ``name`` does not designate a strategy.
+    """
+    if name == 'parallel':
+        return ParallelEventReceivingStrategy()
+    elif name == 'inline':
+        return InlineEventReceivingStrategy()
+    else:
+        raise ValueError('Receiving strategy has to be "parallel" or '
+                         '"inline", not "%s"' % name)
+
+
 class EventSendingStrategy(object):
     def getConnectors(self):
         raise NotImplementedError
@@ -583,6 +1098,19 @@ class Configurator(object):
         for connector in self.connectors:
             connector.setQualityOfServiceSpec(qos)
 
+    def getDroppedEvents(self):
+        """
+        Returns:
+            int:
+                The number of events which have been discarded by the
+                managed connectors and event processing because of
+                overload.
+        """
+        return sum(connector.getDroppedEvents()
+                   for connector in self.connectors)
+
+    droppedEvents = property(getDroppedEvents)
+
 
 class InPushRouteConfigurator(Configurator):
     """
@@ -625,6 +1153,16 @@ class InPushRouteConfigurator(Configurator):
             connector.setObserverAction(None)
         self.__receivingStrategy.deactivate()
 
+    def setQualityOfServiceSpec(self, qos):
+        super(InPushRouteConfigurator, self).setQualityOfServiceSpec(qos)
+        self.__receivingStrategy.setQualityOfServiceSpec(qos)
+
+    def getDroppedEvents(self):
+        return super(InPushRouteConfigurator, self).getDroppedEvents() \
+            + self.__receivingStrategy.getDroppedEvents()
+
+    droppedEvents = property(getDroppedEvents)
+
     def handlerAdded(self, handler, wait):
         self.__receivingStrategy.addHandler(handler, wait)
 
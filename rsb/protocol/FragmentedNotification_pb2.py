@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: rsb/protocol/FragmentedNotification.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from rsb.protocol import Notification_pb2 as rsb_dot_protocol_dot_Notification__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n)rsb/protocol/FragmentedNotification.proto\x12\x0crsb.protocol\x1a\x1frsb/protocol/Notification.proto\"{\n\x16\x46ragmentedNotification\x12\x30\n\x0cnotification\x18\x01 \x02(\x0b\x32\x1a.rsb.protocol.Notification\x12\x19\n\x0enum_data_parts\x18\x02 \x02(\r:\x01\x31\x12\x14\n\tdata_part\x18\x03 \x02(\r:\x01\x30\x42\x1c\x42\x1a\x46ragmentedNotificationType')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'rsb.protocol.FragmentedNotification_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  DESCRIPTOR._serialized_options = b'B\032FragmentedNotificationType'
+  _FRAGMENTEDNOTIFICATION._serialized_start=92
+  _FRAGMENTEDNOTIFICATION._serialized_end=215
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: rsb/protocol/collections/EventsByScopeMap.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from rsb.protocol import Notification_pb2 as rsb_dot_protocol_dot_Notification__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n/rsb/protocol/collections/EventsByScopeMap.proto\x12\x18rsb.protocol.collections\x1a\x1frsb/protocol/Notification.proto\"\xa3\x01\n\x10\x45ventsByScopeMap\x12\x41\n\x04sets\x18\x01 \x03(\x0b\x32\x33.rsb.protocol.collections.EventsByScopeMap.ScopeSet\x1aL\n\x08ScopeSet\x12\r\n\x05scope\x18\x01 \x02(\x0c\x12\x31\n\rnotifications\x18\x02 \x03(\x0b\x32\x1a.rsb.protocol.NotificationB\x16\x42\x14\x45ventsByScopeMapType')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'rsb.protocol.collections.EventsByScopeMap_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  DESCRIPTOR._serialized_options = b'B\024EventsByScopeMapType'
+  _EVENTSBYSCOPEMAP._serialized_start=111
+  _EVENTSBYSCOPEMAP._serialized_end=274
+  _EVENTSBYSCOPEMAP_SCOPESET._serialized_start=198
+  _EVENTSBYSCOPEMAP_SCOPESET._serialized_end=274
+# @@protoc_insertion_point(module_scope)
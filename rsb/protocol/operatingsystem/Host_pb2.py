@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: rsb/protocol/operatingsystem/Host.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\'rsb/protocol/operatingsystem/Host.proto\x12\x1crsb.protocol.operatingsystem\"\x84\x01\n\x04Host\x12\n\n\x02id\x18\x01 \x02(\t\x12\x10\n\x08hostname\x18\x02 \x02(\t\x12\x14\n\x0cmachine_type\x18\x03 \x01(\t\x12\x17\n\x0fmachine_version\x18\x04 \x01(\t\x12\x15\n\rsoftware_type\x18\x05 \x01(\t\x12\x18\n\x10software_version\x18\x06 \x01(\tB\nB\x08HostType')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'rsb.protocol.operatingsystem.Host_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  DESCRIPTOR._serialized_options = b'B\010HostType'
+  _HOST._serialized_start=74
+  _HOST._serialized_end=206
+# @@protoc_insertion_point(module_scope)
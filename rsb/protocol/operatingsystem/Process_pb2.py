@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: rsb/protocol/operatingsystem/Process.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n*rsb/protocol/operatingsystem/Process.proto\x12\x1crsb.protocol.operatingsystem\"\xa1\x01\n\x07Process\x12\n\n\x02id\x18\x01 \x02(\t\x12\x14\n\x0cprogram_name\x18\x02 \x02(\t\x12\x1d\n\x15\x63ommandline_arguments\x18\x03 \x03(\t\x12\x12\n\nstart_time\x18\x04 \x02(\x04\x12\x16\n\x0e\x65xecuting_user\x18\x05 \x01(\t\x12\x13\n\x0brsb_version\x18\x07 \x01(\t\x12\x14\n\x0c\x64isplay_name\x18\x08 \x01(\tB\rB\x0bProcessType')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'rsb.protocol.operatingsystem.Process_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  DESCRIPTOR._serialized_options = b'B\013ProcessType'
+  _PROCESS._serialized_start=77
+  _PROCESS._serialized_end=238
+# @@protoc_insertion_point(module_scope)
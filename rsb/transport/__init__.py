@@ -106,6 +106,18 @@ class Connector(object, metaclass=abc.ABCMeta):
     def setQualityOfServiceSpec(self, qos):
         pass
 
+    def getDroppedEvents(self):
+        """
+        Returns the number of events which the connector discarded
+        because its buffers were full. Connectors which do not discard
+        events return 0.
+
+        Returns:
+            int:
+                The number of discarded events.
+        """
+        return 0
+
 
 class InPushConnector(Connector):
     """
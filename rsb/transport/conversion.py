@@ -31,10 +31,15 @@ vice versa.
 .. codeauthor:: jwienke
 """
 
+import collections
 import itertools
+import threading
+import time
 import uuid
 
 import rsb
+import rsb.filter
+import rsb.util
 from rsb.util import unixMicrosecondsToTime, timeToUnixMicroseconds
 
 from rsb.protocol.EventId_pb2 import EventId
@@ -157,3 +162,593 @@ def eventAndWireDataToNotifications(event, wireData, wireSchema,
             fragment.num_data_parts = len(fragments)
 
     return fragments
+
+
+def notificationToFragments(notification, maxFragmentSize):
+    """
+    Splits the payload of ``notification`` into
+    :obj:`FragmentedNotification` objects the serialized size of which
+    does not exceed ``maxFragmentSize``.
+
+    Like :obj:`eventAndWireDataToNotifications`, the first fragment
+    carries all fields of ``notification`` and subsequent fragments
+    only the event id and their part of the payload. Fragments are
+    produced lazily so that only one of them has to be in memory at a
+    time. Fragment objects are reused, so each fragment has to be
+    serialized before the next one is requested.
+
+    Args:
+        notification (Notification):
+            The notification which should be split. Not modified.
+        maxFragmentSize (int):
+            The maximum size in bytes of a serialized fragment.
+
+    Returns:
+        iterator:
+            An iterator of :obj:`FragmentedNotification` objects.
+
+    Raises:
+        ValueError:
+            If the fields of ``notification`` other than the payload do
+            not fit into a single fragment.
+    """
+    data = notification.data
+
+    first = FragmentedNotification()
+    first.notification.CopyFrom(notification)
+    first.notification.ClearField('data')
+    rest = FragmentedNotification()
+    rest.notification.event_id.CopyFrom(notification.event_id)
+
+    # Reserve room for the field header of the payload, the larger
+    # length prefix of the embedded notification and larger fragment
+    # numbers.
+    for fragment in (first, rest):
+        fragment.num_data_parts = 1
+        fragment.data_part = 0
+    rooms = [maxFragmentSize - fragment.ByteSize() - 20
+             for fragment in (first, rest)]
+    if min(rooms) < 1:
+        raise ValueError('The notification cannot be fragmented because '
+                         'its meta-data would not fit into a single '
+                         'fragment of size %d' % maxFragmentSize)
+    firstRoom, room = rooms
+    count = 1 + max(0, -(-(len(data) - firstRoom) // room))
+
+    offset = 0
+    for i in range(count):
+        fragment = first if i == 0 else rest
+        size = firstRoom if i == 0 else room
+        fragment.num_data_parts = count
+        fragment.data_part = i
+        fragment.notification.data = data[offset:offset + size]
+        offset += size
+        yield fragment
+
+
+class _PartialEvent(object):
+    """
+    The fragments of an event which have been received so far.
+
+    The payload is written into a buffer with one slot per fragment,
+    the size of which is the payload size of the largest fragment seen
+    so far. Since all fragments but the first and the last one usually
+    are of the same size, the buffer is allocated once the first
+    fragment other than the initial one, which is smaller because it
+    carries the meta-data, has arrived and rarely has to be
+    reallocated. When the event is complete, the slots are moved
+    together in place.
+    """
+
+    __slots__ = ('notification', 'head', 'sizes', 'slot', 'buffer',
+                 'missing')
+
+    def __init__(self, count):
+        self.notification = None
+        self.head = None
+        self.sizes = [None] * count
+        self.slot = 0
+        self.buffer = bytearray()
+        self.missing = count
+
+    def getMemory(self):
+        return len(self.buffer) + (len(self.head) if self.head else 0)
+
+    memory = property(getMemory)
+
+    def add(self, index, data):
+        """
+        Stores ``data`` as the payload of fragment ``index`` and returns
+        the resulting change of :obj:`memory`.
+        """
+        before = self.memory
+        self.sizes[index] = len(data)
+        self.missing -= 1
+        if index == 0 and not self.buffer and self.missing:
+            self.head = data
+        else:
+            if len(data) > self.slot or self.head is not None:
+                self.__resize(max(len(data), self.slot,
+                                  len(self.head or b'')))
+            start = index * self.slot
+            self.buffer[start:start + len(data)] = data
+        return self.memory - before
+
+    def __resize(self, slot):
+        old, oldSlot = memoryview(self.buffer), self.slot
+        self.buffer = bytearray(len(self.sizes) * slot)
+        self.slot = slot
+        for (index, size) in enumerate(self.sizes):
+            if size is not None and index * oldSlot + size <= len(old):
+                self.buffer[index * slot:index * slot + size] = \
+                    old[index * oldSlot:index * oldSlot + size]
+        if self.head is not None:
+            self.buffer[:len(self.head)] = self.head
+            self.head = None
+
+    def payload(self):
+        view, offset = memoryview(self.buffer), 0
+        for (index, size) in enumerate(self.sizes):
+            start = index * self.slot
+            if start != offset:
+                view[offset:offset + size] = view[start:start + size]
+            offset += size
+        # Protocol buffers insist on bytes, so this is the only copy
+        # of the complete payload.
+        return bytes(view[:offset])
+
+
+class Assembler(object):
+    """
+    Reassembles events from :obj:`FragmentedNotification` objects
+    within bounded memory.
+
+    Incomplete events are identified by their event id. The memory
+    used by their buffers is limited by a global cap. When a new
+    fragment would exceed the cap, the incomplete events which have not
+    received a fragment for the longest time are dropped. Incomplete
+    events which do not receive a fragment within a timeout are dropped
+    as well. Further fragments of dropped events are ignored.
+
+    The methods of this class can be called from multiple threads.
+
+    .. codeauthor:: jmoringe
+    """
+
+    # Number of dropped events remembered for ignoring their further
+    # fragments.
+    DROPPED_HISTORY = 1024
+
+    def __init__(self, maxBytes=256 * 1024 * 1024, timeout=30.0):
+        """
+        Args:
+            maxBytes (int):
+                The maximum number of bytes buffered for incomplete
+                events.
+            timeout (float):
+                The number of seconds after which an incomplete event
+                which did not receive further fragments is dropped.
+        """
+        self.__logger = rsb.util.getLoggerByClass(self.__class__)
+
+        self.__maxBytes = maxBytes
+        self.__timeout = timeout
+
+        # Maps event ids to pairs of the time of their latest fragment
+        # and their partial event, least recently updated first.
+        self.__events = collections.OrderedDict()
+        self.__dropped = collections.OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+
+        self.__completedEvents = 0
+        self.__expiredEvents = 0
+        self.__evictedEvents = 0
+        self.__rejectedEvents = 0
+        self.__duplicateFragments = 0
+        self.__ignoredFragments = 0
+
+    def getMaxBytes(self):
+        return self.__maxBytes
+
+    maxBytes = property(getMaxBytes)
+
+    def getTimeout(self):
+        return self.__timeout
+
+    timeout = property(getTimeout)
+
+    def getBytes(self):
+        """
+        Returns:
+            int:
+                The number of bytes currently buffered for incomplete
+                events.
+        """
+        return self.__bytes
+
+    bytes = property(getBytes)
+
+    def getPartialEvents(self):
+        """
+        Returns:
+            int:
+                The number of incomplete events.
+        """
+        return len(self.__events)
+
+    partialEvents = property(getPartialEvents)
+
+    def getCompletedEvents(self):
+        return self.__completedEvents
+
+    completedEvents = property(getCompletedEvents)
+
+    def getExpiredEvents(self):
+        """
+        Returns:
+            int:
+                The number of incomplete events dropped because of the
+                timeout.
+        """
+        return self.__expiredEvents
+
+    expiredEvents = property(getExpiredEvents)
+
+    def getEvictedEvents(self):
+        """
+        Returns:
+            int:
+                The number of incomplete events dropped to make room
+                for the fragments of other events.
+        """
+        return self.__evictedEvents
+
+    evictedEvents = property(getEvictedEvents)
+
+    def getRejectedEvents(self):
+        """
+        Returns:
+            int:
+                The number of events dropped because they alone would
+                exceed the memory cap.
+        """
+        return self.__rejectedEvents
+
+    rejectedEvents = property(getRejectedEvents)
+
+    def getDroppedEvents(self):
+        return self.__expiredEvents + self.__evictedEvents \
+            + self.__rejectedEvents
+
+    droppedEvents = property(getDroppedEvents)
+
+    def getDuplicateFragments(self):
+        return self.__duplicateFragments
+
+    duplicateFragments = property(getDuplicateFragments)
+
+    def getIgnoredFragments(self):
+        """
+        Returns:
+            int:
+                The number of fragments of dropped events which arrived
+                after their event had been dropped.
+        """
+        return self.__ignoredFragments
+
+    ignoredFragments = property(getIgnoredFragments)
+
+    def add(self, fragment):
+        """
+        Adds ``fragment`` and returns the complete notification if
+        ``fragment`` was the last missing fragment of its event.
+
+        Args:
+            fragment (FragmentedNotification):
+                The fragment. Its notification may be retained.
+
+        Returns:
+            Notification or None:
+                The complete notification or ``None``.
+
+        Raises:
+            ValueError:
+                If the fragment index is out of range.
+        """
+        notification = fragment.notification
+        count = fragment.num_data_parts
+        if count == 1:
+            return notification
+
+        index = fragment.data_part
+        if index >= count:
+            raise ValueError('Fragment index %d is not below fragment '
+                             'count %d' % (index, count))
+        key = (notification.event_id.sender_id,
+               notification.event_id.sequence_number)
+        data = notification.data
+
+        with self.__lock:
+            now = time.time()
+            self.__expire(now)
+
+            if key in self.__dropped:
+                self.__ignoredFragments += 1
+                return None
+
+            entry = self.__events.get(key)
+            if entry is None:
+                if count * len(data) > self.__maxBytes:
+                    self.__reject(key)
+                    return None
+                event = _PartialEvent(count)
+            else:
+                event = entry[1]
+                if len(event.sizes) != count \
+                        or event.sizes[index] is not None:
+                    self.__duplicateFragments += 1
+                    return None
+
+            self.__bytes += event.add(index, data)
+            self.__events[key] = (now, event)
+            self.__events.move_to_end(key)
+            if event.memory > self.__maxBytes:
+                self.__drop(key)
+                self.__reject(key)
+                return None
+            self.__evict(key)
+
+            if index == 0:
+                notification.ClearField('data')
+                event.notification = notification
+            if event.missing:
+                return None
+
+            del self.__events[key]
+            self.__bytes -= event.memory
+            self.__completedEvents += 1
+
+        complete = event.notification
+        complete.data = event.payload()
+        return complete
+
+    def prune(self):
+        """
+        Drops incomplete events which timed out. This happens
+        automatically when fragments are added.
+        """
+        with self.__lock:
+            self.__expire(time.time())
+
+    def __expire(self, now):
+        events = self.__events
+        while events:
+            key, (updated, _) = next(iter(events.items()))
+            if now - updated < self.__timeout:
+                break
+            self.__logger.warn('Dropping incomplete event %s after %s '
+                               'second(s) without fragments',
+                               key, self.__timeout)
+            self.__drop(key)
+            self.__expiredEvents += 1
+
+    def __evict(self, current):
+        # The event which received the current fragment is the most
+        # recently updated one and thus evicted last.
+        events = self.__events
+        while self.__bytes > self.__maxBytes:
+            key = next(iter(events))
+            if key == current:
+                break
+            self.__logger.warn('Dropping incomplete event %s to make room '
+                               'for fragments of other events', key)
+            self.__drop(key)
+            self.__evictedEvents += 1
+
+    def __drop(self, key):
+        _, event = self.__events.pop(key)
+        self.__bytes -= event.memory
+        self.__remember(key)
+
+    def __reject(self, key):
+        self.__logger.warn('Dropping event %s which exceeds the memory '
+                           'limit of %d bytes', key, self.__maxBytes)
+        self.__rejectedEvents += 1
+        self.__remember(key)
+
+    def __remember(self, key):
+        self.__dropped[key] = True
+        if len(self.__dropped) > self.DROPPED_HISTORY:
+            self.__dropped.popitem(last=False)
+
+    def __repr__(self):
+        return '<%s %d partial event(s) %d byte(s) at 0x%x>' \
+            % (type(self).__name__, len(self.__events), self.__bytes,
+               id(self))
+
+
+def _readVarint(buffer, offset):
+    result, shift = 0, 0
+    while True:
+        byte = buffer[offset]
+        offset += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, offset
+        shift += 7
+
+
+def peekScopeAndWireSchema(serialized):
+    """
+    Extracts the scope and wire-schema of a serialized :obj:`Notification`
+    by scanning its wire representation instead of parsing it.
+
+    Fields other than ``scope`` (field number 6) and ``wire_schema``
+    (field number 7) are skipped without being decoded and scanning stops
+    as soon as both fields have been found. Since protocol buffer
+    serializers write fields in field number order, this usually means
+    that only the first few bytes of the notification are looked at,
+    regardless of the size of its payload.
+
+    Args:
+        serialized (bytes or bytearray or memoryview):
+            The serialized notification.
+
+    Returns:
+        tuple:
+            A pair of the scope and the wire-schema as bytes. Either
+            element is ``None`` if the respective field is not present.
+
+    Raises:
+        ValueError:
+            If ``serialized`` is not a valid protocol buffer message.
+    """
+    buffer = memoryview(serialized)
+    scope, wireSchema = None, None
+    offset, end = 0, len(buffer)
+    try:
+        while offset < end and (scope is None or wireSchema is None):
+            tag, offset = _readVarint(buffer, offset)
+            fieldNumber, wireType = tag >> 3, tag & 0x7
+            if wireType == 0:    # varint
+                _, offset = _readVarint(buffer, offset)
+            elif wireType == 1:  # 64 bit
+                offset += 8
+            elif wireType == 2:  # length-delimited
+                length, offset = _readVarint(buffer, offset)
+                if fieldNumber == 6:
+                    scope = bytes(buffer[offset:offset + length])
+                elif fieldNumber == 7:
+                    wireSchema = bytes(buffer[offset:offset + length])
+                offset += length
+            elif wireType == 5:  # 32 bit
+                offset += 4
+            else:
+                raise ValueError('Unsupported wire type %d for field %d'
+                                 % (wireType, fieldNumber))
+    except IndexError:
+        raise ValueError('Truncated notification')
+    if offset > end:
+        raise ValueError('Truncated notification')
+    return scope, wireSchema
+
+
+def _invertible(predicate, invert):
+    if invert:
+        return lambda notification: not predicate(notification)
+    return predicate
+
+
+def _compileScopeFilter(theFilter):
+    # Scope.toBytes() ends with a slash, so prefix matching accepts the
+    # scope itself and all of its sub-scopes.
+    prefix = theFilter.getScope().toBytes()
+    return lambda notification: notification.scope.startswith(prefix)
+
+
+def _compileOriginFilter(theFilter):
+    senderId = theFilter.origin.bytes
+    return _invertible(
+        lambda notification: notification.event_id.sender_id == senderId,
+        theFilter.invert)
+
+
+def _compileMethodFilter(theFilter):
+    if theFilter.method is None:
+        def predicate(notification):
+            return not notification.HasField('method')
+    else:
+        method = theFilter.method.encode('ASCII')
+
+        def predicate(notification):
+            return notification.HasField('method') \
+                and notification.method == method
+    return _invertible(predicate, theFilter.invert)
+
+
+def _compileCauseFilter(theFilter):
+    key = (theFilter.cause.participantId.bytes,
+           theFilter.cause.sequenceNumber)
+
+    def predicate(notification):
+        for cause in notification.causes:
+            if (cause.sender_id, cause.sequence_number) == key:
+                return True
+        return False
+    return _invertible(predicate, theFilter.invert)
+
+
+class NotificationFilter(object):
+    """
+    Evaluates filters on received :obj:`Notification` objects before
+    they are converted into events.
+
+    Connectors feed the filters they are notified about into instances
+    of this class. Filters of the types :obj:`rsb.filter.ScopeFilter`,
+    :obj:`rsb.filter.OriginFilter`, :obj:`rsb.filter.MethodFilter` and
+    :obj:`rsb.filter.CauseFilter` are compiled into checks of the
+    respective notification fields. This allows rejecting notifications
+    without deserializing their payloads. Other filters are ignored
+    since they may need the converted event. They are still applied by
+    the event receiving strategy, as are the compiled ones.
+
+    .. codeauthor:: jmoringe
+    """
+
+    COMPILERS = {
+        rsb.filter.ScopeFilter: _compileScopeFilter,
+        rsb.filter.OriginFilter: _compileOriginFilter,
+        rsb.filter.MethodFilter: _compileMethodFilter,
+        rsb.filter.CauseFilter: _compileCauseFilter
+    }
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        # Immutable snapshot of (filter, predicate) pairs which is
+        # replaced when filters change.
+        self.__predicates = ()
+
+    def __len__(self):
+        return len(self.__predicates)
+
+    def filterNotify(self, theFilter, action):
+        """
+        Adds or removes ``theFilter`` according to ``action``.
+
+        Args:
+            theFilter (rsb.filter.AbstractFilter):
+                The filter. Ignored unless it can be compiled.
+            action (rsb.filter.FilterAction):
+                ``ADD`` or ``REMOVE``. Other actions are ignored.
+        """
+        # Subclasses may override match, so only exact types are
+        # compiled.
+        compiler = self.COMPILERS.get(type(theFilter))
+        if compiler is None:
+            return
+
+        with self.__lock:
+            if action == rsb.filter.FilterAction.ADD:
+                self.__predicates = self.__predicates \
+                    + ((theFilter, compiler(theFilter)),)
+            elif action == rsb.filter.FilterAction.REMOVE:
+                self.__predicates = tuple(
+                    (f, p) for (f, p) in self.__predicates
+                    if f != theFilter)
+
+    def match(self, notification):
+        """
+        Args:
+            notification (Notification):
+                The notification to check.
+
+        Returns:
+            bool:
+                ``True`` if ``notification`` passes all compiled
+                filters.
+        """
+        for _, predicate in self.__predicates:
+            if not predicate(notification):
+                return False
+        return True
@@ -33,21 +33,41 @@ serialization overhead.
 import os
 import platform
 from threading import RLock
-import queue
 
+import rsb.util
 from rsb import transport
+from rsb.eventprocessing import ScopeTrie
 
 
 class Bus(object):
     """
     Singleton-like representation of the local bus.
 
+    The sinks are kept in an immutable snapshot of the routing table
+    which is replaced by :obj:`addSink` and :obj:`removeSink`.
+    :obj:`handle` dispatches events using the current snapshot without
+    locking. Therefore, concurrent publishers do not block each other
+    and changing the sinks does not wait for running dispatches. As a
+    consequence, a sink may still receive events from dispatches
+    which started before it was removed.
+
     .. codeauthor:: jwienke
     """
 
     def __init__(self):
         self.__mutex = RLock()
-        self.__sinksByScope = {}
+        # Tuples of sinks indexed by scope. Dispatching an event only
+        # visits the scope of the event and its super-scopes. The trie
+        # is never modified but replaced by modified copies.
+        self.__sinksByScope = ScopeTrie()
+
+    def __len__(self):
+        """
+        Returns:
+            int:
+                The number of scopes for which sinks are registered.
+        """
+        return len(self.__sinksByScope)
 
     def addSink(self, sink):
         """
@@ -57,11 +77,11 @@ class Bus(object):
             sink:
                 the sink to add
         """
+        scope = sink.getScope()
         with self.__mutex:
-            # ensure that there is a list of sinks for the given scope
-            if sink.getScope() not in self.__sinksByScope:
-                self.__sinksByScope[sink.getScope()] = []
-            self.__sinksByScope[sink.getScope()].append(sink)
+            sinks = self.__sinksByScope.get(scope, ())
+            self.__sinksByScope = self.__sinksByScope.copyWith(
+                scope, sinks + (sink,))
 
     def removeSink(self, sink):
         """
@@ -71,11 +91,19 @@ class Bus(object):
             sink:
                 sink to remove
         """
+        scope = sink.getScope()
         with self.__mutex:
             # return immediately if there is no such scope known for sinks
-            if sink.getScope() not in self.__sinksByScope:
+            sinks = self.__sinksByScope.get(scope)
+            if sinks is None:
                 return
-            self.__sinksByScope[sink.getScope()].remove(sink)
+            remaining = list(sinks)
+            remaining.remove(sink)
+            if remaining:
+                self.__sinksByScope = self.__sinksByScope.copyWith(
+                    scope, tuple(remaining))
+            else:
+                self.__sinksByScope = self.__sinksByScope.copyWithout(scope)
 
     def handle(self, event):
         """
@@ -85,13 +113,9 @@ class Bus(object):
             event (rsb.Event):
                 event to dispatch
         """
-
-        with self.__mutex:
-
-            for scope, sinkList in list(self.__sinksByScope.items()):
-                if scope == event.scope or scope.isSuperScopeOf(event.scope):
-                    for sink in sinkList:
-                        sink.handle(event)
+        for sinks in self.__sinksByScope.matchingValues(event.scope):
+            for sink in sinks:
+                sink.handle(event)
 
     def getTransportURL(self):
         hostname = platform.node().split('.')[0]
@@ -178,13 +202,84 @@ class InPushConnector(transport.InPushConnector):
 
 
 class InPullConnector(transport.InPullConnector):
+    """
+    InPullConnector for the local transport.
+
+    Received events are stored in a buffer from which
+    :obj:`raiseEvent` and :obj:`raiseEvents` retrieve them. Unless
+    configured otherwise, the buffer is unbounded. The ``pullcapacity``
+    option bounds the buffer (0 for an unbounded buffer, 1000 if only
+    ``pullpolicy`` is specified) and the ``pullpolicy`` option controls
+    what happens when it is full. Without a ``pullpolicy`` option, a
+    bounded buffer blocks publishers (``block``), but discards the
+    oldest events (``drop-oldest``) for
+    :obj:`rsb.QualityOfServiceSpec.Reliability.UNRELIABLE` delivery, in
+    which case it is bounded even without a ``pullcapacity`` option:
+
+    ``block``
+      The publisher waits until space becomes available.
+    ``drop-oldest``
+      The oldest buffered event is discarded.
+    ``drop-newest``
+      The new event is discarded.
+    ``keep-latest``
+      Only the latest event of each scope is buffered. A new event
+      replaces a buffered event with the same scope. If the buffer is
+      full with events of other scopes, the oldest one is discarded.
+
+    .. codeauthor:: jwienke
+    .. codeauthor:: jmoringe
+    """
 
     def __init__(self, bus=globalBus, converters=None, options=None, **kwargs):
         # pylint: disable=unused-argument
         transport.InPullConnector.__init__(self, wireType=object, **kwargs)
         self.__bus = bus
         self.__scope = None
-        self.__eventQueue = queue.Queue()
+
+        if options is None:
+            options = {}
+
+        capacity = int(options.get('pullcapacity', '1000'))
+        self.__capacity = capacity if capacity > 0 else None
+        self.__explicitPolicy = 'pullpolicy' in options
+        self.__bounded = 'pullcapacity' in options or self.__explicitPolicy
+        policyString = options.get('pullpolicy', 'block')
+        policies = {
+            'block': rsb.util.BoundedQueue.OverflowPolicy.BLOCK,
+            'drop-oldest': rsb.util.BoundedQueue.OverflowPolicy.DROP_OLDEST,
+            'drop-newest': rsb.util.BoundedQueue.OverflowPolicy.DROP_NEWEST,
+            'keep-latest': rsb.util.BoundedQueue.OverflowPolicy.DROP_OLDEST
+        }
+        if policyString not in policies:
+            raise TypeError('Pull policy option has to be '
+                            '"block", "drop-oldest", "drop-newest" or '
+                            '"keep-latest", not "%s"' % policyString)
+        if policyString == 'keep-latest':
+            keyFunction = self.__eventScope
+        else:
+            keyFunction = None
+        self.__eventQueue = rsb.util.BoundedQueue(
+            self.__capacity if self.__bounded else None,
+            policies[policyString], keyFunction)
+
+    @staticmethod
+    def __eventScope(event):
+        return event.scope
+
+    def getQueue(self):
+        """
+        Returns:
+            rsb.util.BoundedQueue:
+                The buffer of received events. Its depth and counters
+                can be used as metrics.
+        """
+        return self.__eventQueue
+
+    queue = property(getQueue)
+
+    def getDroppedEvents(self):
+        return self.__eventQueue.dropped
 
     def setScope(self, scope):
         self.__scope = scope
@@ -198,19 +293,77 @@ class InPullConnector(transport.InPullConnector):
 
     def deactivate(self):
         self.__bus.removeSink(self)
+        # Wake up blocked readers and publishers.
+        self.__eventQueue.close()
 
     def setQualityOfServiceSpec(self, qos):
-        pass
+        """
+        Unless the ``pullpolicy`` option has been specified, makes the
+        buffer bounded and discard the oldest events when ``qos``
+        requests unreliable delivery.
+        """
+        if self.__explicitPolicy:
+            return
+        if qos.getReliability() == \
+                rsb.QualityOfServiceSpec.Reliability.UNRELIABLE:
+            capacity = self.__capacity
+            policy = rsb.util.BoundedQueue.OverflowPolicy.DROP_OLDEST
+        else:
+            capacity = self.__capacity if self.__bounded else None
+            policy = rsb.util.BoundedQueue.OverflowPolicy.BLOCK
+        queue = self.__eventQueue
+        if (capacity, policy) != (queue.capacity, queue.policy):
+            # Only called before activation, so the buffer is empty.
+            self.__eventQueue = rsb.util.BoundedQueue(capacity, policy)
 
     def handle(self, event):
         event.metaData.setReceiveTime()
-        self.__eventQueue.put(event)
-
-    def raiseEvent(self, block):
         try:
-            return self.__eventQueue.get(block)
-        except queue.Empty:
-            return None
+            self.__eventQueue.put(event)
+        except rsb.util.InterruptedError:
+            pass
+
+    def raiseEvent(self, block, timeout=None):
+        """
+        Returns the next received event.
+
+        Args:
+            block (bool):
+                If ``True``, wait for the next event.
+            timeout (float or None):
+                If ``block`` is ``True``, the maximum number of seconds
+                to wait. ``None`` means to wait indefinitely.
+
+        Returns:
+            rsb.Event or None:
+                The event or ``None`` if no event has been received in
+                time or the connector has been deactivated.
+        """
+        events = self.raiseEvents(maxEvents=1,
+                                  timeout=timeout if block else 0)
+        if events:
+            return events[0]
+        return None
+
+    def raiseEvents(self, maxEvents=None, timeout=0):
+        """
+        Returns up to ``maxEvents`` buffered events, waiting for at
+        least one event according to ``timeout``.
+
+        Args:
+            maxEvents (int or None):
+                The maximum number of events to return or ``None`` to
+                return all buffered events.
+            timeout (float or None):
+                The maximum number of seconds to wait for an event if
+                none is buffered. ``None`` means to wait indefinitely,
+                ``0`` not to wait at all.
+
+        Returns:
+            list:
+                The events in the order in which they were received.
+        """
+        return self.__eventQueue.getAll(maxItems=maxEvents, timeout=timeout)
 
 
 class TransportFactory(transport.TransportFactory):
@@ -0,0 +1,843 @@
+# ============================================================
+#
+# Copyright (C) 2018 Jan Moringen <jmoringe@techfak.uni-bielefeld.de>
+#
+# This file may be licensed under the terms of the
+# GNU Lesser General Public License Version 3 (the ``LGPL''),
+# or (at your option) any later version.
+#
+# Software distributed under the License is distributed
+# on an ``AS IS'' basis, WITHOUT WARRANTY OF ANY KIND, either
+# express or implied. See the LGPL for the specific language
+# governing rights and limitations.
+#
+# You should have received a copy of the LGPL along with this
+# program. If not, go to http://www.gnu.org/licenses/lgpl.html
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# The development of this software was supported by:
+#   CoR-Lab, Research Institute for Cognition and Robotics
+#     Bielefeld University
+#
+# ============================================================
+
+"""
+This package contains a transport implementation for processes on a
+single host which exchange notifications through a ring buffer in a
+shared memory segment.
+
+Writers append serialized notifications to the ring buffer while
+holding a file lock. Readers do not take any locks: each process polls
+the segment in a single thread and parses notifications directly from
+the shared memory. The segment is removed when the last process using
+it stops doing so. Readers which fall behind by more than the size of
+the ring buffer detect that their data has been overwritten and skip
+the lost notifications, so the transport is unreliable in that case.
+
+.. codeauthor:: jmoringe
+"""
+
+import mmap
+import os
+import platform
+import struct
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import rsb
+import rsb.eventprocessing
+import rsb.transport
+import rsb.transport.conversion as conversion
+import rsb.util
+
+from rsb.protocol.Notification_pb2 import Notification
+
+# The segment starts with a header consisting of a magic string, the
+# capacity of the ring buffer and two positions: the position up to
+# which a writer is about to overwrite the ring buffer and the position
+# up to which notifications are complete. Positions increase
+# monotonically and are mapped onto the ring buffer modulo its capacity.
+_MAGIC = b'RSBSHM01'
+_HEADER = struct.Struct('<8sQQQ')
+_CAPACITY_OFFSET = 8
+_RESERVED_OFFSET = 16
+_COMMITTED_OFFSET = 24
+_POSITION = struct.Struct('<Q')
+_DATA_OFFSET = 64
+
+# Each process using the segment holds a shared record lock on this
+# byte of the (otherwise unused) header padding.
+_USER_LOCK_OFFSET = 56
+
+# Each record in the ring buffer consists of the size of the
+# serialized notification followed by the notification, padded to a
+# multiple of the alignment. A special size marks the end of the
+# ring buffer if the next record does not fit before it.
+_RECORD_HEADER = struct.Struct('<I')
+_WRAP_MARKER = 0xffffffff
+_ALIGNMENT = 8
+
+# Tag of the length-delimited data field (9) of Notification.
+_DATA_TAG = b'\x4a'
+
+
+def _align(size):
+    return (size + _ALIGNMENT - 1) & ~(_ALIGNMENT - 1)
+
+
+def _encodeDataField(data):
+    # Returns the field header which precedes ``data`` when it is
+    # serialized as the data field of a Notification.
+    header, value = bytearray(_DATA_TAG), len(data)
+    while value >= 0x80:
+        header.append((value & 0x7f) | 0x80)
+        value >>= 7
+    header.append(value)
+    return bytes(header)
+
+
+def defaultSegmentPath(name):
+    """
+    Returns the path of the file backing the shared memory segment
+    ``name``.
+
+    Args:
+        name (str):
+            The name of the segment.
+
+    Returns:
+        str:
+            The path, in ``/dev/shm`` if available.
+    """
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') \
+        else tempfile.gettempdir()
+    return os.path.join(directory, 'rsb-shm-' + name)
+
+
+class RingBuffer(object):
+    """
+    A ring buffer of serialized notifications in a memory mapped file
+    which can be shared by multiple processes.
+
+    Any number of processes can write to the ring buffer. Writers are
+    serialized by a file lock. Readers do not synchronize with writers
+    but detect when the data they read has been overwritten.
+
+    .. codeauthor:: jmoringe
+    """
+
+    def __init__(self, path, capacity):
+        """
+        Opens the ring buffer backed by ``path``, creating it if
+        necessary.
+
+        Args:
+            path (str):
+                The path of the file backing the ring buffer.
+            capacity (int):
+                The capacity in bytes of a newly created ring buffer.
+                Ignored if the ring buffer already exists.
+        """
+        self.__logger = rsb.util.getLoggerByClass(self.__class__)
+
+        self.__path = path
+        self.__lock = threading.Lock()
+
+        self.__file = self.__openFile(path)
+        try:
+            try:
+                size = os.fstat(self.__file).st_size
+                if size == 0:
+                    capacity = _align(capacity)
+                    self.__logger.info('Creating segment %s with capacity %d',
+                                       path, capacity)
+                    os.ftruncate(self.__file, _DATA_OFFSET + capacity)
+                    os.pwrite(self.__file,
+                              _HEADER.pack(_MAGIC, capacity, 0, 0), 0)
+                    size = _DATA_OFFSET + capacity
+                self.__map = mmap.mmap(self.__file, size)
+                if fcntl is not None:
+                    fcntl.lockf(self.__file, fcntl.LOCK_SH,
+                                1, _USER_LOCK_OFFSET)
+            finally:
+                self.__unlockFile()
+        except BaseException:
+            os.close(self.__file)
+            raise
+
+        magic, self.__capacity, _, _ = _HEADER.unpack_from(self.__map, 0)
+        if magic != _MAGIC or size != _DATA_OFFSET + self.__capacity:
+            self.close()
+            raise ValueError('%s is not a valid segment' % path)
+
+    def __openFile(self, path):
+        # Returns a locked descriptor for PATH. The last process using
+        # the segment may unlink the file after we opened it but
+        # before we obtained the lock. In that case, try again.
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            if fcntl is None:
+                return fd
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_nlink > 0:
+                return fd
+            os.close(fd)
+
+    def __lockFile(self):
+        if fcntl is not None:
+            fcntl.flock(self.__file, fcntl.LOCK_EX)
+
+    def __unlockFile(self):
+        if fcntl is not None:
+            fcntl.flock(self.__file, fcntl.LOCK_UN)
+
+    def getCapacity(self):
+        return self.__capacity
+
+    capacity = property(getCapacity)
+
+    def getReserved(self):
+        """
+        Returns:
+            int:
+                The position up to which a writer may be overwriting
+                the ring buffer.
+        """
+        return _POSITION.unpack_from(self.__map, _RESERVED_OFFSET)[0]
+
+    reserved = property(getReserved)
+
+    def getCommitted(self):
+        """
+        Returns:
+            int:
+                The position up to which records are complete.
+        """
+        return _POSITION.unpack_from(self.__map, _COMMITTED_OFFSET)[0]
+
+    committed = property(getCommitted)
+
+    def write(self, *parts):
+        """
+        Appends the concatenation of ``parts`` as a record to the ring
+        buffer.
+
+        Args:
+            parts (bytes):
+                The parts of the serialized notification. Passing the
+                payload as a separate part avoids copying it before
+                it is written into the ring buffer.
+
+        Raises:
+            ValueError:
+                If the record does not fit into half of the ring
+                buffer.
+        """
+        length = sum(len(part) for part in parts)
+        size = _align(_RECORD_HEADER.size + length)
+        if size > self.__capacity // 2:
+            raise ValueError('Notification of size %d does not fit into '
+                             'ring buffer of capacity %d'
+                             % (length, self.__capacity))
+
+        with self.__lock:
+            self.__lockFile()
+            try:
+                start = self.getCommitted()
+                offset = start % self.__capacity
+                wrap = offset + size > self.__capacity
+                if wrap:
+                    wrapOffset = offset
+                    start += self.__capacity - offset
+                    offset = 0
+                end = start + size
+
+                # Announce the region which is about to be overwritten
+                # before touching it, so that readers can detect that
+                # their data is no longer valid.
+                _POSITION.pack_into(self.__map, _RESERVED_OFFSET, end)
+                if wrap:
+                    _RECORD_HEADER.pack_into(self.__map,
+                                             _DATA_OFFSET + wrapOffset,
+                                             _WRAP_MARKER)
+                position = _DATA_OFFSET + offset
+                _RECORD_HEADER.pack_into(self.__map, position, length)
+                position += _RECORD_HEADER.size
+                for part in parts:
+                    self.__map[position:position + len(part)] = part
+                    position += len(part)
+                _POSITION.pack_into(self.__map, _COMMITTED_OFFSET, end)
+            finally:
+                self.__unlockFile()
+
+    def read(self, position):
+        """
+        Returns the record at ``position`` which has to be smaller than
+        :obj:`committed`.
+
+        The returned memory is part of the ring buffer. It may be
+        overwritten at any time, so :obj:`isIntact` has to be used to
+        check whether the data obtained from it is valid.
+
+        Args:
+            position (int):
+                The position of the record.
+
+        Returns:
+            tuple:
+                The position of the record, which differs from
+                ``position`` at the end of the ring buffer, a
+                :obj:`memoryview` of the serialized notification and
+                the position of the next record. ``None`` if the
+                record at ``position`` has already been overwritten.
+        """
+        for _ in range(2):
+            if not self.isIntact(position):
+                return None
+            offset = position % self.__capacity
+            (size,) = _RECORD_HEADER.unpack_from(self.__map,
+                                                 _DATA_OFFSET + offset)
+            if size == _WRAP_MARKER:
+                position += self.__capacity - offset
+                continue
+            end = offset + _RECORD_HEADER.size + size
+            if end > self.__capacity:
+                # Only possible if the size has been overwritten.
+                return None
+            start = _DATA_OFFSET + offset + _RECORD_HEADER.size
+            return (position,
+                    memoryview(self.__map)[start:start + size],
+                    position + _align(_RECORD_HEADER.size + size))
+        return None
+
+    def isIntact(self, position):
+        """
+        Returns:
+            bool:
+                ``True`` if the record at ``position`` has not been
+                (partially) overwritten.
+        """
+        return self.getReserved() <= position + self.__capacity
+
+    def close(self, unlink=False):
+        """
+        Args:
+            unlink (bool):
+                If ``True``, removes the file backing the ring buffer
+                unless other processes still use it. Other ring buffers
+                for the same file in this process are not taken into
+                account.
+        """
+        try:
+            self.__map.close()
+        except BufferError:
+            # Memoryviews of the segment are still referenced. The
+            # mapping is released when they are collected.
+            pass
+        try:
+            if unlink and fcntl is not None:
+                self.__lockFile()
+                try:
+                    self.__unlinkUnlessUsed()
+                finally:
+                    self.__unlockFile()
+        finally:
+            os.close(self.__file)
+
+    def __unlinkUnlessUsed(self):
+        try:
+            fcntl.lockf(self.__file, fcntl.LOCK_EX | fcntl.LOCK_NB,
+                        1, _USER_LOCK_OFFSET)
+        except OSError:
+            return
+        self.__logger.info('Removing segment %s', self.__path)
+        os.unlink(self.__path)
+
+
+class Bus(object):
+    """
+    Provides access to the ring buffer of one shared memory segment for
+    all connectors of the process using the segment.
+
+    A single reader thread per bus polls the ring buffer for new
+    records. While there are none, the interval between polls grows
+    up to a maximum. Writing through the bus wakes up the reader
+    thread immediately. Records are only parsed if their scope, which
+    is obtained without parsing, matches the scope of at least one
+    in-direction connector.
+
+    .. codeauthor:: jmoringe
+    """
+
+    MIN_POLL_INTERVAL = 0.00005
+
+    def __init__(self, path, capacity, pollInterval=0.001):
+        """
+        Args:
+            path (str):
+                The path of the file backing the segment.
+            capacity (int):
+                The capacity of the ring buffer if it has to be created.
+            pollInterval (float):
+                The maximum number of seconds the reader thread sleeps
+                when no new records are available. This bounds the
+                latency for records written by other processes.
+        """
+        self.__logger = rsb.util.getLoggerByClass(self.__class__)
+
+        self.__path = path
+        self.__ring = RingBuffer(path, capacity)
+        self.__pollInterval = pollInterval
+        self.__wakeup = threading.Event()
+
+        self.__connectors = []
+        self.__dispatcher = rsb.eventprocessing.ScopeDispatcher()
+        self.__lock = threading.RLock()
+
+        self.__thread = None
+        self.__active = False
+        self.__overruns = 0
+
+    def getRingBuffer(self):
+        return self.__ring
+
+    ringBuffer = property(getRingBuffer)
+
+    def getOverruns(self):
+        """
+        Returns:
+            int:
+                The number of times the reader thread fell behind the
+                writers and lost records.
+        """
+        return self.__overruns
+
+    overruns = property(getOverruns)
+
+    def getConnectors(self):
+        return self.__connectors
+
+    connectors = property(getConnectors)
+
+    def addConnector(self, connector):
+        with self.__lock:
+            if isinstance(connector, (InPushConnector, InPullConnector)):
+                self.__dispatcher.addSink(connector.scope, connector)
+            self.__connectors.append(connector)
+
+    def removeConnector(self, connector):
+        """
+        Returns:
+            bool:
+                ``False`` if ``connector`` was the last connector of
+                the bus.
+        """
+        with self.__lock:
+            if isinstance(connector, (InPushConnector, InPullConnector)):
+                self.__dispatcher.removeSink(connector.scope, connector)
+            self.__connectors.remove(connector)
+            return bool(self.__connectors)
+
+    def handleOutgoing(self, notification, data=None):
+        """
+        Writes ``notification`` into the ring buffer.
+
+        Args:
+            notification (Notification):
+                The notification.
+            data (bytes):
+                If not ``None``, the payload of ``notification`` which
+                is appended to the serialized notification instead of
+                being stored in its data field, saving a copy.
+        """
+        if data is None:
+            self.__ring.write(notification.SerializeToString())
+        else:
+            self.__ring.write(notification.SerializeToString(),
+                              _encodeDataField(data), data)
+        self.__wakeup.set()
+
+    def __receiveRecords(self):
+        ring = self.__ring
+        position = ring.committed
+        interval = self.MIN_POLL_INTERVAL
+        while self.__active:
+            # Clear before checking so that a wakeup for a record
+            # written after the check is not lost.
+            self.__wakeup.clear()
+            committed = ring.committed
+            if position == committed:
+                self.__wakeup.wait(interval)
+                interval = min(interval * 2, self.__pollInterval)
+                continue
+            interval = self.MIN_POLL_INTERVAL
+
+            while position < committed:
+                record = ring.read(position)
+                if record is None:
+                    self.__logger.warn('Reader fell behind; skipping to '
+                                       'position %d', committed)
+                    self.__overruns += 1
+                    position = committed
+                    break
+                start, data, position = record
+                self.__handleRecord(ring, start, data)
+
+    def __handleRecord(self, ring, position, data):
+        with self.__lock:
+            if not self.__dispatcher:
+                return
+            try:
+                scope, _ = conversion.peekScopeAndWireSchema(data)
+                sinks = self.__dispatcher.matchingSinksForString(scope)
+                if not sinks:
+                    return
+                notification = Notification()
+                notification.ParseFromString(data)
+            except Exception as e:
+                # Garbage is expected if the record has been
+                # overwritten. Otherwise, there is a problem.
+                if ring.isIntact(position):
+                    self.__logger.error('Failed to decode record: %s', e)
+                return
+            finally:
+                data.release()
+
+            # The notification has been copied by parsing it. It is
+            # only valid if the record has not been overwritten in the
+            # meantime.
+            if not ring.isIntact(position):
+                return
+            for sink in sinks:
+                sink.handle(notification)
+
+    def getTransportURL(self):
+        hostname = platform.node().split('.')[0]
+        return 'shm://' + hostname + self.__path
+
+    def activate(self):
+        if self.__active:
+            raise RuntimeError('Trying to activate active bus')
+
+        self.__active = True
+        self.__thread = threading.Thread(target=self.__receiveRecords,
+                                         name='ShmReader')
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def deactivate(self):
+        if not self.__active:
+            raise RuntimeError('Trying to deactivate inactive bus')
+
+        self.__active = False
+        self.__wakeup.set()
+        if self.__thread is not threading.current_thread():
+            self.__thread.join()
+        self.__ring.close(unlink=True)
+
+    def __repr__(self):
+        return '<%s %s %d connector(s) at 0x%x>' \
+            % (type(self).__name__, self.__path,
+               len(self.__connectors), id(self))
+
+
+__buses = {}
+__busesLock = threading.Lock()
+
+
+def getBusFor(path, capacity, pollInterval, connector):
+    """
+    Returns (creating it if necessary) the :obj:`Bus` for the segment
+    backed by ``path`` and attaches ``connector`` to it.
+
+    Args:
+        path (str):
+            The path of the file backing the segment.
+        capacity (int):
+            The capacity of the ring buffer if it has to be created.
+        pollInterval (float):
+            The poll interval of the reader thread if the bus has to be
+            created.
+        connector:
+            A connector that should be attached to the bus.
+    """
+    # Buses inherited through fork() lack their reader thread.
+    key = (os.getpid(), path)
+    with __busesLock:
+        bus = __buses.get(key)
+        if bus is None:
+            bus = Bus(path, capacity, pollInterval)
+            bus.activate()
+            __buses[key] = bus
+        bus.addConnector(connector)
+        return bus
+
+
+def removeConnector(bus, connector):
+    with __busesLock:
+        if not bus.removeConnector(connector):
+            bus.deactivate()
+            del __buses[[key for (key, value) in list(__buses.items())
+                         if value is bus][0]]
+
+
+class Connector(rsb.transport.Connector,
+                rsb.transport.ConverterSelectingConnector):
+    """
+    Superclass of the connectors of the shared memory transport.
+
+    .. codeauthor:: jmoringe
+    """
+
+    def __init__(self, converters, options=None, **kwargs):
+        super(Connector, self).__init__(wireType=bytes,
+                                        converters=converters,
+                                        **kwargs)
+        self.__logger = rsb.util.getLoggerByClass(self.__class__)
+
+        if options is None:
+            options = {}
+
+        self.__active = False
+        self.__bus = None
+        self.__path = options.get(
+            'path', defaultSegmentPath(options.get('name', 'rsb')))
+        self.__capacity = int(options.get('size', str(16 * 1024 * 1024)))
+        self.__pollInterval = int(options.get('pollinterval', '1000')) \
+            / 1000000.0
+
+    def __del__(self):
+        if self.__active:
+            self.deactivate()
+
+    def getBus(self):
+        return self.__bus
+
+    bus = property(getBus)
+
+    def activate(self):
+        if self.__active:
+            raise RuntimeError('Trying to activate active connector')
+
+        self.__logger.info('Activating')
+
+        self.__bus = getBusFor(self.__path, self.__capacity,
+                               self.__pollInterval, self)
+
+        self.__active = True
+
+    def deactivate(self):
+        if not self.__active:
+            raise RuntimeError('Trying to deactivate inactive connector')
+
+        self.__logger.info('Deactivating')
+
+        self.__active = False
+
+        removeConnector(self.__bus, self)
+
+    def setQualityOfServiceSpec(self, qos):
+        pass
+
+    def notificationToEvent(self, notification):
+        wireSchema = notification.wire_schema.decode('ASCII')
+        converter = self.getConverterForWireSchema(wireSchema)
+        return conversion.notificationToEvent(
+            notification,
+            wireData=bytes(notification.data),
+            wireSchema=wireSchema,
+            converter=converter)
+
+    def getTransportURL(self):
+        return self.__bus.getTransportURL()
+
+
+class InPushConnector(Connector,
+                      rsb.transport.InPushConnector):
+    """
+    Instances of this class receive events from a shared memory
+    segment in push mode.
+
+    .. codeauthor:: jmoringe
+    """
+
+    def __init__(self, **kwargs):
+        self.__action = None
+        self.__filter = conversion.NotificationFilter()
+
+        super(InPushConnector, self).__init__(**kwargs)
+
+    def filterNotify(self, theFilter, action):
+        self.__filter.filterNotify(theFilter, action)
+
+    def setObserverAction(self, action):
+        self.__action = action
+
+    def handle(self, notification):
+        if self.__action is None:
+            return
+
+        # Reject notifications before decoding their payloads.
+        if not self.__filter.match(notification):
+            return
+
+        self.__action(self.notificationToEvent(notification))
+
+
+class InPullConnector(Connector,
+                      rsb.transport.InPullConnector):
+    """
+    Instances of this class receive events from a shared memory
+    segment in pull mode. Received events are buffered in a queue
+    which is unbounded unless configured otherwise. The
+    ``pullcapacity`` option bounds the queue (1000 if only
+    ``pullpolicy`` is specified) and the ``pullpolicy`` option
+    controls what happens when it is full. Without a ``pullpolicy``
+    option, a bounded queue blocks, but discards the oldest events for
+    :obj:`rsb.QualityOfServiceSpec.Reliability.UNRELIABLE` delivery, in
+    which case it is bounded even without a ``pullcapacity`` option.
+
+    A blocking queue stalls the reader thread of the bus, which then
+    falls behind the writers and loses records for all connectors of
+    the process.
+
+    .. codeauthor:: jmoringe
+    """
+
+    def __init__(self, options=None, **kwargs):
+        super(InPullConnector, self).__init__(options=options, **kwargs)
+
+        if options is None:
+            options = {}
+
+        capacity = int(options.get('pullcapacity', '1000'))
+        self.__capacity = capacity if capacity > 0 else None
+        self.__explicitPolicy = 'pullpolicy' in options
+        self.__bounded = 'pullcapacity' in options or self.__explicitPolicy
+        policyString = options.get('pullpolicy', 'block')
+        policies = {
+            'block': rsb.util.BoundedQueue.OverflowPolicy.BLOCK,
+            'drop-oldest': rsb.util.BoundedQueue.OverflowPolicy.DROP_OLDEST,
+            'drop-newest': rsb.util.BoundedQueue.OverflowPolicy.DROP_NEWEST
+        }
+        if policyString not in policies:
+            raise TypeError('Pull policy option has to be '
+                            '"block", "drop-oldest" or "drop-newest", '
+                            'not "%s"' % policyString)
+        self.__queue = rsb.util.BoundedQueue(
+            self.__capacity if self.__bounded else None,
+            policies[policyString])
+
+    def getQueue(self):
+        return self.__queue
+
+    queue = property(getQueue)
+
+    def setQualityOfServiceSpec(self, qos):
+        """
+        Unless the ``pullpolicy`` option has been specified, makes the
+        queue bounded and discard the oldest events when ``qos``
+        requests unreliable delivery.
+        """
+        if self.__explicitPolicy:
+            return
+        if qos.getReliability() == \
+                rsb.QualityOfServiceSpec.Reliability.UNRELIABLE:
+            capacity = self.__capacity
+            policy = rsb.util.BoundedQueue.OverflowPolicy.DROP_OLDEST
+        else:
+            capacity = self.__capacity if self.__bounded else None
+            policy = rsb.util.BoundedQueue.OverflowPolicy.BLOCK
+        queue = self.__queue
+        if (capacity, policy) != (queue.capacity, queue.policy):
+            # Only called before activation, so the queue is empty.
+            self.__queue = rsb.util.BoundedQueue(capacity, policy)
+
+    def getDroppedEvents(self):
+        return self.__queue.dropped
+
+    def filterNotify(self, theFilter, action):
+        pass
+
+    def handle(self, notification):
+        try:
+            self.__queue.put(self.notificationToEvent(notification))
+        except rsb.util.InterruptedError:
+            pass
+
+    def raiseEvent(self, block):
+        try:
+            if block:
+                return self.__queue.get()
+            items = self.__queue.getAll(maxItems=1, timeout=0)
+            return items[0] if items else None
+        except rsb.util.InterruptedError:
+            return None
+
+    def deactivate(self):
+        self.__queue.close()
+
+        super(InPullConnector, self).deactivate()
+
+
+class OutConnector(Connector,
+                   rsb.transport.OutConnector):
+    """
+    Instances of this class write events to a shared memory segment.
+
+    .. codeauthor:: jmoringe
+    """
+
+    def __init__(self, **kwargs):
+        super(OutConnector, self).__init__(**kwargs)
+
+    def handle(self, event):
+        event.getMetaData().setSendTime()
+        converter = self.getConverterForDataType(event.type)
+        wireData, wireSchema = converter.serialize(event.data)
+        notification = Notification()
+        conversion.eventToNotification(notification, event,
+                                       wireSchema=wireSchema,
+                                       data=b'')
+        notification.ClearField('data')
+        self.bus.handleOutgoing(notification, wireData)
+
+
+class TransportFactory(rsb.transport.TransportFactory):
+    """
+    :obj:`TransportFactory` implementation for the shared memory
+    transport.
+
+    .. codeauthor:: jmoringe
+    """
+
+    def getName(self):
+        return "shm"
+
+    def isRemote(self):
+        return False
+
+    def createInPushConnector(self, converters, options):
+        return InPushConnector(converters=converters, options=options)
+
+    def createInPullConnector(self, converters, options):
+        return InPullConnector(converters=converters, options=options)
+
+    def createOutConnector(self, converters, options):
+        return OutConnector(converters=converters, options=options)
+
+
+def initialize():
+    # Writers have to be serialized across processes with file locks.
+    if fcntl is None:
+        return
+    try:
+        rsb.transport.registerTransport(TransportFactory())
+    except ValueError:
+        pass
@@ -29,9 +29,19 @@ point-to-point socket connections to simulate a bus.
 .. codeauthor:: jmoringe
 """
 
+import collections
 import copy
+import functools
+import os
+import selectors
 import socket
+import sys
+import struct
+import tempfile
 import threading
+import time
+import uuid
+import zlib
 
 import rsb.util
 import rsb.eventprocessing
@@ -41,6 +51,470 @@ import rsb.transport.conversion as conversion
 from rsb.protocol.EventId_pb2 import EventId
 from rsb.protocol.EventMetaData_pb2 import UserInfo, UserTime
 from rsb.protocol.Notification_pb2 import Notification
+from rsb.protocol.FragmentedNotification_pb2 import FragmentedNotification
+
+# Each notification is preceded on the wire by its size as a 32 bit
+# little-endian unsigned integer.
+_SIZE_HEADER = struct.Struct('<I')
+
+# Maximum number of buffers passed to a single sendmsg call.
+_IOV_MAX = 1024
+
+# Notifications with this scope and wire-schema are control messages
+# exchanged between the buses of the socket transport. Their method
+# field indicates the kind of message. They are not delivered to
+# connectors by buses which understand them.
+_CONTROL_SCOPE = b'/__rsb/transport/socket/'
+_CONTROL_WIRE_SCHEMA = b'.rsb.transport.socket.Control'
+
+# Control message announcing the scopes of all in-direction connectors
+# of a bus client. The data consists of the scope strings, separated
+# by newlines.
+_SUBSCRIPTIONS_METHOD = b'SUBSCRIPTIONS'
+
+# Control message which a connection sends as its first frame if it
+# supports optional protocol features. The data consists of the
+# feature names, separated by newlines.
+_FEATURES_METHOD = b'FEATURES'
+_ZLIB_FEATURE = b'zlib'
+_FRAGMENTS_FEATURE = b'fragments'
+
+# The most significant bits of the size header mark frames with a
+# zlib-compressed payload and frames containing a serialized
+# FragmentedNotification instead of a Notification. Such frames are
+# only sent to peers which announced the respective feature and the
+# bits are only interpreted by connections which announced it.
+_COMPRESSED_FLAG = 0x80000000
+_FRAGMENT_FLAG = 0x40000000
+
+
+def _makeControlNotification(method, data):
+    notification = Notification()
+    notification.event_id.sender_id = uuid.uuid4().bytes
+    notification.event_id.sequence_number = 0
+    notification.scope = _CONTROL_SCOPE
+    notification.wire_schema = _CONTROL_WIRE_SCHEMA
+    notification.method = method
+    notification.data = data
+    notification.meta_data.create_time = 0
+    notification.meta_data.send_time = 0
+    return notification
+
+
+def _sendBuffers(socket_, buffers):
+    """
+    Writes all of ``buffers`` to ``socket_`` using as few system calls
+    as possible.
+    """
+    if not hasattr(socket_, 'sendmsg'):
+        socket_.sendall(b''.join(buffers))
+        return
+
+    buffers = list(buffers)
+    i = 0
+    while i < len(buffers):
+        sent = socket_.sendmsg(buffers[i:i + _IOV_MAX])
+        # Skip completely written buffers and continue with the
+        # remainder of a partially written one.
+        while sent:
+            size = len(buffers[i])
+            if sent >= size:
+                sent -= size
+                i += 1
+            else:
+                buffers[i] = memoryview(buffers[i])[sent:]
+                sent = 0
+
+
+class BatchStatistics(object):
+    """
+    Counts the batches in which a :obj:`BusConnection` writes frames
+    and the sizes of these batches.
+
+    .. codeauthor:: jmoringe
+    """
+
+    def __init__(self):
+        self.__batches = 0
+        self.__frames = 0
+        self.__bytes = 0
+        self.__maxFrames = 0
+
+    def record(self, frames, bytes_):
+        self.__batches += 1
+        self.__frames += frames
+        self.__bytes += bytes_
+        self.__maxFrames = max(self.__maxFrames, frames)
+
+    def getBatches(self):
+        return self.__batches
+
+    batches = property(getBatches)
+
+    def getFrames(self):
+        return self.__frames
+
+    frames = property(getFrames)
+
+    def getBytes(self):
+        return self.__bytes
+
+    bytes = property(getBytes)
+
+    def getMaxFrames(self):
+        return self.__maxFrames
+
+    maxFrames = property(getMaxFrames)
+
+    def getMeanFrames(self):
+        """
+        Returns:
+            float:
+                The average number of frames per batch.
+        """
+        if not self.__batches:
+            return 0.0
+        return float(self.__frames) / self.__batches
+
+    meanFrames = property(getMeanFrames)
+
+    def __repr__(self):
+        return '<%s %d batch(es) %d frame(s) %d byte(s) at 0x%x>' \
+            % (type(self).__name__,
+               self.__batches, self.__frames, self.__bytes, id(self))
+
+
+class SharedFrame(bytes):
+    """
+    A frame which is sent over several connections.
+
+    Derived forms of the frame, in particular its compressed form, are
+    memoized so that they are computed once for all connections
+    instead of once per connection.
+
+    .. codeauthor:: jmoringe
+    """
+
+    def __init__(self, frame):
+        """
+        Args:
+            frame (bytes):
+                The frame as produced by :obj:`BusConnection.bufferToFrame`.
+        """
+        self.__lock = threading.Lock()
+        self.__forms = {}
+
+    def memoize(self, key, function):
+        """
+        Returns the result of calling ``function`` with this frame,
+        calling it only for the first request for ``key``.
+
+        Args:
+            key:
+                A hashable value which identifies the derived form, for
+                example the compression settings.
+            function (callable):
+                Computes the derived form from the frame.
+
+        Returns:
+            The derived form.
+        """
+        # Concurrent requests for the same form wait for the first
+        # one instead of computing it again.
+        with self.__lock:
+            try:
+                return self.__forms[key]
+            except KeyError:
+                result = function(self)
+                self.__forms[key] = result
+                return result
+
+
+class FrameCompressor(object):
+    """
+    Compresses and decompresses the payload of frames with zlib and
+    keeps statistics about doing so.
+
+    Payloads below a size threshold are not compressed. Neither are
+    payloads which do not shrink enough. For large payloads, this is
+    decided by compressing a sample first so that little CPU time is
+    spent on incompressible data like encoded images.
+
+    The compressed forms of :obj:`SharedFrame` objects are memoized, so
+    that compressors with the same settings compress them only once.
+
+    .. codeauthor:: jmoringe
+    """
+
+    SAMPLE_SIZE = 4096
+    MAX_RATIO = 0.9
+
+    def __init__(self, threshold=1024, level=1):
+        """
+        Args:
+            threshold (int):
+                Payloads smaller than this number of bytes are sent
+                uncompressed.
+            level (int):
+                The zlib compression level.
+        """
+        self.__threshold = threshold
+        self.__level = level
+
+        self.__compressedFrames = 0
+        self.__skippedFrames = 0
+        self.__uncompressedBytes = 0
+        self.__compressedBytes = 0
+        self.__compressTime = 0.0
+        self.__decompressedFrames = 0
+        self.__decompressTime = 0.0
+
+    def getThreshold(self):
+        return self.__threshold
+
+    threshold = property(getThreshold)
+
+    def getLevel(self):
+        return self.__level
+
+    level = property(getLevel)
+
+    def getCompressedFrames(self):
+        """
+        Returns:
+            int:
+                The number of frames sent compressed.
+        """
+        return self.__compressedFrames
+
+    compressedFrames = property(getCompressedFrames)
+
+    def getSkippedFrames(self):
+        """
+        Returns:
+            int:
+                The number of frames above the threshold which were
+                sent uncompressed because they did not compress well.
+        """
+        return self.__skippedFrames
+
+    skippedFrames = property(getSkippedFrames)
+
+    def getUncompressedBytes(self):
+        return self.__uncompressedBytes
+
+    uncompressedBytes = property(getUncompressedBytes)
+
+    def getCompressedBytes(self):
+        return self.__compressedBytes
+
+    compressedBytes = property(getCompressedBytes)
+
+    def getRatio(self):
+        """
+        Returns:
+            float:
+                The size of compressed payloads relative to their
+                uncompressed size or 1 if nothing has been compressed.
+        """
+        if not self.__uncompressedBytes:
+            return 1.0
+        return self.__compressedBytes / float(self.__uncompressedBytes)
+
+    ratio = property(getRatio)
+
+    def getCompressTime(self):
+        """
+        Returns:
+            float:
+                The CPU time in seconds spent compressing, including
+                attempts for frames which were sent uncompressed.
+        """
+        return self.__compressTime
+
+    compressTime = property(getCompressTime)
+
+    def getDecompressedFrames(self):
+        return self.__decompressedFrames
+
+    decompressedFrames = property(getDecompressedFrames)
+
+    def getDecompressTime(self):
+        """
+        Returns:
+            float:
+                The CPU time in seconds spent decompressing.
+        """
+        return self.__decompressTime
+
+    decompressTime = property(getDecompressTime)
+
+    def compress(self, frame):
+        """
+        Returns the compressed form of ``frame`` or ``frame`` itself if
+        it should not be compressed.
+
+        Args:
+            frame (bytes):
+                A frame as produced by :obj:`BusConnection.bufferToFrame`.
+
+        Returns:
+            bytes:
+                A frame with the compressed flag set in its size header
+                or ``frame``.
+        """
+        size = len(frame) - _SIZE_HEADER.size
+        if size < self.__threshold:
+            return frame
+
+        if isinstance(frame, SharedFrame):
+            result = frame.memoize((self.__threshold, self.__level),
+                                   self.__compress)
+        else:
+            result = self.__compress(frame)
+        if result is frame:
+            self.__skippedFrames += 1
+            return frame
+
+        self.__compressedFrames += 1
+        self.__uncompressedBytes += size
+        self.__compressedBytes += len(result) - _SIZE_HEADER.size
+        return result
+
+    def __compress(self, frame):
+        size = len(frame) - _SIZE_HEADER.size
+        start = time.thread_time()
+        try:
+            payload = memoryview(frame)[_SIZE_HEADER.size:]
+            if size > 4 * self.SAMPLE_SIZE:
+                sample = payload[:self.SAMPLE_SIZE]
+                if len(zlib.compress(sample, 1)) \
+                        > self.MAX_RATIO * self.SAMPLE_SIZE:
+                    return frame
+            compressed = zlib.compress(payload, self.__level)
+            if len(compressed) > self.MAX_RATIO * size:
+                return frame
+        finally:
+            self.__compressTime += time.thread_time() - start
+
+        (flags,) = _SIZE_HEADER.unpack_from(frame)
+        flags = (flags & _FRAGMENT_FLAG) | _COMPRESSED_FLAG
+        return _SIZE_HEADER.pack(len(compressed) | flags) + compressed
+
+    def decompress(self, payload, flags=0):
+        """
+        Returns the uncompressed frame for the compressed ``payload``.
+
+        Args:
+            payload (bytes or memoryview):
+                The payload of a frame with the compressed flag set.
+            flags (int):
+                Flags other than the compressed flag which are retained
+                in the size header of the returned frame.
+
+        Returns:
+            bytes:
+                A frame with an uncompressed payload.
+        """
+        start = time.thread_time()
+        data = zlib.decompress(payload)
+        self.__decompressTime += time.thread_time() - start
+        self.__decompressedFrames += 1
+        return _SIZE_HEADER.pack(len(data) | flags) + data
+
+    def __repr__(self):
+        return '<%s %d compressed %d skipped ratio %.2f at 0x%x>' \
+            % (type(self).__name__, self.__compressedFrames,
+               self.__skippedFrames, self.ratio, id(self))
+
+
+def _connect(host, port, socket_, tcpnodelay):
+    """
+    Returns a socket connected to ``host`` and ``port`` or, if
+    ``socket_`` is supplied, ``socket_`` itself after configuring
+    ``tcpnodelay`` for it.
+    """
+    if host is not None and port is not None:
+        if socket_ is None:
+            socket_ = socket.create_connection((host, port))
+        else:
+            raise ValueError('Specify either host and port or socket')
+    elif socket_ is None:
+        raise ValueError('Specify either host and port or socket_')
+    if socket_.family == getattr(socket, 'AF_UNIX', None):
+        return socket_
+    if tcpnodelay:
+        socket_.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    else:
+        socket_.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 0)
+    return socket_
+
+
+def defaultUnixSocketPath(port):
+    """
+    Returns the address of the Unix domain socket on which a bus server
+    for ``port`` listens in addition to its TCP socket.
+
+    On Linux, the address is in the abstract namespace so that no file
+    is left behind. On other systems, it is a file in the temporary
+    directory.
+
+    Args:
+        port (int):
+            The TCP port of the bus server.
+
+    Returns:
+        str:
+            The address.
+    """
+    name = 'rsb-socket-%d' % port
+    if sys.platform.startswith('linux'):
+        return '\0' + name
+    return os.path.join(tempfile.gettempdir(), name)
+
+
+def _isLocalHost(host):
+    """
+    Returns True if ``host`` designates the local host.
+    """
+    return (host in ('localhost', '::1', socket.gethostname())
+            or host.startswith('127.'))
+
+
+def _connectUnix(path):
+    """
+    Returns a socket connected to the Unix domain socket ``path``.
+    """
+    socket_ = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        socket_.connect(path)
+    except BaseException:
+        socket_.close()
+        raise
+    return socket_
+
+
+# The server part of the handshake protocol. The client waits for
+# these bytes before using the connection.
+_HANDSHAKE = b'\0\0\0\0'
+
+
+def _handshake(socket_, isServer):
+    """
+    Performs the client or server part of the handshake protocol on
+    the blocking socket ``socket_``.
+    """
+    if isServer:
+        socket_.sendall(_HANDSHAKE)
+    else:
+        zero = b''
+        while len(zero) < len(_HANDSHAKE):
+            chunk = socket_.recv(len(_HANDSHAKE) - len(zero))
+            if not chunk:
+                raise RuntimeError('Connection closed during handshake')
+            zero += chunk
+        if zero != _HANDSHAKE:
+            raise RuntimeError('Incorrect handshake')
 
 
 class BusConnection(rsb.eventprocessing.BroadcastProcessor):
@@ -60,17 +534,34 @@ class BusConnection(rsb.eventprocessing.BroadcastProcessor):
     (via the :obj:`BusServer` class) one :obj:`BusConnection` object for each
     client (remote process) connected to the bus.
 
-    .. codeauthor:: jmoringe
-
-    Args:
+    Frames submitted via :obj:`sendFrame` are put into a bounded
+    outbound queue which is drained by a writer thread. This way,
+    callers only pay for enqueuing and a slow remote process does not
+    stall the bus. The overflow policy of the queue determines what
+    happens when the remote process cannot keep up.
 
-    Returns:
+    If a maximum frame size is configured and the remote process
+    supports fragments, the writer thread splits larger notifications
+    into fragments and sends the fragments of all pending notifications
+    in a round-robin fashion. This way, small notifications are not
+    delayed until a large one has been written completely. As a
+    consequence, notifications may arrive in a different order than
+    they were sent.
 
+    .. codeauthor:: jmoringe
     """
 
+    RECEIVE_BUFFER_SIZE = 65536
+
     def __init__(self,
                  host=None, port=None, socket_=None,
-                 isServer=False, tcpnodelay=True):
+                 isServer=False, tcpnodelay=True,
+                 queueCapacity=1000,
+                 queuePolicy=rsb.util.BoundedQueue.OverflowPolicy.BLOCK,
+                 coalesce=False, coalesceBytes=65536, coalesceWindow=0.0002,
+                 compression=False, compressionThreshold=1024,
+                 compressionLevel=1, maxFrameSize=None,
+                 reassemblyBytes=256 * 1024 * 1024, reassemblyTimeout=30.0):
         """
         Args:
             host (str or None):
@@ -85,6 +576,55 @@ class BusConnection(rsb.eventprocessing.BroadcastProcessor):
                 handshake protocol.
             tcpnodelay (bool):
                 If True, the socket will be set to TCP_NODELAY.
+            queueCapacity (int or None):
+                The maximum number of frames in the outbound queue or
+                ``None`` for an unbounded queue.
+            queuePolicy:
+                A value of :obj:`rsb.util.BoundedQueue.OverflowPolicy`
+                which determines what happens when a frame is sent
+                while the outbound queue is full. ``FAIL`` causes
+                :obj:`sendFrame` to raise an exception which makes the
+                bus disconnect the connection.
+            coalesce (bool):
+                If True, queued frames are gathered and written with a
+                single system call.
+            coalesceBytes (int):
+                The maximum size in bytes up to which frames are
+                gathered into one write.
+            coalesceWindow (float):
+                The maximum number of seconds for which a write is
+                delayed to gather further frames. Frames are written
+                immediately if no further frames are queued.
+            compression (bool):
+                If True, the connection announces that it accepts
+                compressed frames and compresses the frames it sends
+                if the remote process announces the same. The
+                announcement is a control notification on the scope
+                ``/__rsb/transport/socket/``. Remote processes which do
+                not understand it, such as older versions or the C++
+                and Java implementations, deliver it to their
+                participants on that scope and its super-scopes, for
+                example listeners on ``/``, as an event with an
+                unknown wire-schema. Only enable it if all processes
+                on the bus support it.
+            compressionThreshold (int):
+                The minimum payload size in bytes for compressing a
+                frame.
+            compressionLevel (int):
+                The zlib compression level.
+            maxFrameSize (int or None):
+                If not ``None``, the connection announces that it
+                accepts fragments and splits notifications larger than
+                this number of bytes into fragments if the remote
+                process announces the same. The announcement has the
+                same interoperability issue as for ``compression``.
+            reassemblyBytes (int):
+                The maximum number of bytes buffered for incomplete
+                notifications received in fragments.
+            reassemblyTimeout (float):
+                The number of seconds after which an incomplete
+                notification which did not receive further fragments
+                is dropped.
 
         See Also:
             :obj:`getBusClientFor`, :obj:`getBusServerFor`.
@@ -94,8 +634,46 @@ class BusConnection(rsb.eventprocessing.BroadcastProcessor):
         self.__logger = rsb.util.getLoggerByClass(self.__class__)
 
         self.__thread = None
+        self.__writerThread = None
+        self.__queue = rsb.util.BoundedQueue(queueCapacity, queuePolicy)
+        self.__coalesce = coalesce
+        self.__coalesceBytes = coalesceBytes
+        self.__coalesceWindow = coalesceWindow
+        self.__batchStatistics = BatchStatistics()
+        if compression:
+            self.__compressor = FrameCompressor(compressionThreshold,
+                                                compressionLevel)
+        else:
+            self.__compressor = None
+        self.__maxFrameSize = maxFrameSize
+        # Iterators of the frames, possibly fragments, of notifications
+        # which are being written.
+        self.__streams = collections.deque()
+        if maxFrameSize is not None:
+            self.__assembler = conversion.Assembler(reassemblyBytes,
+                                                    reassemblyTimeout)
+        else:
+            self.__assembler = None
+
+        # Features are announced in the first frame. The features
+        # supported by the remote process are unknown until its first
+        # frame has been received.
+        self.__features = set()
+        self.__flags = 0
+        if self.__compressor is not None:
+            self.__features.add(_ZLIB_FEATURE)
+            self.__flags |= _COMPRESSED_FLAG
+        if maxFrameSize is not None:
+            self.__features.add(_FRAGMENTS_FEATURE)
+            self.__flags |= _FRAGMENT_FLAG
+        self.__peerFeatures = None
         self.__socket = None
-        self.__file = None
+
+        # Received data is read into this buffer. The unprocessed
+        # data is in the range [self.__receiveStart, self.__receiveEnd).
+        self.__receiveBuffer = bytearray(self.RECEIVE_BUFFER_SIZE)
+        self.__receiveStart = 0
+        self.__receiveEnd = 0
 
         self.__errorHook = None
 
@@ -104,34 +682,855 @@ class BusConnection(rsb.eventprocessing.BroadcastProcessor):
 
         self.__lock = threading.RLock()
 
-        # Create a socket connection or store the provided connection.
-        if host is not None and port is not None:
-            if socket_ is None:
-                self.__socket = socket.create_connection((host, port))
+        # Create a socket connection or store the provided connection
+        # and perform the client or server part of the handshake.
+        self.__socket = _connect(host, port, socket_, tcpnodelay)
+        _handshake(self.__socket, isServer)
+
+    def __del__(self):
+        if self.__active:
+            self.deactivate()
+
+    def getErrorHook(self):
+        return self.__errorHook
+
+    def setErrorHook(self, newValue):
+        self.__errorHook = newValue
+
+    errorHook = property(getErrorHook, setErrorHook)
+
+    def getOutboundQueue(self):
+        """
+        Returns:
+            rsb.util.BoundedQueue:
+                The queue of frames waiting to be written. Its counters
+                can be used as metrics for the connection.
+        """
+        return self.__queue
+
+    outboundQueue = property(getOutboundQueue)
+
+    def getBatchStatistics(self):
+        """
+        Returns:
+            BatchStatistics:
+                Statistics of the batches in which frames are written.
+                Without coalescing, each frame is a batch.
+        """
+        return self.__batchStatistics
+
+    batchStatistics = property(getBatchStatistics)
+
+    def getCompressor(self):
+        """
+        Returns:
+            FrameCompressor or None:
+                The compressor of the connection which also provides
+                compression statistics or ``None`` if compression is
+                disabled.
+        """
+        return self.__compressor
+
+    compressor = property(getCompressor)
+
+    def getPeerAcceptsCompression(self):
+        """
+        Returns:
+            bool or None:
+                Whether the remote process accepts compressed frames or
+                ``None`` if no frame has been received yet.
+        """
+        if self.__peerFeatures is None:
+            return None
+        return _ZLIB_FEATURE in self.__peerFeatures
+
+    peerAcceptsCompression = property(getPeerAcceptsCompression)
+
+    def getPeerAcceptsFragments(self):
+        """
+        Returns:
+            bool or None:
+                Whether the remote process accepts fragments or
+                ``None`` if no frame has been received yet.
+        """
+        if self.__peerFeatures is None:
+            return None
+        return _FRAGMENTS_FEATURE in self.__peerFeatures
+
+    peerAcceptsFragments = property(getPeerAcceptsFragments)
+
+    def getAssembler(self):
+        """
+        Returns:
+            rsb.transport.conversion.Assembler or None:
+                The assembler which reassembles received fragments and
+                provides statistics about doing so or ``None`` if
+                fragmentation is disabled.
+        """
+        return self.__assembler
+
+    assembler = property(getAssembler)
+
+    # receiving
+
+    def __receiveMore(self, needed):
+        """
+        Receives data from the socket into the receive buffer such that
+        at least ``needed`` unprocessed bytes are available afterwards.
+        """
+        buffer = self.__receiveBuffer
+        start, end = self.__receiveStart, self.__receiveEnd
+        available = end - start
+
+        # Make room for the needed data by moving the unprocessed data
+        # to the front of the buffer or, if the buffer is too small,
+        # into a larger buffer. The buffer is replaced instead of
+        # resized since memoryviews of it may still exist.
+        if start + needed > len(buffer):
+            if needed > len(buffer):
+                newBuffer = bytearray(max(needed, 2 * len(buffer)))
+                newBuffer[:available] = memoryview(buffer)[start:end]
+                self.__receiveBuffer = buffer = newBuffer
+            elif available:
+                buffer[:available] = buffer[start:end]
+            start, end = 0, available
+            self.__receiveStart, self.__receiveEnd = start, end
+
+        view = memoryview(buffer)
+        while end - start < needed:
+            received = self.__socket.recv_into(view[end:])
+            if received == 0:
+                if end == start:
+                    self.__logger.info("Received EOF")
+                    raise EOFError()
+                raise RuntimeError('Short read when receiving notification '
+                                   '(got %d of %d bytes)'
+                                   % (end - start, needed))
+            end += received
+        self.__receiveEnd = end
+
+    def receiveFrame(self):
+        """
+        Receives the next frame, that is a serialized notification
+        including its size header, from the socket.
+
+        Frames are read into a reusable receive buffer, often several
+        frames with a single system call.
+
+        Returns:
+            memoryview or bytes:
+                The frame exactly as it was received. The memory is
+                reused by subsequent calls. Compressed frames are
+                returned decompressed.
+        """
+        needed = _SIZE_HEADER.size
+        while True:
+            start = self.__receiveStart
+            available = self.__receiveEnd - start
+            if available >= _SIZE_HEADER.size:
+                (size,) = _SIZE_HEADER.unpack_from(self.__receiveBuffer,
+                                                   start)
+                flags = size & self.__flags
+                size &= ~self.__flags
+                needed = _SIZE_HEADER.size + size
+                if available >= needed:
+                    self.__logger.debug(
+                        'Receiving notification of size %d', size)
+                    self.__receiveStart = start + needed
+                    frame = memoryview(self.__receiveBuffer)[start:
+                                                             start + needed]
+                    if flags & _COMPRESSED_FLAG:
+                        frame = self.__compressor.decompress(
+                            frame[_SIZE_HEADER.size:],
+                            flags & ~_COMPRESSED_FLAG)
+                    return frame
+            self.__receiveMore(needed)
+
+    def receiveNotification(self):
+        return memoryview(self.receiveFrame())[_SIZE_HEADER.size:]
+
+    @staticmethod
+    def bufferToNotification(serialized):
+        notification = Notification()
+        notification.ParseFromString(serialized)
+        return notification
+
+    def doOneNotification(self):
+        frame = self.receiveFrame()
+        (flags,) = _SIZE_HEADER.unpack_from(frame)
+        if flags & self.__flags & _FRAGMENT_FLAG:
+            frame = self.__handleFragment(frame)
+            if frame is None:
+                return
+        else:
+            frame = NotificationFrame(frame=frame)
+        if self.__peerFeatures is None:
+            # Only the first frame can announce the features of the
+            # remote process.
+            self.__peerFeatures = self.__announcedFeatures(frame)
+            if self.__peerFeatures:
+                self.__logger.info('Remote process supports %s',
+                                   sorted(self.__peerFeatures))
+                return
+        self.dispatch(frame)
+
+    @staticmethod
+    def __announcedFeatures(frame):
+        if frame.scope != _CONTROL_SCOPE \
+                or frame.wireSchema != _CONTROL_WIRE_SCHEMA:
+            return set()
+        notification = frame.notification
+        if notification.method != _FEATURES_METHOD:
+            return set()
+        return set(notification.data.split(b'\n'))
+
+    def __handleFragment(self, frame):
+        """
+        Stores the fragment contained in ``frame`` and returns the
+        :obj:`NotificationFrame` of the complete notification if
+        ``frame`` contained its last missing fragment.
+        """
+        fragment = FragmentedNotification()
+        fragment.ParseFromString(memoryview(frame)[_SIZE_HEADER.size:])
+        notification = self.__assembler.add(fragment)
+        if notification is None:
+            return None
+        return NotificationFrame(notification=notification)
+
+    def receiveNotifications(self):
+        while True:
+            self.__logger.debug('Receiving notifications')
+            try:
+                self.doOneNotification()
+            except EOFError as e:
+                self.__logger.info("Received EOF while reading")
+                if not self.__activeShutdown:
+                    self.shutdown()
+                error = e
+                break
+            except Exception as e:
+                self.__logger.warn('Receive error: %s', e)
+                error = e
+                break
+
+        if self.errorHook is not None:
+            self.errorHook(error)
+        return
+
+    # sending
+
+    def sendFrame(self, frame):
+        """
+        Queues ``frame``, a serialized notification including its size
+        header, for being written to the socket.
+
+        Args:
+            frame (bytes):
+                A frame as produced by :obj:`bufferToFrame`. The frame is not
+                modified and can therefore be shared between connections.
+
+        Raises:
+            rsb.util.QueueFullError:
+                If the outbound queue is full and its policy is ``FAIL``.
+            rsb.util.InterruptedError:
+                If the connection is shutting down.
+        """
+        self.__logger.debug('Queuing frame of size %d', len(frame))
+        self.__queue.put(frame)
+
+    def sendBatch(self, frames):
+        """
+        Queues ``frames`` as a single item of the outbound queue. The
+        writer thread therefore picks them up together and, when
+        coalescing, writes them with as few system calls as possible.
+
+        Args:
+            frames (list):
+                Frames as produced by :obj:`bufferToFrame`.
+
+        Raises:
+            rsb.util.QueueFullError:
+                If the outbound queue is full and its policy is ``FAIL``.
+            rsb.util.InterruptedError:
+                If the connection is shutting down.
+        """
+        self.__logger.debug('Queuing batch of %d frame(s)', len(frames))
+        self.__queue.put(list(frames))
+
+    @staticmethod
+    def __flatten(items):
+        # Items of the outbound queue are frames or lists of frames
+        # queued by sendBatch.
+        if not any(isinstance(item, list) for item in items):
+            return items
+        frames = []
+        for item in items:
+            if isinstance(item, list):
+                frames.extend(item)
             else:
-                raise ValueError('Specify either host and port or socket')
-        elif socket_ is not None:
-            self.__socket = socket_
+                frames.append(item)
+        return frames
+
+    def writeFrames(self, frames):
+        """
+        Writes ``frames`` to the socket.
+
+        Args:
+            frames (list):
+                Frames as produced by :obj:`bufferToFrame`.
+        """
+        if self.__compressor is not None and self.peerAcceptsCompression:
+            compress = self.__compressor.compress
+            frames = [compress(frame) for frame in frames]
+
+        if self.__coalesce:
+            # Write batches of at most coalesceBytes bytes (or single
+            # larger frames).
+            batch, size = [], 0
+            for frame in frames:
+                if batch and size + len(frame) > self.__coalesceBytes:
+                    _sendBuffers(self.__socket, batch)
+                    self.__batchStatistics.record(len(batch), size)
+                    batch, size = [], 0
+                batch.append(frame)
+                size += len(frame)
+            _sendBuffers(self.__socket, batch)
+            self.__batchStatistics.record(len(batch), size)
         else:
-            raise ValueError('Specify either host and port or socket_')
-        if tcpnodelay:
-            self.__socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            for frame in frames:
+                self.__socket.sendall(frame)
+                self.__batchStatistics.record(1, len(frame))
+
+    def __gatherFrames(self):
+        """
+        Waits for queued frames and returns them.
+
+        When coalescing, further frames are gathered as long as they
+        keep arriving within the coalescing window and the byte budget
+        is not exhausted. As soon as the queue is idle, the gathered
+        frames are returned.
+        """
+        frames = self.__flatten(self.__queue.getAll())
+        if not (frames and self.__coalesce):
+            return frames
+
+        size = sum(len(frame) for frame in frames)
+        deadline = time.time() + self.__coalesceWindow
+        timeout = 0
+        while size < self.__coalesceBytes:
+            more = self.__flatten(self.__queue.getAll(timeout=timeout))
+            if not more:
+                break
+            frames += more
+            size += sum(len(frame) for frame in more)
+            # Frames are still arriving, so wait for more of them
+            # within the window.
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+        return frames
+
+    def __fragmentFrame(self, frame):
+        """
+        Returns an iterator of the frames into which ``frame`` has to be
+        split for the remote process.
+        """
+        if len(frame) - _SIZE_HEADER.size <= self.__maxFrameSize \
+                or not self.peerAcceptsFragments:
+            yield frame
+            return
+
+        notification = self.bufferToNotification(
+            memoryview(frame)[_SIZE_HEADER.size:])
+        for fragment in conversion.notificationToFragments(
+                notification, self.__maxFrameSize):
+            serialized = fragment.SerializeToString()
+            yield _SIZE_HEADER.pack(len(serialized) | _FRAGMENT_FLAG) \
+                + serialized
+
+    def __interleaveFrames(self):
+        """
+        Returns the next frames to be written when fragmenting.
+
+        Each queued frame becomes a stream of one or more frames. The
+        returned frames consist of the next frame of each stream, so
+        streams progress in a round-robin fashion. Waits for queued
+        frames only when no stream is pending. To retain the back
+        pressure of the outbound queue, there are at most as many
+        streams as the queue can hold frames.
+        """
+        streams = self.__streams
+        capacity = self.__queue.capacity
+        while True:
+            if streams:
+                room = None if capacity is None else capacity - len(streams)
+                if room is None or room > 0:
+                    queued = self.__flatten(
+                        self.__queue.getAll(maxItems=room, timeout=0))
+                else:
+                    queued = []
+            else:
+                queued = self.__gatherFrames()
+                if not queued:
+                    return []
+            for frame in queued:
+                streams.append(self.__fragmentFrame(frame))
+
+            frames = []
+            for _ in range(len(streams)):
+                stream = streams.popleft()
+                frame = next(stream, None)
+                if frame is not None:
+                    frames.append(frame)
+                    streams.append(stream)
+            if frames:
+                return frames
+
+    def sendFrames(self):
+        while True:
+            if self.__maxFrameSize is not None:
+                frames = self.__interleaveFrames()
+            else:
+                frames = self.__gatherFrames()
+            if not frames:
+                break
+            try:
+                self.writeFrames(frames)
+            except Exception as e:
+                # Failures after deactivation are caused by closing
+                # the socket and are expected.
+                if self.__active:
+                    self.__logger.warn('Send error: %s', e)
+                    self.__queue.close(discard=True)
+                    if self.errorHook is not None:
+                        self.errorHook(e)
+                return
+
+        # The queue has been closed and drained. Pending frames have
+        # been written, so we can shut down the write direction of the
+        # socket now, unless we are already being deactivated.
+        with self.__lock:
+            if self.__active and self.__activeShutdown:
+                try:
+                    self.__socket.shutdown(socket.SHUT_WR)
+                except Exception as e:
+                    self.__logger.warn('Failed to shutdown socket: %s', e)
+
+    def sendNotification(self, notification):
+        self.sendFrame(self.bufferToFrame(notification))
+
+    @staticmethod
+    def notificationToBuffer(notification):
+        return notification.SerializeToString()
+
+    @staticmethod
+    def bufferToFrame(serialized):
+        return _SIZE_HEADER.pack(len(serialized)) + serialized
+
+    def handle(self, notification):
+        serialized = self.notificationToBuffer(notification)
+        self.sendNotification(serialized)
+
+    # state management
+
+    def activate(self):
+        if self.__active:
+            raise RuntimeError('Trying to activate active connection')
+
+        with self.__lock:
+
+            self.__active = True
+
+            if self.__features:
+                self.__queue.put(self.bufferToFrame(
+                    self.notificationToBuffer(_makeControlNotification(
+                        _FEATURES_METHOD,
+                        b'\n'.join(sorted(self.__features))))))
+
+            self.__thread = threading.Thread(target=self.receiveNotifications)
+            self.__thread.start()
+            self.__writerThread = threading.Thread(target=self.sendFrames)
+            self.__writerThread.start()
+
+    def shutdown(self):
+        with self.__lock:
+            self.__activeShutdown = True
+        # The writer thread shuts down the socket after writing all
+        # queued frames.
+        self.__queue.close()
+
+    def deactivate(self):
+
+        with self.__lock:
+
+            if not self.__active:
+                raise RuntimeError('Trying to deactivate inactive connection')
+
+            self.__active = False
+
+            # If necessary, close the socket, this will cause an exception
+            # in the notification receiver thread (unless we run in the
+            # context that thread). The writer thread terminates since
+            # the queue is closed and further writes fail.
+            self.__queue.close(discard=True)
+            self.__logger.info('Closing socket')
+            try:
+                # Shutting the socket down first makes blocked writes
+                # fail instead of blocking indefinitely when the
+                # remote process does not read.
+                self.__socket.shutdown(socket.SHUT_RDWR)
+            except Exception:
+                pass
+            try:
+                self.__socket.close()
+            except Exception as e:
+                self.__logger.warn('Failed to close socket: %s', e)
+
+    def waitForDeactivation(self):
+        self.__logger.info('Joining threads')
+        self.__thread.join()
+        if self.__writerThread is not threading.current_thread():
+            self.__writerThread.join()
+
+
+class NotificationFrame(object):
+    """
+    Pairs a notification with its frame, that is its serialized
+    representation including the size header.
+
+    Either representation is computed from the other one on demand and
+    at most once. This allows received frames to be forwarded to other
+    connections without parsing and re-encoding them and outgoing
+    notifications to be serialized once for all connections.
+
+    The frame of a notification received by a :obj:`BusConnection` is a
+    :obj:`memoryview` into the receive buffer of the connection and
+    only valid while the notification is dispatched. Handlers which
+    retain it have to use :obj:`detach`.
+
+    .. codeauthor:: jmoringe
+    """
+
+    def __init__(self, notification=None, frame=None):
+        """
+        Args:
+            notification (Notification or None):
+                The notification object.
+            frame (bytes or bytearray or memoryview or None):
+                The frame of the notification as sent over connections.
+        """
+        if notification is None and frame is None:
+            raise ValueError('Specify notification or frame')
+        self.__notification = notification
+        self.__frame = frame
+        self.__scope = None
+        self.__wireSchema = None
+
+    def __peek(self):
+        if self.__notification is not None:
+            self.__scope = self.__notification.scope
+            self.__wireSchema = self.__notification.wire_schema
         else:
-            self.__socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 0)
-        self.__file = self.__socket.makefile()
+            self.__scope, self.__wireSchema = \
+                conversion.peekScopeAndWireSchema(
+                    memoryview(self.__frame)[_SIZE_HEADER.size:])
+
+    def getScope(self):
+        """
+        Returns the scope of the notification without parsing the frame.
+
+        Returns:
+            bytes:
+                The ASCII-encoded scope string.
+        """
+        if self.__scope is None:
+            self.__peek()
+        return self.__scope
+
+    scope = property(getScope)
+
+    def getWireSchema(self):
+        """
+        Returns the wire-schema of the notification without parsing the
+        frame.
+
+        Returns:
+            bytes:
+                The ASCII-encoded wire-schema.
+        """
+        if self.__scope is None:
+            self.__peek()
+        return self.__wireSchema
+
+    wireSchema = property(getWireSchema)
+
+    def getNotification(self):
+        if self.__notification is None:
+            self.__notification = BusConnection.bufferToNotification(
+                memoryview(self.__frame)[_SIZE_HEADER.size:])
+        return self.__notification
+
+    notification = property(getNotification)
+
+    def getFrame(self):
+        if self.__frame is None:
+            self.__frame = BusConnection.bufferToFrame(
+                BusConnection.notificationToBuffer(self.__notification))
+        return self.__frame
+
+    frame = property(getFrame)
+
+    def detach(self):
+        """
+        Returns a :obj:`NotificationFrame` which does not share the
+        memory of the frame of this object and therefore remains valid
+        after the receive buffer of a connection has been reused.
+
+        Returns:
+            NotificationFrame:
+                This object if its frame is not shared, otherwise a copy.
+        """
+        if self.__frame is None or isinstance(self.__frame, bytes):
+            return self
+        copy = NotificationFrame(notification=self.__notification,
+                                 frame=bytes(self.__frame))
+        copy.__scope = self.__scope
+        copy.__wireSchema = self.__wireSchema
+        return copy
+
+
+class EventLoop(object):
+    """
+    Instances of this class multiplex the sockets of a bus, that is
+    its listen socket and all of its connections, in a single thread
+    using the :mod:`selectors` module.
+
+    Callbacks registered for sockets as well as functions submitted via
+    :obj:`call` are executed in the thread of the event loop.
+
+    .. codeauthor:: jmoringe
+    """
+
+    def __init__(self):
+        self.__logger = rsb.util.getLoggerByClass(self.__class__)
+
+        self.__selector = selectors.DefaultSelector()
+        self.__calls = collections.deque()
+        self.__thread = None
+        self.__running = False
+
+        # Writing to this socket pair interrupts a blocking select
+        # call so that submitted calls are executed promptly.
+        self.__wakeupReceiver, self.__wakeupSender = socket.socketpair()
+        self.__wakeupReceiver.setblocking(False)
+        self.__wakeupSender.setblocking(False)
+        self.__selector.register(self.__wakeupReceiver,
+                                 selectors.EVENT_READ,
+                                 self.__drainWakeups)
+
+    def isInLoopThread(self):
+        return threading.current_thread() is self.__thread
+
+    def call(self, function, *args):
+        """
+        Executes ``function`` with ``args`` in the thread of the event loop.
+
+        If the event loop is not running or this method is called from
+        the thread of the event loop, ``function`` is executed
+        immediately.
+        """
+        if not self.__running or self.isInLoopThread():
+            function(*args)
+            return
+        self.__calls.append((function, args))
+        try:
+            self.__wakeupSender.send(b'\0')
+        except (BlockingIOError, InterruptedError):
+            # The wakeup socket is full, so a wakeup is already
+            # pending.
+            pass
+
+    def register(self, socket_, events, callback):
+        """
+        Registers ``socket_`` for ``events``. ``callback`` is called with
+        the mask of ready events when ``socket_`` becomes ready.
+        """
+        self.call(self.__selector.register, socket_, events, callback)
+
+    def modify(self, socket_, events, callback):
+        self.call(self.__modify, socket_, events, callback)
+
+    def unregister(self, socket_, close=False):
+        """
+        Unregisters ``socket_`` and closes it if ``close`` is ``True``.
+        """
+        self.call(self.__unregister, socket_, close)
+
+    def __modify(self, socket_, events, callback):
+        # The socket may have been unregistered since the
+        # modification has been requested.
+        if socket_.fileno() != -1 and socket_ in self.__registeredSockets():
+            self.__selector.modify(socket_, events, callback)
+
+    def __unregister(self, socket_, close):
+        try:
+            self.__selector.unregister(socket_)
+        except (KeyError, ValueError):
+            pass
+        if close:
+            socket_.close()
+
+    def __registeredSockets(self):
+        return [key.fileobj for key in self.__selector.get_map().values()]
+
+    def __drainWakeups(self, mask):
+        try:
+            while self.__wakeupReceiver.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def __runCalls(self):
+        while self.__calls:
+            function, args = self.__calls.popleft()
+            try:
+                function(*args)
+            except Exception as e:
+                self.__logger.warn('Error in event loop call %s: %s',
+                                   function, e, exc_info=True)
+
+    def __run(self):
+        while self.__running:
+            for key, mask in self.__selector.select():
+                try:
+                    key.data(mask)
+                except Exception as e:
+                    self.__logger.warn('Error in event loop callback %s: %s',
+                                       key.data, e, exc_info=True)
+            self.__runCalls()
+
+    def start(self):
+        if self.__running:
+            raise RuntimeError('Trying to start running event loop')
+
+        self.__logger.info('Starting event loop thread')
+        self.__running = True
+        self.__thread = threading.Thread(target=self.__run,
+                                         name='SocketEventLoop')
+        self.__thread.start()
+
+    def stop(self):
+        if not self.__running:
+            raise RuntimeError('Trying to stop event loop which is not '
+                               'running')
+
+        def stop():
+            self.__running = False
+        self.call(stop)
+        if not self.isInLoopThread():
+            self.__logger.info('Joining event loop thread')
+            self.__thread.join()
+        # Execute calls which have been submitted while the loop was
+        # stopping.
+        self.__runCalls()
+
+    def close(self):
+        """
+        Releases the resources of the stopped event loop.
+        """
+        self.__selector.close()
+        self.__wakeupReceiver.close()
+        self.__wakeupSender.close()
+
+
+class SelectorBusConnection(rsb.eventprocessing.BroadcastProcessor):
+    """
+    Instances of this class implement connections to a socket-based
+    bus like :obj:`BusConnection`, but instead of using a receiver
+    thread for each connection, all sockets are serviced by an
+    :obj:`EventLoop`.
+
+    The socket is operated in non-blocking mode. Frames which cannot be
+    written immediately are put into a bounded outbound queue and
+    written when the event loop reports the socket to be writable. The
+    overflow policy of the queue applies as for :obj:`BusConnection`
+    with one exception: the thread of the event loop must not wait, so
+    a frame which is sent from it to a full queue with the ``BLOCK``
+    policy makes :obj:`sendFrame` fail and the bus disconnect the
+    connection.
 
-        # Perform the client or server part of the handshake.
+    The server part of the handshake is written through the outbound
+    queue as well, so accepting a client never blocks the event loop.
+
+    Coalescing, compression and fragmentation are not supported.
+
+    .. codeauthor:: jmoringe
+    """
+
+    RECEIVE_SIZE = 65536
+
+    # Options of BusConnection which enable features that are not
+    # supported.
+    UNSUPPORTED_OPTIONS = ['coalesce', 'compression', 'maxFrameSize']
+
+    def __init__(self, eventLoop,
+                 host=None, port=None, socket_=None,
+                 isServer=False, tcpnodelay=True,
+                 queueCapacity=1000,
+                 queuePolicy=rsb.util.BoundedQueue.OverflowPolicy.BLOCK):
+        """
+        Args:
+            eventLoop (EventLoop):
+                The event loop which services the socket of the connection.
+            host (str or None):
+                Hostname or address of the bus server.
+            port (int or None):
+                Port of the bus server.
+            socket_:
+                A socket object through which the new connection should access
+                the bus.
+            isServer (bool):
+                if True, the created object will perform the server part of the
+                handshake protocol.
+            tcpnodelay (bool):
+                If True, the socket will be set to TCP_NODELAY.
+            queueCapacity (int or None):
+                The maximum number of frames in the outbound queue or
+                ``None`` for an unbounded queue.
+            queuePolicy:
+                A value of :obj:`rsb.util.BoundedQueue.OverflowPolicy`
+                which determines what happens when a frame is sent
+                while the outbound queue is full.
+        """
+        super(SelectorBusConnection, self).__init__()
+
+        self.__logger = rsb.util.getLoggerByClass(self.__class__)
+
+        self.__eventLoop = eventLoop
+
+        self.__errorHook = None
+
+        self.__active = False
+        self.__activeShutdown = False
+        self.__shutdownPending = False
+        self.__finished = threading.Event()
+
+        self.__lock = threading.RLock()
+
+        self.__receiveBuffer = bytearray()
+        self.__queue = rsb.util.BoundedQueue(queueCapacity, queuePolicy)
+        # Frames which have been taken from the outbound queue but not
+        # yet written completely. Only refilled from the queue when
+        # empty, so the queue bounds its size as well.
+        self.__pending = collections.deque()
+
+        self.__socket = _connect(host, port, socket_, tcpnodelay)
         if isServer:
-            self.__file.write('\0\0\0\0')
-            self.__file.flush()
+            # Written by the event loop once the socket is writable.
+            self.__pending.append(_HANDSHAKE)
         else:
-            zero = self.__file.read(size=4)
-            if len(zero) == '\0\0\0\0':
-                raise RuntimeError('Incorrect handshake')
-
-    def __del__(self):
-        if self.__active:
-            self.deactivate()
+            _handshake(self.__socket, isServer)
+        self.__socket.setblocking(False)
 
     def getErrorHook(self):
         return self.__errorHook
@@ -141,77 +1540,185 @@ class BusConnection(rsb.eventprocessing.BroadcastProcessor):
 
     errorHook = property(getErrorHook, setErrorHook)
 
+    def getOutboundQueue(self):
+        """
+        Returns:
+            rsb.util.BoundedQueue:
+                The queue of frames waiting to be written. Its counters
+                can be used as metrics for the connection.
+        """
+        return self.__queue
+
+    outboundQueue = property(getOutboundQueue)
+
+    def __handleEvents(self, mask):
+        if mask & selectors.EVENT_WRITE:
+            self.__flush()
+        if mask & selectors.EVENT_READ:
+            self.__receive()
+
+    def __fail(self, error):
+        self.__queue.close(discard=True)
+        self.__eventLoop.unregister(self.__socket)
+        if self.errorHook is not None:
+            self.errorHook(error)
+        self.__finished.set()
+
     # receiving
 
-    def receiveNotification(self):
-        size = self.__file.read(size=4)
-        if len(size) == 0:
-            self.__logger.info("Received EOF")
-            raise EOFError()
-        if not (len(size) == 4):
-            raise RuntimeError('Short read when receiving notification size '
-                               '(size: %s)' % len(size))
-        size = ord(size[0])      \
-            | ord(size[1]) << 8  \
-            | ord(size[2]) << 16 \
-            | ord(size[3]) << 24
-        self.__logger.debug('Receiving notification of size %d', size)
-        notification = self.__file.read(size=size)
-        if not (len(notification) == size):
-            raise RuntimeError(
-                'Short read when receiving notification payload')
-        return notification
+    def __receive(self):
+        try:
+            data = self.__socket.recv(self.RECEIVE_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except Exception as e:
+            self.__logger.warn('Receive error: %s', e)
+            self.__fail(e)
+            return
+
+        if not data:
+            self.__logger.info("Received EOF while reading")
+            if not self.__activeShutdown:
+                self.shutdown()
+            self.__fail(EOFError())
+            return
+
+        # Dispatch all complete frames contained in the receive
+        # buffer and retain the remainder.
+        buffer = self.__receiveBuffer
+        buffer += data
+        offset, available = 0, len(buffer)
+        try:
+            while available - offset >= _SIZE_HEADER.size:
+                (size,) = _SIZE_HEADER.unpack_from(buffer, offset)
+                end = offset + _SIZE_HEADER.size + size
+                if end > available:
+                    break
+                self.__logger.debug('Received notification of size %d', size)
+                frame = bytes(buffer[offset:end])
+                offset = end
+                self.dispatch(NotificationFrame(frame=frame))
+        except Exception as e:
+            self.__logger.warn('Receive error: %s', e)
+            self.__fail(e)
+            return
+        finally:
+            del buffer[:offset]
+
+    # sending
+
+    def sendFrame(self, frame):
+        """
+        Queues ``frame`` and writes queued frames to the socket as far
+        as possible without blocking.
+
+        Args:
+            frame (bytes):
+                A frame as produced by :obj:`BusConnection.bufferToFrame`.
+
+        Raises:
+            rsb.util.QueueFullError:
+                If the outbound queue is full and its policy is
+                ``FAIL`` or, when called from the thread of the event
+                loop, ``BLOCK``.
+            rsb.util.InterruptedError:
+                If the connection is shutting down.
+        """
+        self.__logger.debug('Sending frame of size %d', len(frame))
+        with self.__lock:
+            # Write directly, bypassing the queue, if nothing is
+            # waiting to be written.
+            if not (self.__pending or len(self.__queue)
+                    or self.__queue.isClosed()):
+                try:
+                    sent = self.__socket.send(frame)
+                except (BlockingIOError, InterruptedError):
+                    sent = 0
+                if sent < len(frame):
+                    self.__pending.append(memoryview(frame)[sent:])
+                    self.__eventLoop.modify(
+                        self.__socket,
+                        selectors.EVENT_READ | selectors.EVENT_WRITE,
+                        self.__handleEvents)
+                return
 
-    @staticmethod
-    def bufferToNotification(serialized):
-        notification = Notification()
-        notification.ParseFromString(serialized)
-        return notification
+        # The event loop writes queued frames, so it must not wait for
+        # space in the queue.
+        timeout = 0 if self.__eventLoop.isInLoopThread() else None
+        self.__queue.put(frame, timeout=timeout)
+        with self.__lock:
+            if self.__write():
+                self.__maybeShutdownWrite()
+            else:
+                self.__eventLoop.modify(
+                    self.__socket,
+                    selectors.EVENT_READ | selectors.EVENT_WRITE,
+                    self.__handleEvents)
+
+    def __maybeShutdownWrite(self):
+        if self.__shutdownPending:
+            self.__shutdownPending = False
+            self.__socket.shutdown(socket.SHUT_WR)
 
-    def doOneNotification(self):
-        serialized = self.receiveNotification()
-        notification = self.bufferToNotification(serialized)
-        self.dispatch(notification)
+    def __write(self):
+        """
+        Writes pending and queued frames until the socket would block.
 
-    def receiveNotifications(self):
+        Returns:
+            bool:
+                ``True`` if all frames have been written.
+        """
+        pending = self.__pending
         while True:
-            self.__logger.debug('Receiving notifications')
+            if not pending:
+                pending.extend(self.__queue.getAll(timeout=0))
+                if not pending:
+                    return True
+            buffer = pending[0]
             try:
-                self.doOneNotification()
-            except EOFError as e:
-                self.__logger.info("Received EOF while reading")
-                if not self.__activeShutdown:
-                    self.shutdown()
-                break
-            except Exception as e:
-                self.__logger.warn('Receive error: %s', e)
-                break
+                sent = self.__socket.send(buffer)
+            except (BlockingIOError, InterruptedError):
+                return False
+            if sent < len(buffer):
+                pending[0] = memoryview(buffer)[sent:]
+                return False
+            pending.popleft()
 
-        if self.errorHook is not None:
-            self.errorHook(e)
-        return
+    def __flush(self):
+        # Failures are handled after releasing the lock since the
+        # error hook locks the bus.
+        error = None
+        with self.__lock:
+            try:
+                if not self.__write():
+                    return
+            except Exception as e:
+                self.__logger.warn('Send error: %s', e)
+                self.__pending.clear()
+                error = e
+
+            if error is None:
+                self.__eventLoop.modify(self.__socket, selectors.EVENT_READ,
+                                        self.__handleEvents)
+                self.__maybeShutdownWrite()
+        if error is not None:
+            self.__fail(error)
+
+    def sendBatch(self, frames):
+        """
+        Writes ``frames`` like a single frame.
 
-    # sending
+        Args:
+            frames (list):
+                Frames as produced by :obj:`BusConnection.bufferToFrame`.
+        """
+        self.sendFrame(b''.join(frames))
 
     def sendNotification(self, notification):
-        size = len(notification)
-        self.__logger.info('Sending notification of size %d', size)
-        size = ''.join((chr(size & 0x000000ff),
-                        chr((size & 0x0000ff00) >> 8),
-                        chr((size & 0x00ff0000) >> 16),
-                        chr((size & 0xff000000) >> 24)))
-        with self.__lock:
-            self.__file.write(size)
-            self.__file.write(notification)
-            self.__file.flush()
-
-    @staticmethod
-    def notificationToBuffer(notification):
-        return notification.SerializeToString()
+        self.sendFrame(BusConnection.bufferToFrame(notification))
 
     def handle(self, notification):
-        serialized = self.notificationToBuffer(notification)
-        self.sendNotification(serialized)
+        self.sendNotification(BusConnection.notificationToBuffer(notification))
 
     # state management
 
@@ -220,16 +1727,23 @@ class BusConnection(rsb.eventprocessing.BroadcastProcessor):
             raise RuntimeError('Trying to activate active connection')
 
         with self.__lock:
-
-            self.__thread = threading.Thread(target=self.receiveNotifications)
-            self.__thread.start()
-
+            events = selectors.EVENT_READ
+            if self.__pending:
+                events |= selectors.EVENT_WRITE
+            self.__eventLoop.register(self.__socket, events,
+                                      self.__handleEvents)
             self.__active = True
 
     def shutdown(self):
         with self.__lock:
             self.__activeShutdown = True
-            self.__socket.shutdown(socket.SHUT_WR)
+            self.__queue.close()
+            # Pending frames have to be written before the write
+            # direction of the socket can be shut down.
+            if self.__pending or len(self.__queue):
+                self.__shutdownPending = True
+            else:
+                self.__socket.shutdown(socket.SHUT_WR)
 
     def deactivate(self):
 
@@ -240,19 +1754,15 @@ class BusConnection(rsb.eventprocessing.BroadcastProcessor):
 
             self.__active = False
 
-            # If necessary, close the socket, this will cause an exception
-            # in the notification receiver thread (unless we run in the
-            # context that thread).
+            # Wake up threads waiting for space in the queue.
+            self.__queue.close(discard=True)
             self.__logger.info('Closing socket')
-            try:
-                self.__file.close()
-                self.__socket.close()
-            except Exception as e:
-                self.__logger.warn('Failed to close socket: %s', e)
+            self.__eventLoop.unregister(self.__socket, close=True)
+            self.__finished.set()
 
     def waitForDeactivation(self):
-        self.__logger.info('Joining thread')
-        self.__thread.join()
+        self.__logger.info('Waiting for deactivation')
+        self.__finished.wait()
 
 
 class Bus(object):
@@ -271,21 +1781,102 @@ class Bus(object):
 
     .. codeauthor:: jmoringe
     """
-    def __init__(self):
+    def __init__(self, eventLoop=None, connectionOptions=None):
+        """
+        Args:
+            eventLoop (EventLoop or None):
+                If not ``None``, the connections of the bus are
+                serviced by this event loop instead of one receiver
+                thread per connection. The bus starts and stops the
+                event loop.
+            connectionOptions (dict or None):
+                Additional keyword arguments for the
+                :obj:`BusConnection` objects created by the bus such
+                as ``queueCapacity`` and ``queuePolicy``. Only these
+                two are used for :obj:`SelectorBusConnection` objects.
+
+        Raises:
+            ValueError:
+                If ``connectionOptions`` enable features which
+                :obj:`SelectorBusConnection` does not support.
+        """
         self.__logger = rsb.util.getLoggerByClass(self.__class__)
 
+        self.__eventLoop = eventLoop
+        self.__connectionOptions = connectionOptions or {}
+        if eventLoop is not None:
+            unsupported = sorted(
+                name for name in SelectorBusConnection.UNSUPPORTED_OPTIONS
+                if self.__connectionOptions.get(name))
+            if unsupported:
+                eventLoop.close()
+                raise ValueError('Connection options %s are not supported '
+                                 'by selector-based connections'
+                                 % ', '.join(unsupported))
+
         self.__connections = []
         self.__connectors = []
         self.__dispatcher = rsb.eventprocessing.ScopeDispatcher()
         self.__lock = threading.RLock()
 
         self.__active = False
+        self.__droppedFrames = 0
 
     def getLock(self):
         return self.__lock
 
     lock = property(getLock)
 
+    def getEventLoop(self):
+        return self.__eventLoop
+
+    eventLoop = property(getEventLoop)
+
+    def getConnectionOptions(self):
+        return self.__connectionOptions
+
+    connectionOptions = property(getConnectionOptions)
+
+    def getDroppedFrames(self):
+        """
+        Returns:
+            int:
+                The number of frames which the outbound queues of the
+                connections of the bus discarded, including
+                connections which have been removed.
+        """
+        with self.__lock:
+            return self.__droppedFrames \
+                + sum(connection.outboundQueue.dropped
+                      for connection in self.__connections)
+
+    droppedFrames = property(getDroppedFrames)
+
+    def makeConnection(self, **kwargs):
+        """
+        Creates a connection of the kind appropriate for the I/O mode
+        of this bus.
+
+        Args:
+            kwargs:
+                Passed to :obj:`BusConnection` or
+                :obj:`SelectorBusConnection`.
+
+        Returns:
+            BusConnection or SelectorBusConnection:
+                The new connection.
+        """
+        if self.__eventLoop is None:
+            options = dict(self.__connectionOptions)
+            options.update(kwargs)
+            return BusConnection(**options)
+        else:
+            options = dict((name, value) for (name, value)
+                           in self.__connectionOptions.items()
+                           if name in ['queueCapacity', 'queuePolicy'])
+            options.update(kwargs)
+            return SelectorBusConnection(self.__eventLoop, **options)
+
     def getConnections(self):
         """
         Returns:
@@ -341,6 +1932,7 @@ class Bus(object):
         with self.lock:
             if connection in self.__connections:
                 self.__connections.remove(connection)
+                self.__droppedFrames += connection.outboundQueue.dropped
                 connection.removeHandler([h for h in connection.handlers
                                           if h.bus is self][0])
 
@@ -362,7 +1954,7 @@ class Bus(object):
         """
         self.__logger.info('Adding connector %s', connector)
         with self.lock:
-            if isinstance(connector, InPushConnector):
+            if isinstance(connector, (InPushConnector, InPullConnector)):
                 self.__dispatcher.addSink(connector.scope, connector)
             self.__connectors.append(connector)
 
@@ -376,7 +1968,7 @@ class Bus(object):
         """
         self.__logger.info('Removing connector %s', connector)
         with self.lock:
-            if isinstance(connector, InPushConnector):
+            if isinstance(connector, (InPushConnector, InPullConnector)):
                 self.__dispatcher.removeSink(connector.scope, connector)
             self.__connectors.remove(connector)
             if not self.__connectors:
@@ -389,6 +1981,9 @@ class Bus(object):
 
     def handleIncoming(self, connectionAndNotification):
         _, notification = connectionAndNotification
+        if notification.wireSchema == _CONTROL_WIRE_SCHEMA:
+            self.__logger.debug('Ignoring control message')
+            return
         self.__logger.debug('Trying to distribute notification to connectors')
         with self.lock:
             self.__logger.debug(
@@ -399,11 +1994,12 @@ class Bus(object):
                     'since bus is not active')
                 return
 
-            # Distribute the notification to participants in our
-            # process via InPushConnector instances.
-            self._toConnectors(notification)
+        # Distribute the notification to participants in our process
+        # via InPushConnector instances.
+        self._toConnectors(notification)
 
     def handleOutgoing(self, notification):
+        notification = NotificationFrame(notification=notification)
         with self.lock:
             self.__logger.debug('Locked bus to distribute notification to '
                                 'connections and connectors')
@@ -415,13 +2011,14 @@ class Bus(object):
             # Distribute the notification to remote participants via
             # network connections.
             failing = self._toConnections(notification)
-            # Distribute the notification to participants in our own
-            # process via InPushConnector instances.
-            self._toConnectors(notification)
+        # Distribute the notification to participants in our own
+        # process via InPushConnector instances.
+        self._toConnectors(notification)
         # there are only failing connection in case of an unorderly shutdown.
         # So the shutdown protocol does not apply here and
         # we can immediately call deactivate.
-        list(map(BusConnection.deactivate, failing))
+        for connection in failing:
+            connection.deactivate()
 
     # State management
 
@@ -430,6 +2027,8 @@ class Bus(object):
             raise RuntimeError('Trying to activate active bus')
 
         with self.lock:
+            if self.__eventLoop is not None:
+                self.__eventLoop.start()
             self.__active = True
 
     def deactivate(self):
@@ -453,35 +2052,77 @@ class Bus(object):
             except Exception as e:
                 self.__logger.error('Failed to close connections: %s', e)
 
+        if self.__eventLoop is not None:
+            self.__eventLoop.stop()
+            self.__eventLoop.close()
+
     # Low-level helpers
 
     def _toConnections(self, notification, exclude=None):
         failing = []
-        for connection in self.connections:
-            if connection is not exclude:
-                try:
-                    connection.handle(notification)
-                except Exception as e:
-                    self.__logger.warn(
-                        'Failed to send to %s: %s; '
-                        'will close connection later',
-                        connection, e)
-                    failing.append(connection)
+        connections = self._selectConnections(
+            [connection for connection in self.connections
+             if connection is not exclude],
+            notification)
+        if not connections:
+            return failing
+
+        # The frame of NOTIFICATION is either the one we received or
+        # it is serialized and length-prefixed once here. In both
+        # cases, it is written as-is to all connections. Received
+        # frames are copied once out of the receive buffer since the
+        # connections queue them.
+        frame = notification.detach().frame
+        # Compressing connections share the compressed form of the
+        # frame.
+        if self.__connectionOptions.get('compression') \
+                and len(connections) > 1:
+            frame = SharedFrame(frame)
+        for connection in connections:
+            try:
+                connection.sendFrame(frame)
+            except Exception as e:
+                self.__logger.warn(
+                    'Failed to send to %s: %s; '
+                    'will close connection later',
+                    connection, e)
+                failing.append(connection)
 
         # Removed connections for which sending the notification
         # failed.
         list(map(self.removeConnection, failing))
         return failing
 
+    def _selectConnections(self, connections, notification):
+        """
+        Returns the subset of ``connections`` to which ``notification``
+        should be sent. All connections are selected by default.
+        """
+        return connections
+
     def _toConnectors(self, notification):
         # Deliver NOTIFICATION to connectors which fulfill two
         # criteria:
         # 1) Direction has to be "incoming events"
         # 2) The scope of the connector has to be a superscope of
         #    NOTIFICATION's scope
-        scope = rsb.Scope(notification.scope.decode('ASCII'))
-        for sink in self.__dispatcher.matchingSinks(scope):
-            sink.handle(notification)
+        #
+        # The scope is obtained without parsing NOTIFICATION's frame
+        # so that frames for which there are no matching connectors
+        # are never fully parsed. Connectors parse the frame on demand
+        # and the parsed notification is shared among them.
+        #
+        # Connectors are called without holding the lock of the bus,
+        # so that a connector which blocks, like a pull connector with
+        # a full buffer, does not stall the other connections and
+        # connectors of the bus.
+        with self.lock:
+            if not self.__dispatcher:
+                return
+            sinks = self.__dispatcher.matchingSinksForString(
+                notification.scope)
+        for sink in sinks:
+            sink.handleFrame(notification)
 
     def __repr__(self):
         return '<%s %d connection(s) %d connector(s) at 0x%x>' \
@@ -494,7 +2135,7 @@ __busClients = {}
 __busClientsLock = threading.Lock()
 
 
-def getBusClientFor(host, port, tcpnodelay, connector):
+def getBusClientFor(host, port, tcpnodelay, connector, **kwargs):
     """
     Return (creating it if necessary), a :obj:`BusClient` for the endpoint
     designated by ``host`` and ``port`` and attach ``connector`` to
@@ -511,12 +2152,15 @@ def getBusClientFor(host, port, tcpnodelay, connector):
             If True, the socket will be set to TCP_NODELAY.
         connector:
             A connector that should be attached to the bus client.
+        kwargs:
+            Passed to :obj:`BusClient` if the bus client has to be
+            created.
     """
     key = (host, port, tcpnodelay)
     with __busClientsLock:
         bus = __busClients.get(key)
         if bus is None:
-            bus = BusClient(host, port, tcpnodelay)
+            bus = BusClient(host, port, tcpnodelay, **kwargs)
             __busClients[key] = bus
             bus.activate()
             bus.addConnector(connector)
@@ -530,9 +2174,18 @@ class BusClient(Bus):
     Instances of this class provide access to a bus by means of a
     client socket.
 
+    If reconnecting is enabled, a bus client which loses its
+    connection tries to connect to the bus server again, waiting
+    exponentially longer between failed attempts. Notifications sent
+    in the meantime are buffered up to a byte limit, dropping the
+    oldest ones first, and sent in one batch after reconnecting.
+
     .. codeauthor:: jmoringe
     """
-    def __init__(self, host, port, tcpnodelay):
+    def __init__(self, host, port, tcpnodelay, selector=False,
+                 subscriptions=False, unixPath=None, reconnect=False,
+                 reconnectDelay=0.1, reconnectMaxDelay=30.0,
+                 replayBytes=1024 * 1024, **connectionOptions):
         """
         Args:
             host (str):
@@ -542,17 +2195,243 @@ class BusClient(Bus):
                 The port on which the new bus server listens.
             tcpnodelay (bool):
                 If True, the socket will be set to TCP_NODELAY.
+            selector (bool):
+                If True, the connection is serviced by an
+                :obj:`EventLoop` instead of a receiver thread.
+            subscriptions (bool):
+                If True, the scopes of the in-direction connectors of
+                the bus client are announced to the bus server which
+                then only forwards matching notifications to the bus
+                client. The bus server has to support this extension.
+            unixPath (str or None):
+                If not ``None`` and ``host`` designates the local host,
+                connect to the bus server through the Unix domain
+                socket with this address instead of TCP. TCP is used if
+                the bus server does not listen on the Unix domain
+                socket.
+            reconnect (bool):
+                If True, the bus client reconnects to the bus server
+                after losing its connection.
+            reconnectDelay (float):
+                The number of seconds to wait before the first attempt
+                to reconnect. The delay doubles after each failed
+                attempt. Each attempt times out after the current
+                delay, so that deactivating the bus client does not
+                wait for the operating system to give up on an
+                unreachable bus server.
+            reconnectMaxDelay (float):
+                The maximum number of seconds between two attempts to
+                reconnect.
+            replayBytes (int):
+                The maximum number of bytes of notifications which are
+                buffered while reconnecting.
+            connectionOptions:
+                Passed to :obj:`BusConnection`.
+        """
+        super(BusClient, self).__init__(
+            eventLoop=EventLoop() if selector else None,
+            connectionOptions=connectionOptions)
+
+        self.__logger = rsb.util.getLoggerByClass(self.__class__)
+
+        self.__host = host
+        self.__port = port
+        self.__tcpnodelay = tcpnodelay
+        self.__unixPath = unixPath
+
+        self.__subscriptions = subscriptions
+        self.__announcedScopes = None
+
+        self.__reconnect = reconnect
+        self.__reconnectDelay = reconnectDelay
+        self.__reconnectMaxDelay = reconnectMaxDelay
+        self.__reconnectThread = None
+        self.__stopped = threading.Event()
+        self.__reconnects = 0
+
+        self.__replayBytes = replayBytes
+        self.__replayBuffer = collections.deque()
+        self.__replayBufferBytes = 0
+        self.__replayDropped = 0
+
+        self.addConnection(self.__connect())
+
+    def __connect(self, timeout=None):
+        socket_ = None
+        if self.__unixPath is not None and _isLocalHost(self.__host):
+            try:
+                socket_ = _connectUnix(self.__unixPath)
+            except Exception as e:
+                self.__logger.info('Failed to connect to Unix domain socket '
+                                   '%r: %s; using TCP', self.__unixPath, e)
+        if socket_ is not None:
+            return self.makeConnection(socket_=socket_,
+                                       tcpnodelay=self.__tcpnodelay)
+        elif timeout is None:
+            return self.makeConnection(host=self.__host, port=self.__port,
+                                       tcpnodelay=self.__tcpnodelay)
+        else:
+            socket_ = socket.create_connection((self.__host, self.__port),
+                                               timeout)
+            try:
+                socket_.settimeout(None)
+                return self.makeConnection(socket_=socket_,
+                                           tcpnodelay=self.__tcpnodelay)
+            except BaseException:
+                socket_.close()
+                raise
+
+    def getReconnects(self):
+        """
+        Returns:
+            int:
+                The number of times the bus client reconnected.
+        """
+        return self.__reconnects
+
+    reconnects = property(getReconnects)
+
+    def isReconnecting(self):
+        return self.__reconnectThread is not None
+
+    def getReplayBufferBytes(self):
+        """
+        Returns:
+            int:
+                The number of bytes of notifications currently buffered
+                for being sent after reconnecting.
+        """
+        return self.__replayBufferBytes
+
+    replayBufferBytes = property(getReplayBufferBytes)
+
+    def getReplayDropped(self):
+        """
+        Returns:
+            int:
+                The number of notifications which did not fit into the
+                replay buffer.
+        """
+        return self.__replayDropped
+
+    replayDropped = property(getReplayDropped)
+
+    def removeConnection(self, connection):
+        with self.lock:
+            lost = connection in self.connections
+            super(BusClient, self).removeConnection(connection)
+            if lost and self.__reconnect and not self.__stopped.is_set() \
+                    and self.__reconnectThread is None:
+                self.__logger.info('Lost connection %s; reconnecting',
+                                   connection)
+                self.__reconnectThread = threading.Thread(
+                    target=self.__reconnectLoop, name='Reconnect')
+                self.__reconnectThread.daemon = True
+                self.__reconnectThread.start()
+
+    def __reconnectLoop(self):
+        delay = self.__reconnectDelay
+        while not self.__stopped.wait(delay):
+            try:
+                connection = self.__connect(timeout=delay)
+            except Exception as e:
+                self.__logger.info('Failed to reconnect: %s; retrying in '
+                                   '%s second(s)', e, delay)
+                delay = min(2 * delay, self.__reconnectMaxDelay)
+                continue
+
+            with self.lock:
+                self.__reconnectThread = None
+                self.__reconnects += 1
+                self.addConnection(connection)
+                self.__logger.info('Reconnected with %s', connection)
+
+                # The bus server may be a new one, so subscriptions
+                # have to be announced again.
+                self.__announcedScopes = None
+                if self.__subscriptions:
+                    self.announceSubscriptions()
+
+                frames = list(self.__replayBuffer)
+                self.__replayBuffer.clear()
+                self.__replayBufferBytes = 0
+                if frames:
+                    self.__logger.info('Replaying %d notification(s)',
+                                       len(frames))
+                    try:
+                        connection.sendBatch(frames)
+                    except Exception as e:
+                        self.__logger.warn('Failed to replay notifications: '
+                                           '%s', e)
+            return
+
+    def _toConnections(self, notification, exclude=None):
+        if self.connections or self.__reconnectThread is None:
+            return super(BusClient, self)._toConnections(notification,
+                                                         exclude)
+
+        # Buffer NOTIFICATION while reconnecting. When the buffer is
+        # full, the oldest notifications are dropped.
+        frame = notification.detach().frame
+        if len(frame) > self.__replayBytes:
+            self.__replayDropped += 1
+            return []
+        self.__replayBuffer.append(frame)
+        self.__replayBufferBytes += len(frame)
+        while self.__replayBufferBytes > self.__replayBytes:
+            self.__replayBufferBytes -= len(self.__replayBuffer.popleft())
+            self.__replayDropped += 1
+        return []
+
+    def deactivate(self):
+        self.__stopped.set()
+        thread = self.__reconnectThread
+        if thread is not None:
+            thread.join()
+        super(BusClient, self).deactivate()
+
+    def addConnector(self, connector):
+        super(BusClient, self).addConnector(connector)
+        if self.__subscriptions:
+            self.announceSubscriptions()
+
+    def removeConnector(self, connector):
+        result = super(BusClient, self).removeConnector(connector)
+        if self.__subscriptions and result:
+            self.announceSubscriptions()
+        return result
+
+    def announceSubscriptions(self):
+        """
+        Sends the scopes of all in-direction connectors to the bus
+        server unless they have not changed since the previous
+        announcement.
         """
-        super(BusClient, self).__init__()
+        with self.lock:
+            scopes = set(connector.scope for connector in self.connectors
+                         if isinstance(connector,
+                                       (InPushConnector, InPullConnector)))
+            # Scopes which are sub-scopes of other announced scopes
+            # are redundant.
+            scopes = sorted(scope.toString() for scope in scopes
+                            if not any(other.isSuperScopeOf(scope)
+                                       for other in scopes))
+            if scopes == self.__announcedScopes or not self.connections:
+                return
+            self.__announcedScopes = scopes
 
-        self.addConnection(BusConnection(host, port, tcpnodelay=tcpnodelay))
+            notification = _makeControlNotification(
+                _SUBSCRIPTIONS_METHOD,
+                '\n'.join(scopes).encode('ASCII'))
+            self.connections[0].sendFrame(
+                NotificationFrame(notification=notification).frame)
 
 
 __busServers = {}
 __busServersLock = threading.Lock()
 
 
-def getBusServerFor(host, port, tcpnodelay, connector):
+def getBusServerFor(host, port, tcpnodelay, connector, **kwargs):
     """
     Return (creating it if necessary), a :obj:`BusServer` for the endpoint
     designated by ``host`` and ``port`` and attach ``connector`` to
@@ -571,12 +2450,15 @@ def getBusServerFor(host, port, tcpnodelay, connector):
             If True, the socket will be set to TCP_NODELAY.
         connector:
             A connector that should be attached to the bus server.
+        kwargs:
+            Passed to :obj:`BusServer` if the bus server has to be
+            created.
     """
     key = (host, port, tcpnodelay)
     with __busServersLock:
         bus = __busServers.get(key)
         if bus is None:
-            bus = BusServer(host, port, tcpnodelay)
+            bus = BusServer(host, port, tcpnodelay, **kwargs)
             bus.activate()
             __busServers[key] = bus
             bus.addConnector(connector)
@@ -597,10 +2479,19 @@ class BusServer(Bus):
     receive events submitted by remote clients and submit events which
     will be distributed to remote clients by the :obj:`BusServer`.
 
+    Remote clients which announce their subscriptions (see
+    :obj:`BusClient`) only receive notifications matching the announced
+    scopes.
+
     .. codeauthor:: jmoringe
     """
 
-    def __init__(self, host, port, tcpnodelay, backlog=5):
+    # The maximum number of scope strings for which the subscribed
+    # connections are cached.
+    SUBSCRIPTION_CACHE_SIZE = 1024
+
+    def __init__(self, host, port, tcpnodelay, backlog=5, selector=False,
+                 unixPath=None, **connectionOptions):
         """
         Args:
             host (str):
@@ -613,8 +2504,23 @@ class BusServer(Bus):
                 If True, the socket will be set to TCP_NODELAY.
             backlog (int):
                 The maximum number of queued connection attempts.
+            selector (bool):
+                If True, the listen socket and all connections are
+                serviced by an :obj:`EventLoop` instead of an acceptor
+                thread and one receiver thread per connection.
+            unixPath (str or None):
+                If not ``None``, the bus server accepts clients on a
+                Unix domain socket with this address in addition to
+                the TCP socket.
+            connectionOptions:
+                Passed to the :obj:`BusConnection` objects created for
+                accepted clients.
         """
-        super(BusServer, self).__init__()
+        self.__active = False
+
+        super(BusServer, self).__init__(
+            eventLoop=EventLoop() if selector else None,
+            connectionOptions=connectionOptions)
 
         self.__logger = rsb.util.getLoggerByClass(self.__class__)
 
@@ -622,8 +2528,18 @@ class BusServer(Bus):
         self.__port = port
         self.__tcpnodelay = tcpnodelay
         self.__backlog = backlog
+        self.__unixPath = unixPath
         self.__socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.__acceptorThread = None
+        self.__unixSocket = None
+        self.__acceptorThreads = []
+
+        # Maps connections of clients which announced their
+        # subscriptions to tries of the announced scopes.
+        self.__subscriptions = {}
+        # Maps recently forwarded scope strings to the sets of
+        # connections which did not subscribe to them. Cleared when
+        # subscriptions change.
+        self.__unsubscribed = collections.OrderedDict()
 
         self.__active = False
 
@@ -631,20 +2547,22 @@ class BusServer(Bus):
         if self.__active:
             self.deactivate()
 
-    def acceptClients(self):
-        import sys
+    def acceptClients(self, listenSocket=None):
+        if listenSocket is None:
+            listenSocket = self.__socket
         if sys.platform == 'darwin':
-            self.__socket.settimeout(1.0)
-        while self.__socket:
+            listenSocket.settimeout(1.0)
+        while listenSocket.fileno() != -1:
             self.__logger.info('Waiting for clients')
             try:
-                clientSocket, addr = self.__socket.accept()
+                clientSocket, addr = listenSocket.accept()
                 if sys.platform == 'darwin':
                     clientSocket.settimeout(None)
                 self.__logger.info('Accepted client %s', addr)
-                self.addConnection(BusConnection(socket_=clientSocket,
-                                                 isServer=True,
-                                                 tcpnodelay=self.__tcpnodelay))
+                self.addConnection(self.makeConnection(
+                    socket_=clientSocket,
+                    isServer=True,
+                    tcpnodelay=self.__tcpnodelay))
             except socket.timeout as e:
                 if sys.platform != 'darwin':
                     self.__logger.error(
@@ -655,35 +2573,159 @@ class BusServer(Bus):
                                         exc_info=True)
                 else:
                     self.__logger.info('Acceptor thread terminating')
+                    break
+
+    def __acceptClient(self, listenSocket, mask):
+        try:
+            clientSocket, addr = listenSocket.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        self.__logger.info('Accepted client %s', addr)
+        # The connection writes the handshake without blocking.
+        self.addConnection(self.makeConnection(socket_=clientSocket,
+                                               isServer=True,
+                                               tcpnodelay=self.__tcpnodelay))
 
     # Receiving notifications
 
     def handleIncoming(self, connectionAndNotification):
+        (sendingConnection, notification) = connectionAndNotification
+        if notification.wireSchema == _CONTROL_WIRE_SCHEMA:
+            self.__handleControl(sendingConnection, notification.notification)
+            return
+
         super(BusServer, self).handleIncoming(connectionAndNotification)
 
         # Distribute the notification to all connections except the
         # one that sent it.
-        (sendingConnection, notification) = connectionAndNotification
         with self.lock:
             self._toConnections(notification, exclude=sendingConnection)
 
+    def __handleControl(self, connection, notification):
+        if notification.method == _SUBSCRIPTIONS_METHOD:
+            trie = rsb.eventprocessing.ScopeTrie()
+            for scope in notification.data.split(b'\n'):
+                if scope:
+                    trie[rsb.Scope(scope.decode('ASCII'))] = True
+            self.__logger.info('Subscriptions of %s: %s',
+                               connection, list(trie.items()))
+            with self.lock:
+                if connection in self.connections:
+                    self.__subscriptions[connection] = trie
+                    self.__unsubscribed.clear()
+        elif notification.method == _FEATURES_METHOD:
+            # Handled by connections which support the features.
+            pass
+        else:
+            self.__logger.warn('Ignoring unknown control message %s from %s',
+                               notification.method, connection)
+
+    def getSubscriptions(self, connection):
+        """
+        Returns:
+            rsb.eventprocessing.ScopeTrie or None:
+                The scopes announced by the client of ``connection`` or
+                ``None`` if the client did not announce its
+                subscriptions.
+        """
+        return self.__subscriptions.get(connection)
+
+    def removeConnection(self, connection):
+        with self.lock:
+            if self.__subscriptions.pop(connection, None) is not None:
+                self.__unsubscribed.clear()
+            super(BusServer, self).removeConnection(connection)
+
+    def __unsubscribedConnections(self, scope):
+        """
+        Returns the set of connections which did not subscribe to the
+        scope designated by the scope string ``scope``.
+
+        Like :obj:`rsb.eventprocessing.ScopeDispatcher.matchingSinksForString`,
+        the result is cached for recently forwarded scope strings so
+        that they do not have to be parsed again.
+        """
+        cache = self.__unsubscribed
+        connections = cache.get(scope)
+        if connections is not None:
+            cache.move_to_end(scope)
+            return connections
+
+        parsed = rsb.Scope(scope.decode('ASCII'))
+        connections = frozenset(
+            connection for (connection, trie) in self.__subscriptions.items()
+            if not trie.hasMatch(parsed))
+        cache[scope] = connections
+        if len(cache) > self.SUBSCRIPTION_CACHE_SIZE:
+            cache.popitem(last=False)
+        return connections
+
+    def _selectConnections(self, connections, notification):
+        if not self.__subscriptions:
+            return connections
+
+        unsubscribed = self.__unsubscribedConnections(notification.scope)
+        if not unsubscribed:
+            return connections
+        return [connection for connection in connections
+                if connection not in unsubscribed]
+
     # State management
 
     def activate(self):
-        super(BusServer, self).activate()
-
         if self.__active:
             raise RuntimeError('Trying to activate active BusServer')
 
-        # Bind the socket and start listening
+        # Bind the socket and start listening. This happens before
+        # activating the bus so that nothing has to be cleaned up if
+        # the address is already in use.
         self.__logger.info('Opening listen socket %s:%d',
                            '0.0.0.0', self.__port)
+        # Allow restarting a bus server while connections of its
+        # predecessor are in TIME_WAIT so that clients can reconnect.
+        # Binding still fails while another bus server listens. On
+        # Windows, the option would allow binding a used address.
+        if os.name == 'posix':
+            self.__socket.setsockopt(socket.SOL_SOCKET,
+                                     socket.SO_REUSEADDR, 1)
         self.__socket.bind(('0.0.0.0', self.__port))
         self.__socket.listen(self.__backlog)
+        listenSockets = [self.__socket]
+
+        if self.__unixPath is not None:
+            self.__logger.info('Opening Unix domain listen socket %r',
+                               self.__unixPath)
+            # Owning the TCP port makes this the only bus server for
+            # the path, so a left-over socket file can be removed.
+            if not self.__unixPath.startswith('\0') \
+               and os.path.exists(self.__unixPath):
+                os.unlink(self.__unixPath)
+            self.__unixSocket = socket.socket(socket.AF_UNIX,
+                                              socket.SOCK_STREAM)
+            try:
+                self.__unixSocket.bind(self.__unixPath)
+                self.__unixSocket.listen(self.__backlog)
+            except BaseException:
+                self.__unixSocket.close()
+                self.__unixSocket = None
+                self.__socket.close()
+                raise
+            listenSockets.append(self.__unixSocket)
+
+        super(BusServer, self).activate()
 
-        self.__logger.info('Starting acceptor thread')
-        self.__acceptorThread = threading.Thread(target=self.acceptClients)
-        self.__acceptorThread.start()
+        for listenSocket in listenSockets:
+            if self.eventLoop is not None:
+                listenSocket.setblocking(False)
+                self.eventLoop.register(
+                    listenSocket, selectors.EVENT_READ,
+                    functools.partial(self.__acceptClient, listenSocket))
+            else:
+                self.__logger.info('Starting acceptor thread')
+                thread = threading.Thread(target=self.acceptClients,
+                                          args=(listenSocket,))
+                thread.start()
+                self.__acceptorThreads.append(thread)
 
         self.__active = True
 
@@ -693,25 +2735,39 @@ class BusServer(Bus):
 
         self.__active = False
 
-        # If necessary, close the listening socket. This causes an
-        # exception in the acceptor thread.
-        self.__logger.info('Closing listen socket')
-        if self.__socket is not None:
+        # If necessary, close the listening sockets. This causes an
+        # exception in the acceptor threads.
+        self.__logger.info('Closing listen sockets')
+        for listenSocket in [self.__socket, self.__unixSocket]:
+            if listenSocket is None:
+                continue
+            if self.eventLoop is not None:
+                self.eventLoop.unregister(listenSocket, close=True)
+                continue
             try:
-                self.__socket.shutdown(socket.SHUT_RDWR)
+                listenSocket.shutdown(socket.SHUT_RDWR)
             except Exception as e:
                 self.__logger.warn('Failed to shutdown listen socket: %s', e)
             try:
-                self.__socket.close()
-            except:
+                listenSocket.close()
+            except Exception as e:
                 self.__logger.warn('Failed to close listen socket: %s', e)
-            self.__socket = None
+        self.__socket = None
+        if self.__unixSocket is not None:
+            self.__unixSocket = None
+            if not self.__unixPath.startswith('\0'):
+                try:
+                    os.unlink(self.__unixPath)
+                except Exception as e:
+                    self.__logger.warn('Failed to remove %r: %s',
+                                       self.__unixPath, e)
 
-        # The acceptor thread should encounter an exception and exit
+        # The acceptor threads should encounter an exception and exit
         # eventually. We wait for that.
-        self.__logger.info('Waiting for acceptor thread')
-        if self.__acceptorThread is not None:
-            self.__acceptorThread.join()
+        self.__logger.info('Waiting for acceptor threads')
+        for thread in self.__acceptorThreads:
+            thread.join()
+        self.__acceptorThreads = []
 
         super(BusServer, self).deactivate()
 
@@ -766,6 +2822,75 @@ class Connector(rsb.transport.Connector,
             raise TypeError('Server option has to be '
                             '"1", "true", "0", "false" or "auto", not "%s"'
                             % serverString)
+        ioString = options.get('io', 'threads')
+        if ioString not in ['threads', 'selector']:
+            raise TypeError('IO option has to be '
+                            '"threads" or "selector", not "%s"' % ioString)
+        queueCapacity = int(options.get('queuecapacity', '1000'))
+        # Without an explicit queue policy, the policy depends on the
+        # requested reliability, see setQualityOfServiceSpec.
+        self.__explicitQueuePolicy = 'queuepolicy' in options
+        policyString = options.get('queuepolicy', 'block')
+        policies = {
+            'block': rsb.util.BoundedQueue.OverflowPolicy.BLOCK,
+            'drop-oldest': rsb.util.BoundedQueue.OverflowPolicy.DROP_OLDEST,
+            'drop-newest': rsb.util.BoundedQueue.OverflowPolicy.DROP_NEWEST,
+            'disconnect': rsb.util.BoundedQueue.OverflowPolicy.FAIL
+        }
+        if policyString not in policies:
+            raise TypeError('Queue policy option has to be '
+                            '"block", "drop-oldest", "drop-newest" or '
+                            '"disconnect", not "%s"' % policyString)
+        self.__clientOptions = {
+            'subscriptions': options.get('subscriptions', '0') in ['1',
+                                                                   'true'],
+            'reconnect': options.get('reconnect', '0') in ['1', 'true'],
+            'reconnectDelay':
+                int(options.get('reconnectdelay', '100')) / 1000.0,
+            'reconnectMaxDelay':
+                int(options.get('reconnectmaxdelay', '30000')) / 1000.0,
+            'replayBytes': int(options.get('replaybytes',
+                                           str(1024 * 1024)))
+        }
+        compressionLevel = int(options.get('compressionlevel', '1'))
+        if not -1 <= compressionLevel <= 9:
+            raise TypeError('Compression level option has to be between '
+                            '-1 and 9, not %d' % compressionLevel)
+        maxFrameSize = int(options.get('maxframesize', '0'))
+        if options.get('unix', '0') in ['1', 'true']:
+            unixPath = options.get('unixpath',
+                                   defaultUnixSocketPath(self.__port))
+        else:
+            unixPath = None
+        self.__busOptions = {
+            'unixPath': unixPath,
+            'selector': ioString == 'selector',
+            'queueCapacity': queueCapacity if queueCapacity > 0 else None,
+            'queuePolicy': policies[policyString],
+            'coalesce': options.get('coalesce', '0') in ['1', 'true'],
+            'coalesceBytes': int(options.get('coalescebytes', '65536')),
+            'coalesceWindow':
+                int(options.get('coalescewindow', '200')) / 1000000.0,
+            'compression': options.get('compression', '0') in ['1', 'true'],
+            'compressionThreshold':
+                int(options.get('compressionthreshold', '1024')),
+            'compressionLevel': compressionLevel,
+            'maxFrameSize': maxFrameSize if maxFrameSize > 0 else None,
+            'reassemblyBytes': int(options.get('reassemblybytes',
+                                               str(256 * 1024 * 1024))),
+            'reassemblyTimeout':
+                float(options.get('reassemblytimeout', '30'))
+        }
+        if ioString == 'selector':
+            unsupported = [
+                option for (option, name)
+                in [('coalesce', 'coalesce'),
+                    ('compression', 'compression'),
+                    ('maxframesize', 'maxFrameSize')]
+                if self.__busOptions[name]]
+            if unsupported:
+                raise TypeError('Options %s are not supported with '
+                                'io "selector"' % ', '.join(unsupported))
 
     def __del__(self):
         if self.__active:
@@ -774,24 +2899,31 @@ class Connector(rsb.transport.Connector,
     def __getBus(self, host, port, tcpnodelay, server):
         self.__logger.info('Requested server role: %s', server)
 
+        busOptions = self.__busOptions
+        clientOptions = dict(busOptions, **self.__clientOptions)
+
         if server is True:
             self.__logger.info('Getting bus server %s:%d', host, port)
-            self.__bus = getBusServerFor(host, port, tcpnodelay, self)
+            self.__bus = getBusServerFor(host, port, tcpnodelay, self,
+                                         **busOptions)
         elif server is False:
             self.__logger.info('Getting bus client %s:%d', host, port)
-            self.__bus = getBusClientFor(host, port, tcpnodelay, self)
+            self.__bus = getBusClientFor(host, port, tcpnodelay, self,
+                                         **clientOptions)
         elif server == 'auto':
             try:
                 self.__logger.info(
                     'Trying to get bus server %s:%d (in server = auto mode)',
                     host, port)
-                self.__bus = getBusServerFor(host, port, tcpnodelay, self)
+                self.__bus = getBusServerFor(host, port, tcpnodelay, self,
+                                             **busOptions)
             except Exception as e:
                 self.__logger.info('Failed to get bus server: %s', e)
                 self.__logger.info(
                     'Trying to get bus client %s:%d (in server = auto mode)',
                     host, port)
-                self.__bus = getBusClientFor(host, port, tcpnodelay, self)
+                self.__bus = getBusClientFor(host, port, tcpnodelay, self,
+                                             **clientOptions)
         else:
             raise TypeError(
                 'Server argument has to be True, False or "auto", not "%s"'
@@ -815,6 +2947,14 @@ class Connector(rsb.transport.Connector,
                                    self.__tcpnodelay,
                                    self.__server)
 
+        policy = self.__busOptions['queuePolicy']
+        busPolicy = self.__bus.connectionOptions.get(
+            'queuePolicy', rsb.util.BoundedQueue.OverflowPolicy.BLOCK)
+        if policy != busPolicy:
+            self.__logger.warn('Bus %s uses queue policy %s; ignoring '
+                               'queue policy %s of this connector',
+                               self.__bus, busPolicy, policy)
+
         self.__active = True
 
     def deactivate(self):
@@ -828,7 +2968,47 @@ class Connector(rsb.transport.Connector,
         removeConnector(self.bus, self)
 
     def setQualityOfServiceSpec(self, qos):
-        pass
+        """
+        Unless the ``queuepolicy`` option has been specified, makes the
+        outbound queues of the bus connections drop the oldest frames
+        instead of blocking when ``qos`` requests unreliable delivery.
+
+        Since bus connections are shared, this only has an effect if
+        the connector creates the bus, i.e. if it is the first
+        connector for the bus in this process. Otherwise, the policy
+        of the bus is used and a warning is logged. For the same
+        reason, dropped frames can only be counted per bus, see
+        :obj:`OutConnector.getDroppedEvents`.
+        """
+        if self.__explicitQueuePolicy:
+            return
+        if qos.getReliability() == \
+                rsb.QualityOfServiceSpec.Reliability.UNRELIABLE:
+            policy = rsb.util.BoundedQueue.OverflowPolicy.DROP_OLDEST
+        else:
+            policy = rsb.util.BoundedQueue.OverflowPolicy.BLOCK
+        self.__busOptions['queuePolicy'] = policy
+
+    def notificationToEvent(self, notification):
+        """
+        Converts ``notification`` into an event using the converter
+        for its wire-schema.
+
+        Args:
+            notification (Notification):
+                The notification to convert.
+
+        Returns:
+            rsb.Event:
+                The event.
+        """
+        wireSchema = notification.wire_schema.decode('ASCII')
+        converter = self.getConverterForWireSchema(wireSchema)
+        return conversion.notificationToEvent(
+            notification,
+            wireData=bytes(notification.data),
+            wireSchema=wireSchema,
+            converter=converter)
 
     def getTransportURL(self):
         query = '?tcpnodelay=' + ('1' if self.__tcpnodelay else '0')
@@ -852,27 +3032,167 @@ class InPushConnector(Connector,
 
     def __init__(self, **kwargs):
         self.__action = None
+        self.__filter = conversion.NotificationFilter()
 
         super(InPushConnector, self).__init__(**kwargs)
 
     def filterNotify(self, theFilter, action):
-        pass
+        self.__filter.filterNotify(theFilter, action)
 
     def setObserverAction(self, action):
         self.__action = action
 
+    def handleFrame(self, frame):
+        if self.__action is None:
+            return
+
+        self.handle(frame.notification)
+
     def handle(self, notification):
         if self.__action is None:
             return
 
-        converter = self.getConverterForWireSchema(
-            notification.wire_schema.decode('ASCII'))
-        event = conversion.notificationToEvent(
-            notification,
-            wireData=bytes(notification.data),
-            wireSchema=notification.wire_schema,
-            converter=converter)
-        self.__action(event)
+        # Reject notifications before decoding their payloads.
+        if not self.__filter.match(notification):
+            return
+
+        self.__action(self.notificationToEvent(notification))
+
+
+class InPullConnector(Connector,
+                      rsb.transport.InPullConnector):
+    """
+    Instances of this class receive events from a bus (represented by
+    a :obj:`Bus` object) that is accessed via a socket connection.
+
+    The receiving of events is done in pull mode: the :obj:`Bus`
+    pushes matching notifications into a buffer of the connector from
+    which :obj:`raiseEvent` retrieves them in the thread of the
+    caller. No additional dispatch thread is used.
+
+    Depending on the ``pulllazy`` option, notifications are buffered
+    undecoded and only parsed and converted when they are retrieved,
+    or they are converted into events when they arrive. Unless
+    configured otherwise, the buffer is unbounded. The
+    ``pullcapacity`` option bounds the buffer (1000 if only
+    ``pullpolicy`` is specified) and the ``pullpolicy`` option
+    controls what happens when it is full. Without a ``pullpolicy``
+    option, a bounded buffer blocks the receiving connection, but
+    discards the oldest notifications for
+    :obj:`rsb.QualityOfServiceSpec.Reliability.UNRELIABLE` delivery,
+    in which case it is bounded even without a ``pullcapacity``
+    option.
+
+    .. codeauthor:: jmoringe
+    """
+
+    def __init__(self, options=None, **kwargs):
+        super(InPullConnector, self).__init__(options=options, **kwargs)
+
+        if options is None:
+            options = {}
+
+        capacity = int(options.get('pullcapacity', '1000'))
+        self.__capacity = capacity if capacity > 0 else None
+        self.__explicitPolicy = 'pullpolicy' in options
+        self.__bounded = 'pullcapacity' in options or self.__explicitPolicy
+        policyString = options.get('pullpolicy', 'block')
+        policies = {
+            'block': rsb.util.BoundedQueue.OverflowPolicy.BLOCK,
+            'drop-oldest': rsb.util.BoundedQueue.OverflowPolicy.DROP_OLDEST,
+            'drop-newest': rsb.util.BoundedQueue.OverflowPolicy.DROP_NEWEST
+        }
+        if policyString not in policies:
+            raise TypeError('Pull policy option has to be '
+                            '"block", "drop-oldest" or "drop-newest", '
+                            'not "%s"' % policyString)
+        self.__lazy = options.get('pulllazy', '1') in ['1', 'true']
+        self.__queue = rsb.util.BoundedQueue(
+            self.__capacity if self.__bounded else None,
+            policies[policyString])
+
+    def setQualityOfServiceSpec(self, qos):
+        """
+        In addition to the outbound queues of the bus, unless the
+        ``pullpolicy`` option has been specified, makes the buffer
+        bounded and discard the oldest notifications when ``qos``
+        requests unreliable delivery.
+        """
+        super(InPullConnector, self).setQualityOfServiceSpec(qos)
+
+        if self.__explicitPolicy:
+            return
+        if qos.getReliability() == \
+                rsb.QualityOfServiceSpec.Reliability.UNRELIABLE:
+            capacity = self.__capacity
+            policy = rsb.util.BoundedQueue.OverflowPolicy.DROP_OLDEST
+        else:
+            capacity = self.__capacity if self.__bounded else None
+            policy = rsb.util.BoundedQueue.OverflowPolicy.BLOCK
+        queue = self.__queue
+        if (capacity, policy) != (queue.capacity, queue.policy):
+            # Only called before activation, so the buffer is empty.
+            self.__queue = rsb.util.BoundedQueue(capacity, policy)
+
+    def getQueue(self):
+        """
+        Returns:
+            rsb.util.BoundedQueue:
+                The buffer of received notifications or events. Its
+                counters can be used as metrics.
+        """
+        return self.__queue
+
+    queue = property(getQueue)
+
+    def getDroppedEvents(self):
+        return self.__queue.dropped
+
+    def filterNotify(self, theFilter, action):
+        pass
+
+    def handleFrame(self, frame):
+        # Received frames share the receive buffer of their
+        # connection and have to be copied when buffered undecoded.
+        if self.__lazy:
+            item = (frame.detach(), time.time())
+        else:
+            item = self.notificationToEvent(frame.notification)
+        try:
+            self.__queue.put(item)
+        except rsb.util.InterruptedError:
+            pass
+
+    def handle(self, notification):
+        self.handleFrame(NotificationFrame(notification=notification))
+
+    def raiseEvent(self, block):
+        try:
+            if block:
+                item = self.__queue.get()
+            else:
+                items = self.__queue.getAll(maxItems=1, timeout=0)
+                if not items:
+                    return None
+                item = items[0]
+        except rsb.util.InterruptedError:
+            return None
+
+        if not self.__lazy:
+            return item
+
+        frame, receiveTime = item
+        event = self.notificationToEvent(frame.notification)
+        event.metaData.setReceiveTime(receiveTime)
+        return event
+
+    def deactivate(self):
+        # Wake up blocked readers as well as a bus thread blocked on
+        # the full buffer which would otherwise prevent removing this
+        # connector from the bus.
+        self.__queue.close()
+
+        super(InPullConnector, self).deactivate()
 
 
 class OutConnector(Connector,
@@ -887,6 +3207,21 @@ class OutConnector(Connector,
     def __init__(self, **kwargs):
         super(OutConnector, self).__init__(**kwargs)
 
+    def getDroppedEvents(self):
+        """
+        Returns the number of frames which the outbound queues of the
+        connections of the bus discarded.
+
+        The connections are shared by all connectors of the bus and
+        also carry notifications of other participants as well as
+        forwarded notifications. The result is therefore not specific
+        to this connector.
+        """
+        bus = self.bus
+        if bus is None:
+            return 0
+        return bus.droppedFrames
+
     def handle(self, event):
         # Create a notification fragment for the event and send it
         # over the bus.
@@ -917,7 +3252,7 @@ class TransportFactory(rsb.transport.TransportFactory):
         return InPushConnector(converters=converters, options=options)
 
     def createInPullConnector(self, converters, options):
-        raise NotImplementedError()
+        return InPullConnector(converters=converters, options=options)
 
     def createOutConnector(self, converters, options):
         return OutConnector(converters=converters, options=options)
@@ -29,8 +29,9 @@ Various helper classes and methods.
 """
 
 from threading import Lock, Condition, Thread
-from queue import Queue
+import collections
 import logging
+import time
 
 
 class Enum(object):
@@ -126,6 +127,530 @@ class InterruptedError(RuntimeError):
     pass
 
 
+class QueueFullError(RuntimeError):
+    """
+    Indicates that an item could not be added to a full
+    :obj:`BoundedQueue`.
+
+    .. codeauthor:: jmoringe
+    """
+    pass
+
+
+class BoundedQueue(object):
+    """
+    A thread-safe FIFO queue with an optional capacity and a policy
+    for handling additions to the full queue.
+
+    The :obj:`OverflowPolicy` of a queue determines what happens when
+    an item is added to the full queue:
+
+    BLOCK
+      Wait until space becomes available.
+    DROP_OLDEST
+      Discard the oldest queued item to make room for the new one.
+    DROP_NEWEST
+      Discard the new item.
+    FAIL
+      Raise :obj:`QueueFullError`.
+
+    If a key function is supplied, the queue keeps only the latest
+    item for each key: adding an item replaces a queued item with the
+    same key in its position and counts the replaced item as dropped.
+
+    In addition to the queued items, instances maintain counters
+    describing the use of the queue, which can be used as metrics.
+
+    .. codeauthor:: jmoringe
+    """
+
+    OverflowPolicy = Enum("OverflowPolicy",
+                          ["BLOCK", "DROP_OLDEST", "DROP_NEWEST", "FAIL"])
+
+    def __init__(self, capacity=None, policy=OverflowPolicy.BLOCK,
+                 keyFunction=None):
+        """
+        Args:
+            capacity (int or None):
+                The maximum number of queued items or ``None`` for an
+                unbounded queue.
+            policy:
+                A value of :obj:`OverflowPolicy` which determines what
+                happens if an item is added to the full queue.
+            keyFunction (callable or None):
+                If not ``None``, called with each added item to obtain
+                a hashable key. Only the latest item for each key is
+                kept.
+        """
+        if capacity is not None and capacity < 1:
+            raise ValueError('Capacity has to be positive, not %s' % capacity)
+
+        self.__capacity = capacity
+        self.__policy = policy
+        self.__keyFunction = keyFunction
+
+        # With a key function, the queue contains [item, key] cells
+        # which are indexed by key.
+        self.__items = collections.deque()
+        self.__cells = {}
+        self.__condition = Condition()
+        self.__closed = False
+
+        self.__enqueued = 0
+        self.__dropped = 0
+        self.__highWaterMark = 0
+
+    def getCapacity(self):
+        return self.__capacity
+
+    capacity = property(getCapacity)
+
+    def getPolicy(self):
+        return self.__policy
+
+    policy = property(getPolicy)
+
+    def getDepth(self):
+        """
+        Returns:
+            int:
+                The number of currently queued items.
+        """
+        return len(self.__items)
+
+    depth = property(getDepth)
+
+    def getHighWaterMark(self):
+        """
+        Returns:
+            int:
+                The maximum number of items which have been queued at
+                the same time.
+        """
+        return self.__highWaterMark
+
+    highWaterMark = property(getHighWaterMark)
+
+    def getEnqueued(self):
+        """
+        Returns:
+            int:
+                The number of items which have been added to the queue.
+        """
+        return self.__enqueued
+
+    enqueued = property(getEnqueued)
+
+    def getDropped(self):
+        """
+        Returns:
+            int:
+                The number of items which have been discarded due to
+                the overflow policy.
+        """
+        return self.__dropped
+
+    dropped = property(getDropped)
+
+    def isClosed(self):
+        return self.__closed
+
+    def __len__(self):
+        return len(self.__items)
+
+    def __isFull(self):
+        return (self.__capacity is not None
+                and len(self.__items) >= self.__capacity)
+
+    def __popOldest(self):
+        item = self.__items.popleft()
+        if self.__keyFunction is None:
+            return item
+        del self.__cells[item[1]]
+        return item[0]
+
+    def put(self, item, timeout=None):
+        """
+        Adds ``item`` to the queue, applying the overflow policy if the
+        queue is full.
+
+        Args:
+            item:
+                The item to add.
+            timeout (float or None):
+                For the ``BLOCK`` policy, the maximum number of seconds
+                to wait for space to become available. ``None`` means
+                to wait indefinitely.
+
+        Returns:
+            bool:
+                ``True`` if ``item`` has been added, ``False`` if it
+                has been discarded.
+
+        Raises:
+            QueueFullError:
+                If the queue is full and the policy is ``FAIL`` or the
+                timeout expired.
+            InterruptedError:
+                If the queue has been closed.
+        """
+        with self.__condition:
+            if self.__closed:
+                raise InterruptedError('Queue has been closed')
+
+            if self.__keyFunction is not None:
+                key = self.__keyFunction(item)
+                cell = self.__cells.get(key)
+                if cell is not None:
+                    cell[0] = item
+                    self.__enqueued += 1
+                    self.__dropped += 1
+                    return True
+
+            if self.__isFull():
+                if self.__policy == self.OverflowPolicy.BLOCK:
+                    end = None if timeout is None else time.time() + timeout
+                    while self.__isFull() and not self.__closed:
+                        if end is None:
+                            self.__condition.wait()
+                        else:
+                            remaining = end - time.time()
+                            if remaining <= 0:
+                                raise QueueFullError(
+                                    'Timeout while waiting for space in '
+                                    'queue')
+                            self.__condition.wait(remaining)
+                    if self.__closed:
+                        raise InterruptedError('Queue has been closed')
+                    # Another item with the same key may have been
+                    # added while waiting.
+                    if self.__keyFunction is not None \
+                            and key in self.__cells:
+                        self.__cells[key][0] = item
+                        self.__enqueued += 1
+                        self.__dropped += 1
+                        return True
+                elif self.__policy == self.OverflowPolicy.DROP_OLDEST:
+                    self.__popOldest()
+                    self.__dropped += 1
+                elif self.__policy == self.OverflowPolicy.DROP_NEWEST:
+                    self.__dropped += 1
+                    return False
+                else:
+                    raise QueueFullError('Queue capacity %d exceeded'
+                                         % self.__capacity)
+
+            if self.__keyFunction is None:
+                self.__items.append(item)
+            else:
+                cell = [item, key]
+                self.__cells[key] = cell
+                self.__items.append(cell)
+            self.__enqueued += 1
+            self.__highWaterMark = max(self.__highWaterMark,
+                                       len(self.__items))
+            self.__condition.notifyAll()
+            return True
+
+    def get(self, timeout=None):
+        """
+        Removes and returns the oldest item, waiting for one if the
+        queue is empty.
+
+        Args:
+            timeout (float or None):
+                The maximum number of seconds to wait. ``None`` means to
+                wait indefinitely.
+
+        Returns:
+            The oldest item.
+
+        Raises:
+            InterruptedError:
+                If the queue is closed and empty or the timeout expired.
+        """
+        items = self.getAll(maxItems=1, timeout=timeout)
+        if not items:
+            raise InterruptedError('Queue is closed or timeout expired')
+        return items[0]
+
+    def getAll(self, maxItems=None, timeout=None):
+        """
+        Removes and returns up to ``maxItems`` of the oldest items,
+        waiting for at least one item if the queue is empty.
+
+        Args:
+            maxItems (int or None):
+                The maximum number of items to return or ``None`` to
+                return all queued items.
+            timeout (float or None):
+                The maximum number of seconds to wait. ``None`` means to
+                wait indefinitely, ``0`` not to wait at all.
+
+        Returns:
+            list:
+                The removed items in queue order. The list is empty if
+                the queue is closed and empty or the timeout expired.
+        """
+        with self.__condition:
+            end = None if timeout is None else time.time() + timeout
+            while not self.__items and not self.__closed:
+                if end is None:
+                    self.__condition.wait()
+                else:
+                    remaining = end - time.time()
+                    if remaining <= 0:
+                        break
+                    self.__condition.wait(remaining)
+
+            if self.__keyFunction is not None:
+                count = len(self.__items) if maxItems is None \
+                    else min(maxItems, len(self.__items))
+                items = [self.__popOldest() for _ in range(count)]
+            elif maxItems is None or maxItems >= len(self.__items):
+                items = list(self.__items)
+                self.__items.clear()
+            else:
+                items = [self.__items.popleft() for _ in range(maxItems)]
+            if items:
+                self.__condition.notifyAll()
+            return items
+
+    def close(self, discard=False):
+        """
+        Closes the queue. Subsequent :obj:`put` calls fail. Already
+        queued items can still be retrieved unless ``discard`` is
+        ``True``.
+
+        Args:
+            discard (bool):
+                If ``True``, remove all queued items.
+        """
+        with self.__condition:
+            self.__closed = True
+            if discard:
+                self.__items.clear()
+                self.__cells.clear()
+            self.__condition.notifyAll()
+
+
+class BoundedExecutor(object):
+    """
+    Executes submitted callables in a bounded number of reusable worker
+    threads.
+
+    Worker threads are started on demand, up to ``maxWorkers``, and
+    terminate after being idle for ``idleTimeout`` seconds. Submitted
+    callables which cannot be started immediately are queued, up to
+    ``queueCapacity`` of them. Submitting to the full queue blocks or
+    fails, depending on the timeout passed to :obj:`submit`.
+
+    Instances maintain counters for active, queued, completed and
+    rejected work, which can be used as metrics.
+
+    .. codeauthor:: jmoringe
+    """
+
+    def __init__(self, maxWorkers=32, queueCapacity=None, idleTimeout=5.0,
+                 name='ExecutorThread'):
+        """
+        Args:
+            maxWorkers (int >= 1):
+                The maximum number of concurrently running callables.
+            queueCapacity (int or None):
+                The maximum number of queued callables or ``None`` for
+                an unbounded queue.
+            idleTimeout (float):
+                The number of seconds after which an idle worker thread
+                terminates.
+            name (str):
+                The name of the worker threads.
+        """
+        if maxWorkers < 1:
+            raise ValueError('Maximum number of workers must be at least '
+                             '1, %d was given.' % maxWorkers)
+        if queueCapacity is not None and queueCapacity < 1:
+            raise ValueError('Capacity has to be positive, not %s'
+                             % queueCapacity)
+
+        self.__logger = getLoggerByClass(self.__class__)
+
+        self.__maxWorkers = maxWorkers
+        self.__queueCapacity = queueCapacity
+        self.__idleTimeout = idleTimeout
+        self.__name = name
+
+        self.__lock = Lock()
+        self.__workAvailable = Condition(self.__lock)
+        self.__spaceAvailable = Condition(self.__lock)
+        self.__queue = collections.deque()
+        self.__shutdown = False
+
+        self.__workers = 0
+        self.__idle = 0
+        self.__active = 0
+        self.__completed = 0
+        self.__rejected = 0
+
+    def getMaxWorkers(self):
+        return self.__maxWorkers
+
+    maxWorkers = property(getMaxWorkers)
+
+    def getQueueCapacity(self):
+        return self.__queueCapacity
+
+    queueCapacity = property(getQueueCapacity)
+
+    def getWorkers(self):
+        """
+        Returns:
+            int:
+                The number of running worker threads.
+        """
+        return self.__workers
+
+    workers = property(getWorkers)
+
+    def getActive(self):
+        """
+        Returns:
+            int:
+                The number of callables which are currently running.
+        """
+        return self.__active
+
+    active = property(getActive)
+
+    def getQueued(self):
+        """
+        Returns:
+            int:
+                The number of callables which wait for a worker.
+        """
+        return len(self.__queue)
+
+    queued = property(getQueued)
+
+    def getCompleted(self):
+        """
+        Returns:
+            int:
+                The number of callables which have finished.
+        """
+        return self.__completed
+
+    completed = property(getCompleted)
+
+    def getRejected(self):
+        """
+        Returns:
+            int:
+                The number of callables which could not be queued
+                because the queue was full.
+        """
+        return self.__rejected
+
+    rejected = property(getRejected)
+
+    def __isFull(self):
+        return (self.__queueCapacity is not None
+                and len(self.__queue) >= self.__queueCapacity)
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Arranges for ``function`` to be called with ``args`` in a
+        worker thread.
+
+        Args:
+            function (callable):
+                The callable to execute.
+            args:
+                Positional arguments for ``function``.
+            timeout (float or None):
+                Keyword-only. The maximum number of seconds to wait for
+                space in the full queue. ``None`` means to wait
+                indefinitely, ``0`` not to wait at all.
+
+        Raises:
+            QueueFullError:
+                If the queue is still full after ``timeout``.
+            InterruptedError:
+                If the executor has been shut down.
+        """
+        timeout = kwargs.pop('timeout', None)
+        if kwargs:
+            raise TypeError('Unexpected keyword arguments %s' % kwargs)
+
+        with self.__lock:
+            end = None if timeout is None else time.time() + timeout
+            while self.__isFull() and not self.__shutdown:
+                remaining = None if end is None else end - time.time()
+                if remaining is not None and remaining <= 0:
+                    self.__rejected += 1
+                    raise QueueFullError('Executor queue capacity %d '
+                                         'exceeded' % self.__queueCapacity)
+                self.__spaceAvailable.wait(remaining)
+            if self.__shutdown:
+                raise InterruptedError('Executor has been shut down')
+
+            self.__queue.append((function, args))
+            # Each idle worker takes one queued callable. Start another
+            # worker if there are not enough idle ones.
+            if len(self.__queue) > self.__idle \
+                    and self.__workers < self.__maxWorkers:
+                self.__workers += 1
+                worker = Thread(target=self.__work, name=self.__name)
+                worker.daemon = True
+                worker.start()
+            else:
+                self.__workAvailable.notify()
+
+    def __nextWork(self):
+        with self.__lock:
+            while not self.__queue:
+                if self.__shutdown:
+                    self.__workers -= 1
+                    return None
+                self.__idle += 1
+                notified = self.__workAvailable.wait(self.__idleTimeout)
+                self.__idle -= 1
+                if not notified and not self.__queue:
+                    self.__workers -= 1
+                    return None
+
+            work = self.__queue.popleft()
+            self.__active += 1
+            self.__spaceAvailable.notify()
+            return work
+
+    def __work(self):
+        while True:
+            work = self.__nextWork()
+            if work is None:
+                return
+
+            function, args = work
+            try:
+                function(*args)
+            except Exception:
+                self.__logger.exception('Failed to execute %s', function)
+            finally:
+                with self.__lock:
+                    self.__active -= 1
+                    self.__completed += 1
+
+    def shutdown(self):
+        """
+        Rejects further submissions. Already queued callables are still
+        executed, after which the worker threads terminate.
+        """
+        with self.__lock:
+            self.__shutdown = True
+            self.__workAvailable.notifyAll()
+            self.__spaceAvailable.notifyAll()
+
+
 class OrderedQueueDispatcherPool(object):
     """
     A thread pool that dispatches messages to a list of receivers. The number
@@ -137,6 +662,14 @@ class OrderedQueueDispatcherPool(object):
     The pool can be stopped and restarted at any time during the processing but
     these calls must be single-threaded.
 
+    Receivers which have pending messages and are not being processed by
+    a worker are kept in a FIFO ready queue. An idle worker takes the
+    first receiver from the ready queue and delivers up to
+    ``batchSize`` of its messages before the receiver is put back at the
+    end of the ready queue if further messages are pending. Since a
+    receiver is never in the ready queue while a worker processes it,
+    its messages are delivered sequentially and in order.
+
     Assumptions:
      - same subscriptions for multiple receivers unlikely, hence filtering done
        per receiver thread
@@ -146,18 +679,22 @@ class OrderedQueueDispatcherPool(object):
 
     class __Receiver(object):
 
-        def __init__(self, receiver):
+        def __init__(self, receiver, queue):
             self.receiver = receiver
-            self.queue = Queue()
+            self.queue = queue
             self.processing = False
-            self.processingMutex = Lock()
+            self.ready = False
+            self.registered = True
             self.processingCondition = Condition()
 
     def __trueFilter(self, receiver, message):
         # pylint: disable=unused-argument,no-self-use
         return True
 
-    def __init__(self, threadPoolSize, delFunc, filterFunc=None):
+    def __init__(self, threadPoolSize, delFunc, filterFunc=None,
+                 queueCapacity=None,
+                 queuePolicy=BoundedQueue.OverflowPolicy.DROP_OLDEST,
+                 batchSize=16):
         """
         Constructs a new pool.
 
@@ -176,6 +713,17 @@ class OrderedQueueDispatcherPool(object):
                 First is the receiver of a message, second is the message to
                 filter. Must return a bool, true means to deliver the message,
                 false rejects it.
+            queueCapacity (int or None):
+                The maximum number of pending messages per receiver or
+                ``None`` for unbounded queues.
+            queuePolicy:
+                Either ``DROP_OLDEST`` or ``DROP_NEWEST`` of
+                :obj:`BoundedQueue.OverflowPolicy`. Determines which
+                message is discarded when a message is pushed for a
+                receiver with a full queue.
+            batchSize (int >= 1):
+                The maximum number of messages a worker delivers to a
+                receiver before turning to the next receiver.
         """
 
         self.__logger = getLoggerByClass(self.__class__)
@@ -193,19 +741,93 @@ class OrderedQueueDispatcherPool(object):
 
         self.__condition = Condition()
         self.__receivers = []
-
-        self.__jobsAvailable = False
+        # Receivers with pending messages which are not being
+        # processed.
+        self.__ready = collections.deque()
 
         self.__started = False
         self.__interrupted = False
 
         self.__threadPool = []
 
-        self.__currentPosition = 0
+        if batchSize < 1:
+            raise ValueError("Batch size must be at least 1, "
+                             "%d was given." % batchSize)
+        self.__batchSize = int(batchSize)
+
+        self.__checkQueuePolicy(queuePolicy)
+        self.__queueCapacity = queueCapacity
+        self.__queuePolicy = queuePolicy
+        # Messages dropped from the queues of receivers which are no
+        # longer registered.
+        self.__dropped = 0
 
     def __del__(self):
         self.stop()
 
+    def __checkQueuePolicy(self, policy):
+        # Pushing blocks while holding the lock of the pool. Therefore
+        # only policies which never block are allowed.
+        if policy not in [BoundedQueue.OverflowPolicy.DROP_OLDEST,
+                          BoundedQueue.OverflowPolicy.DROP_NEWEST]:
+            raise ValueError('Queue policy has to be DROP_OLDEST or '
+                             'DROP_NEWEST, not %s' % policy)
+
+    def __makeQueue(self):
+        return BoundedQueue(self.__queueCapacity, self.__queuePolicy)
+
+    def getQueueCapacity(self):
+        return self.__queueCapacity
+
+    queueCapacity = property(getQueueCapacity)
+
+    def getQueuePolicy(self):
+        return self.__queuePolicy
+
+    queuePolicy = property(getQueuePolicy)
+
+    def setQueueLimits(self, capacity,
+                       policy=BoundedQueue.OverflowPolicy.DROP_OLDEST):
+        """
+        Changes the capacity and overflow policy of the message queues
+        of all current and future receivers. Messages which are pending
+        for a receiver are kept, subject to the new limits.
+
+        Args:
+            capacity (int or None):
+                The maximum number of pending messages per receiver or
+                ``None`` for unbounded queues.
+            policy:
+                Either ``DROP_OLDEST`` or ``DROP_NEWEST`` of
+                :obj:`BoundedQueue.OverflowPolicy`.
+        """
+        self.__checkQueuePolicy(policy)
+
+        with self.__condition:
+            self.__queueCapacity = capacity
+            self.__queuePolicy = policy
+            for receiver in self.__receivers:
+                old = receiver.queue
+                receiver.queue = self.__makeQueue()
+                for message in old.getAll(timeout=0):
+                    receiver.queue.put(message)
+                # Keep messages dropped from the old queue as well as
+                # messages which did not fit into the new one.
+                self.__dropped += old.dropped
+
+    def getDropped(self):
+        """
+        Returns:
+            int:
+                The number of messages which have been discarded
+                because the queue of a receiver was full.
+        """
+        with self.__condition:
+            return self.__dropped + sum(r.queue.dropped
+                                        for r in self.__receivers)
+
+    dropped = property(getDropped)
+
     def registerReceiver(self, receiver):
         """
         Registers a new receiver at the pool. Multiple registrations of the
@@ -220,7 +842,8 @@ class OrderedQueueDispatcherPool(object):
         """
 
         with self.__condition:
-            self.__receivers.append(self.__Receiver(receiver))
+            self.__receivers.append(self.__Receiver(receiver,
+                                                    self.__makeQueue()))
 
         self.__logger.info("Registered receiver %s", receiver)
 
@@ -242,9 +865,14 @@ class OrderedQueueDispatcherPool(object):
             for r in self.__receivers:
                 if r.receiver == receiver:
                     removed = r
+                    r.registered = False
+                    self.__dropped += r.queue.dropped
                 else:
                     kept.append(r)
             self.__receivers = kept
+            if removed is not None:
+                self.__ready = collections.deque(
+                    r for r in self.__ready if r.registered)
         if removed:
             with removed.processingCondition:
                 while removed.processing:
@@ -265,8 +893,7 @@ class OrderedQueueDispatcherPool(object):
         with self.__condition:
             for receiver in self.__receivers:
                 receiver.queue.put(message)
-            self.__jobsAvailable = True
-            self.__condition.notify()
+                self.__makeReady(receiver)
 
         # XXX: This is disabled because it can trigger this bug for protocol
         # buffers payloads:
@@ -274,6 +901,14 @@ class OrderedQueueDispatcherPool(object):
         # See also #1331
         # self.__logger.debug("Got new message to dispatch: %s", message)
 
+    def __makeReady(self, receiver):
+        # Must be called with self.__condition held.
+        if not (receiver.ready or receiver.processing) \
+                and receiver.queue.depth:
+            receiver.ready = True
+            self.__ready.append(receiver)
+            self.__condition.notify()
+
     def __nextJob(self, workerNum):
         """
         Returns the next job to process for worker threads and blocks if there
@@ -284,42 +919,29 @@ class OrderedQueueDispatcherPool(object):
                 number of the worker requesting a new job
 
         Returns:
-            the receiver to work on
+            tuple:
+                the receiver to work on and the list of messages to
+                deliver to it
         """
 
-        receiver = None
         with self.__condition:
 
-            gotJob = False
-            while not gotJob:
-
-                while (not self.__jobsAvailable) and (not self.__interrupted):
-                    self.__logger.debug(
-                        "Worker %d: no jobs available, waiting", workerNum)
-                    self.__condition.wait()
-
-                if (self.__interrupted):
-                    raise InterruptedError("Processing was interrupted")
-
-                # search the next job
-                for _ in range(len(self.__receivers)):
-
-                    self.__currentPosition = self.__currentPosition + 1
-                    realPos = self.__currentPosition % len(self.__receivers)
-
-                    if (not self.__receivers[realPos].processing) and \
-                            (not self.__receivers[realPos].queue.empty()):
+            while (not self.__ready) and (not self.__interrupted):
+                self.__logger.debug(
+                    "Worker %d: no jobs available, waiting", workerNum)
+                self.__condition.wait()
 
-                        receiver = self.__receivers[realPos]
-                        receiver.processing = True
-                        gotJob = True
-                        break
+            if (self.__interrupted):
+                raise InterruptedError("Processing was interrupted")
 
-                if not gotJob:
-                    self.__jobsAvailable = False
-
-            self.__condition.notify()
-            return receiver
+            receiver = self.__ready.popleft()
+            receiver.ready = False
+            receiver.processing = True
+            # Take the messages while holding the lock since
+            # setQueueLimits may replace the queue of the receiver.
+            messages = receiver.queue.getAll(maxItems=self.__batchSize,
+                                             timeout=0)
+            return receiver, messages
 
     def __finishedWork(self, receiver, workerNum):
 
@@ -328,11 +950,20 @@ class OrderedQueueDispatcherPool(object):
             with receiver.processingCondition:
                 receiver.processing = False
                 receiver.processingCondition.notifyAll()
-            if not receiver.queue.empty():
-                self.__jobsAvailable = True
-                self.__logger.debug("Worker %d: new jobs available, "
-                                    "notifying one", workerNum)
-                self.__condition.notify()
+            if receiver.registered:
+                self.__logger.debug("Worker %d: receiver %s has pending "
+                                    "messages", workerNum, receiver.receiver)
+                self.__makeReady(receiver)
+
+    def __deliver(self, workerNum, receiver, message):
+        if self.__filterFunc(receiver.receiver, message):
+            self.__logger.debug(
+                "Worker %d: delivering message %s for receiver %s",
+                workerNum, message, receiver.receiver)
+            self.__delFunc(receiver.receiver, message)
+            self.__logger.debug(
+                "Worker %d: delivery for receiver %s finished",
+                workerNum, receiver.receiver)
 
     def __worker(self, workerNum):
         """
@@ -347,20 +978,28 @@ class OrderedQueueDispatcherPool(object):
 
             while True:
 
-                receiver = self.__nextJob(workerNum)
-                message = receiver.queue.get(True, None)
-                self.__logger.debug(
-                    "Worker %d: got message %s for receiver %s",
-                    workerNum, message, receiver.receiver)
-                if self.__filterFunc(receiver.receiver, message):
-                    self.__logger.debug(
-                        "Worker %d: delivering message %s for receiver %s",
-                        workerNum, message, receiver.receiver)
-                    self.__delFunc(receiver.receiver, message)
-                    self.__logger.debug(
-                        "Worker %d: delivery for receiver %s finished",
-                        workerNum, receiver.receiver)
-                self.__finishedWork(receiver, workerNum)
+                receiver, messages = self.__nextJob(workerNum)
+                try:
+                    for message in messages:
+                        # Stop delivering if the receiver has been
+                        # unregistered in the meantime.
+                        if not receiver.registered:
+                            break
+                        self.__logger.debug(
+                            "Worker %d: got message %s for receiver %s",
+                            workerNum, message, receiver.receiver)
+                        # A failing delivery must neither lose the
+                        # remaining messages of the batch nor
+                        # terminate the worker.
+                        try:
+                            self.__deliver(workerNum, receiver, message)
+                        except Exception:
+                            self.__logger.exception(
+                                "Worker %d: failed to deliver message %s "
+                                "to receiver %s",
+                                workerNum, message, receiver.receiver)
+                finally:
+                    self.__finishedWork(receiver, workerNum)
 
         except InterruptedError:
             pass
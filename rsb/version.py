@@ -0,0 +1,15 @@
+"""
+Provides runtime information about the version of RSB being currently used.
+
+.. codeauthor:: jwienke
+"""
+
+__version__ = '1.0.0-dev'
+__commit__ = 'archive'
+
+
+def getVersion():
+    """
+    Returns a descriptive string for the version of RSB.
+    """
+    return "%s-%s" % (__version__, __commit__)
@@ -0,0 +1,315 @@
+# ============================================================
+#
+# Copyright (C) 2018 Jan Moringen <jmoringe@techfak.uni-bielefeld.de>
+#
+# This file may be licensed under the terms of the
+# GNU Lesser General Public License Version 3 (the ``LGPL''),
+# or (at your option) any later version.
+#
+# Software distributed under the License is distributed
+# on an ``AS IS'' basis, WITHOUT WARRANTY OF ANY KIND, either
+# express or implied. See the LGPL for the specific language
+# governing rights and limitations.
+#
+# You should have received a copy of the LGPL along with this
+# program. If not, go to http://www.gnu.org/licenses/lgpl.html
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# The development of this software was supported by:
+#   CoR-Lab, Research Institute for Cognition and Robotics
+#     Bielefeld University
+#
+# ============================================================
+
+
+import os
+import random
+import time
+import unittest
+import uuid
+
+from rsb import EventId, Scope
+from rsb.filter import (CauseFilter, FilterAction, MethodFilter,
+                        OriginFilter, RecordingTrueFilter, ScopeFilter)
+from rsb.protocol.Notification_pb2 import Notification
+from rsb.transport.conversion import (Assembler,
+                                      NotificationFilter,
+                                      notificationToFragments,
+                                      peekScopeAndWireSchema)
+
+
+class PeekScopeAndWireSchemaTest(unittest.TestCase):
+
+    def makeNotification(self):
+        notification = Notification()
+        notification.event_id.sender_id = uuid.uuid4().bytes
+        notification.event_id.sequence_number = 300
+        notification.meta_data.create_time = 1
+        notification.meta_data.send_time = 2
+        return notification
+
+    def testBothFields(self):
+        notification = self.makeNotification()
+        notification.scope = b'/a/b/'
+        notification.wire_schema = b'utf-8-string'
+        notification.method = b'REQUEST'
+        notification.data = b'x' * 100000
+        self.assertEqual(
+            (b'/a/b/', b'utf-8-string'),
+            peekScopeAndWireSchema(notification.SerializeToString()))
+
+    def testMissingFields(self):
+        notification = self.makeNotification()
+        notification.data = b'data'
+        self.assertEqual(
+            (None, None),
+            peekScopeAndWireSchema(notification.SerializeToString()))
+
+        notification.scope = b'/'
+        self.assertEqual(
+            (b'/', None),
+            peekScopeAndWireSchema(notification.SerializeToString()))
+
+    def testBufferTypes(self):
+        notification = self.makeNotification()
+        notification.scope = b'/a/'
+        notification.wire_schema = b'bytes'
+        serialized = notification.SerializeToString()
+        for buffer in (serialized, bytearray(serialized),
+                       memoryview(b'\0' + serialized)[1:]):
+            self.assertEqual((b'/a/', b'bytes'),
+                             peekScopeAndWireSchema(buffer))
+
+    def testTruncated(self):
+        notification = self.makeNotification()
+        notification.scope = b'/a/long/scope/'
+        notification.wire_schema = b'bytes'
+        serialized = notification.SerializeToString()
+        self.assertRaises(ValueError, peekScopeAndWireSchema, serialized[:5])
+
+
+class NotificationToFragmentsTest(unittest.TestCase):
+
+    def makeNotification(self, data):
+        notification = Notification()
+        notification.event_id.sender_id = uuid.uuid4().bytes
+        notification.event_id.sequence_number = 300
+        notification.scope = b'/a/b/'
+        notification.wire_schema = b'bytes'
+        notification.meta_data.create_time = 1
+        notification.meta_data.send_time = 2
+        notification.data = data
+        return notification
+
+    def testFragments(self):
+        notification = self.makeNotification(bytes(range(256)) * 100)
+        fragments = []
+        for fragment in notificationToFragments(notification, 1000):
+            serialized = fragment.SerializeToString()
+            self.assertTrue(len(serialized) <= 1000)
+            fragments.append(type(fragment).FromString(serialized))
+
+        self.assertTrue(len(fragments) > 25)
+        for (i, fragment) in enumerate(fragments):
+            self.assertEqual(len(fragments), fragment.num_data_parts)
+            self.assertEqual(i, fragment.data_part)
+            self.assertEqual(notification.event_id,
+                             fragment.notification.event_id)
+        self.assertEqual(b'', fragments[1].notification.scope)
+
+        reassembled = fragments[0].notification
+        reassembled.data = b''.join(fragment.notification.data
+                                    for fragment in fragments)
+        self.assertEqual(notification, reassembled)
+
+    def testSingleFragment(self):
+        notification = self.makeNotification(b'data')
+        fragments = list(notificationToFragments(notification, 1000))
+        self.assertEqual(1, len(fragments))
+        self.assertEqual(1, fragments[0].num_data_parts)
+        self.assertEqual(notification, fragments[0].notification)
+
+    def testTooSmall(self):
+        notification = self.makeNotification(b'data')
+        self.assertRaises(ValueError, list,
+                          notificationToFragments(notification, 40))
+
+
+class AssemblerTest(unittest.TestCase):
+
+    def makeFragments(self, size, fragmentSize=1000):
+        notification = Notification()
+        notification.event_id.sender_id = uuid.uuid4().bytes
+        notification.event_id.sequence_number = 1
+        notification.scope = b'/a/'
+        notification.wire_schema = b'bytes'
+        notification.data = os.urandom(size)
+        fragments = [
+            type(fragment).FromString(fragment.SerializeToString())
+            for fragment in notificationToFragments(notification,
+                                                    fragmentSize)]
+        return notification, fragments
+
+    def testInOrder(self):
+        assembler = Assembler()
+        notification, fragments = self.makeFragments(10000)
+        results = [assembler.add(fragment) for fragment in fragments]
+        self.assertEqual([None] * (len(fragments) - 1), results[:-1])
+        self.assertEqual(notification, results[-1])
+        self.assertEqual(1, assembler.completedEvents)
+        self.assertEqual(0, assembler.partialEvents)
+        self.assertEqual(0, assembler.bytes)
+
+    def testShuffledAndInterleaved(self):
+        assembler = Assembler()
+        events = [self.makeFragments(size) for size in (5000, 20000, 999)]
+        fragments = [fragment
+                     for (_, eventFragments) in events
+                     for fragment in eventFragments]
+        random.Random(0).shuffle(fragments)
+        results = [assembler.add(fragment) for fragment in fragments]
+        complete = [result for result in results if result is not None]
+        self.assertEqual(sorted(len(notification.data)
+                                for (notification, _) in events),
+                         sorted(len(result.data) for result in complete))
+        for (notification, _) in events:
+            self.assertTrue(notification in complete)
+        self.assertEqual(0, assembler.bytes)
+
+    def testSingleFragment(self):
+        assembler = Assembler()
+        notification, fragments = self.makeFragments(10)
+        self.assertEqual(1, len(fragments))
+        self.assertEqual(notification, assembler.add(fragments[0]))
+
+    def testDuplicate(self):
+        assembler = Assembler()
+        _, fragments = self.makeFragments(5000)
+        assembler.add(fragments[1])
+        self.assertEqual(None, assembler.add(fragments[1]))
+        self.assertEqual(1, assembler.duplicateFragments)
+
+    def testEviction(self):
+        assembler = Assembler(maxBytes=30000)
+        first, firstFragments = self.makeFragments(20000)
+        second, secondFragments = self.makeFragments(20000)
+        for fragment in firstFragments[:10]:
+            assembler.add(fragment)
+        for fragment in secondFragments[:-1]:
+            assembler.add(fragment)
+        # The first event has been evicted to make room for the second
+        # one.
+        self.assertEqual(1, assembler.evictedEvents)
+        self.assertEqual(1, assembler.partialEvents)
+        self.assertEqual(second, assembler.add(secondFragments[-1]))
+
+        for fragment in firstFragments[10:]:
+            self.assertEqual(None, assembler.add(fragment))
+        self.assertEqual(len(firstFragments) - 10,
+                         assembler.ignoredFragments)
+        self.assertEqual(1, assembler.droppedEvents)
+
+    def testRejection(self):
+        assembler = Assembler(maxBytes=10000)
+        _, fragments = self.makeFragments(20000)
+        for fragment in fragments:
+            self.assertEqual(None, assembler.add(fragment))
+        self.assertEqual(1, assembler.rejectedEvents)
+        self.assertEqual(0, assembler.bytes)
+
+    def testTimeout(self):
+        assembler = Assembler(timeout=0.05)
+        _, fragments = self.makeFragments(5000)
+        assembler.add(fragments[0])
+        self.assertEqual(1, assembler.partialEvents)
+        time.sleep(0.1)
+        assembler.prune()
+        self.assertEqual(0, assembler.partialEvents)
+        self.assertEqual(1, assembler.expiredEvents)
+        self.assertEqual(0, assembler.bytes)
+
+
+class NotificationFilterTest(unittest.TestCase):
+
+    def makeNotification(self, scope=b'/a/b/', method=None, cause=None):
+        notification = Notification()
+        notification.event_id.sender_id = uuid.uuid4().bytes
+        notification.event_id.sequence_number = 0
+        notification.scope = scope
+        if method is not None:
+            notification.method = method
+        if cause is not None:
+            notification.causes.add(sender_id=cause.participantId.bytes,
+                                    sequence_number=cause.sequenceNumber)
+        return notification
+
+    def makeFilter(self, *filters):
+        notificationFilter = NotificationFilter()
+        for theFilter in filters:
+            notificationFilter.filterNotify(theFilter, FilterAction.ADD)
+        return notificationFilter
+
+    def testScopeFilter(self):
+        notificationFilter = self.makeFilter(ScopeFilter(Scope('/a')))
+        self.assertTrue(notificationFilter.match(
+            self.makeNotification(scope=b'/a/')))
+        self.assertTrue(notificationFilter.match(
+            self.makeNotification(scope=b'/a/b/')))
+        self.assertFalse(notificationFilter.match(
+            self.makeNotification(scope=b'/ab/')))
+        self.assertFalse(notificationFilter.match(
+            self.makeNotification(scope=b'/')))
+
+    def testOriginFilter(self):
+        notification = self.makeNotification()
+        origin = uuid.UUID(bytes=notification.event_id.sender_id)
+        self.assertTrue(self.makeFilter(OriginFilter(origin))
+                        .match(notification))
+        self.assertFalse(self.makeFilter(OriginFilter(origin, invert=True))
+                         .match(notification))
+        self.assertFalse(self.makeFilter(OriginFilter(uuid.uuid4()))
+                         .match(notification))
+
+    def testMethodFilter(self):
+        reply = self.makeFilter(MethodFilter(method='REPLY'))
+        self.assertTrue(reply.match(self.makeNotification(method=b'REPLY')))
+        self.assertFalse(reply.match(
+            self.makeNotification(method=b'REQUEST')))
+        self.assertFalse(reply.match(self.makeNotification()))
+
+        noReply = self.makeFilter(MethodFilter(method='REPLY', invert=True))
+        self.assertFalse(noReply.match(
+            self.makeNotification(method=b'REPLY')))
+        self.assertTrue(noReply.match(self.makeNotification()))
+
+        noMethod = self.makeFilter(MethodFilter(method=None))
+        self.assertTrue(noMethod.match(self.makeNotification()))
+        self.assertFalse(noMethod.match(
+            self.makeNotification(method=b'REPLY')))
+
+    def testCauseFilter(self):
+        cause = EventId(uuid.uuid4(), 5)
+        notificationFilter = self.makeFilter(CauseFilter(cause))
+        self.assertTrue(notificationFilter.match(
+            self.makeNotification(cause=cause)))
+        self.assertFalse(notificationFilter.match(
+            self.makeNotification(cause=EventId(cause.participantId, 6))))
+        self.assertFalse(notificationFilter.match(self.makeNotification()))
+
+    def testAddRemove(self):
+        methodFilter = MethodFilter(method='REPLY')
+        notificationFilter = self.makeFilter(methodFilter,
+                                             ScopeFilter(Scope('/a')))
+        notification = self.makeNotification(method=b'REQUEST')
+        self.assertEqual(2, len(notificationFilter))
+        self.assertFalse(notificationFilter.match(notification))
+
+        notificationFilter.filterNotify(methodFilter, FilterAction.REMOVE)
+        self.assertEqual(1, len(notificationFilter))
+        self.assertTrue(notificationFilter.match(notification))
+
+    def testIgnoreOtherFilters(self):
+        notificationFilter = self.makeFilter(RecordingTrueFilter())
+        self.assertEqual(0, len(notificationFilter))
+        self.assertTrue(notificationFilter.match(self.makeNotification()))
@@ -36,6 +36,7 @@ from rsb import Scope, QualityOfServiceSpec, ParticipantConfig, MetaData, \
 import time
 from uuid import uuid4
 from rsb.converter import Converter, registerGlobalConverter
+import threading
 from threading import Condition
 
 
@@ -588,6 +589,72 @@ class ContextManagerTest(unittest.TestCase):
             self.assertEqual(data, client.test(data))
 
 
+class UnreliableDeliveryTest(unittest.TestCase):
+
+    def testDroppedEvents(self):
+        config = ParticipantConfig.fromDict({
+            'transport.inprocess.enabled': '1',
+            'qualityofservice.reliability': 'UNRELIABLE',
+            'introspection.enabled': '0'})
+        scope = rsb.Scope('/unreliable/test')
+
+        condition = Condition()
+        state = {'blocked': True, 'received': 0}
+
+        def blockingHandler(event):
+            with condition:
+                state['received'] += 1
+                condition.notifyAll()
+                while state['blocked']:
+                    condition.wait()
+
+        with rsb.createInformer(scope, config=config) as informer, \
+             rsb.createListener(scope, config=config) as listener:
+            listener.addHandler(blockingHandler)
+
+            informer.publishData('first')
+            with condition:
+                while state['received'] < 1:
+                    condition.wait()
+            for _ in range(1000):
+                informer.publishData('more')
+            # The default receiving strategy queues 100 events for
+            # the blocked handler.
+            self.assertEqual(900, listener.droppedEvents)
+
+            with condition:
+                state['blocked'] = False
+                condition.notifyAll()
+
+
+class InlineReceivingStrategyTest(unittest.TestCase):
+
+    def testConfiguration(self):
+        self.assertEqual('parallel', ParticipantConfig().receivingStrategy)
+        config = ParticipantConfig.fromDict({
+            'transport.inprocess.enabled': '1',
+            'receivingstrategy.name': 'inline',
+            'introspection.enabled': '0'})
+        self.assertEqual('inline', config.receivingStrategy)
+
+        received = []
+
+        def handler(event):
+            received.append((event.data, threading.current_thread()))
+
+        scope = rsb.Scope('/inline/test')
+        with rsb.createInformer(scope, config=config) as informer, \
+             rsb.createListener(scope, config=config) as listener:
+            listener.addHandler(handler)
+            informer.publishData('foo')
+            self.assertEqual([('foo', threading.current_thread())],
+                             received)
+
+        config.receivingStrategy = 'unknown'
+        self.assertRaises(ValueError, rsb.createListener, scope,
+                          config=config)
+
+
 class HookTest(unittest.TestCase):
 
     def setUp(self):
@@ -24,16 +24,83 @@
 
 import uuid
 import unittest
+import threading
 from threading import Condition, Lock
 
 from rsb.filter import RecordingTrueFilter, RecordingFalseFilter
 from rsb import Event, EventId
 import rsb
 import rsb.eventprocessing
-from rsb.eventprocessing import FullyParallelEventReceivingStrategy
+from rsb.eventprocessing import (FullyParallelEventReceivingStrategy,
+                                 InlineEventReceivingStrategy)
 import time
 
 
+class ScopeTrieTest(unittest.TestCase):
+
+    def testItems(self):
+        trie = rsb.eventprocessing.ScopeTrie()
+        self.assertFalse(trie)
+        trie[rsb.Scope('/')] = 1
+        trie[rsb.Scope('/foo/bar')] = 2
+        trie[rsb.Scope('/foo/bar')] = 3
+        self.assertEqual(2, len(trie))
+        self.assertEqual(set(((rsb.Scope('/'), 1),
+                              (rsb.Scope('/foo/bar'), 3))),
+                         set(trie.items()))
+        self.assertTrue(rsb.Scope('/foo/bar') in trie)
+        self.assertFalse(rsb.Scope('/foo') in trie)
+        self.assertEqual(None, trie.get(rsb.Scope('/foo')))
+        self.assertRaises(KeyError, lambda: trie[rsb.Scope('/baz')])
+
+    def testMatchingValues(self):
+        trie = rsb.eventprocessing.ScopeTrie()
+        trie[rsb.Scope('/foo')] = 1
+        trie[rsb.Scope('/foo/bar')] = 2
+        trie[rsb.Scope('/baz')] = 3
+
+        def check(scope, expected):
+            self.assertEqual(
+                expected, list(trie.matchingValues(rsb.Scope(scope))))
+            self.assertEqual(bool(expected),
+                             trie.hasMatch(rsb.Scope(scope)))
+        check('/',            [])
+        check('/foo',         [1])
+        check('/foo/bar/fez', [1, 2])
+        check('/baz/foo',     [3])
+        check('/fez',         [])
+
+    def testDelete(self):
+        trie = rsb.eventprocessing.ScopeTrie()
+        trie[rsb.Scope('/foo')] = 1
+        trie[rsb.Scope('/foo/bar/baz')] = 2
+        del trie[rsb.Scope('/foo/bar/baz')]
+        self.assertEqual([(rsb.Scope('/foo'), 1)], list(trie.items()))
+        self.assertRaises(KeyError, trie.__delitem__, rsb.Scope('/foo/bar'))
+        del trie[rsb.Scope('/foo')]
+        self.assertFalse(trie)
+
+    def testCopy(self):
+        trie = rsb.eventprocessing.ScopeTrie()
+        trie[rsb.Scope('/foo')] = 1
+        trie[rsb.Scope('/baz')] = 2
+
+        copy1 = trie.copyWith(rsb.Scope('/foo/bar'), 3)
+        copy2 = copy1.copyWithout(rsb.Scope('/foo'))
+        copy3 = copy2.copyWith(rsb.Scope('/baz'), 4)
+
+        def check(trie, expected):
+            self.assertEqual(len(expected), len(trie))
+            self.assertEqual(set((rsb.Scope(scope), value)
+                                 for (scope, value) in expected),
+                             set(trie.items()))
+        check(trie,  [('/foo', 1), ('/baz', 2)])
+        check(copy1, [('/foo', 1), ('/baz', 2), ('/foo/bar', 3)])
+        check(copy2, [('/baz', 2), ('/foo/bar', 3)])
+        check(copy3, [('/baz', 4), ('/foo/bar', 3)])
+        self.assertRaises(KeyError, trie.copyWithout, rsb.Scope('/fez'))
+
+
 class ScopeDispatcherTest(unittest.TestCase):
 
     def testSinks(self):
@@ -58,6 +125,29 @@ class ScopeDispatcherTest(unittest.TestCase):
         check("/bar",     (3,))
         check("/bar/fez", (3,))
 
+    def testMatchingSinksForString(self):
+        dispatcher = rsb.eventprocessing.ScopeDispatcher(cacheSize=2)
+        dispatcher.addSink(rsb.Scope('/foo'), 1)
+
+        def check(scope, expected):
+            self.assertEqual(set(expected),
+                             set(dispatcher.matchingSinksForString(scope)))
+        check('/foo/bar/', (1,))
+        check(b'/foo/bar/', (1,))
+        check(b'/baz/', ())
+        self.assertRaises(ValueError,
+                          dispatcher.matchingSinksForString, b'invalid')
+
+        # Changing sinks invalidates cached results.
+        dispatcher.addSink(rsb.Scope('/foo/bar'), 2)
+        check(b'/foo/bar/', (1, 2))
+        dispatcher.addSink(rsb.Scope('/'), 3)
+        check(b'/baz/', (3,))
+        dispatcher.removeSink(rsb.Scope('/foo'), 1)
+        check(b'/foo/bar/', (2, 3))
+        self.assertEqual(2, len(dispatcher))
+
+
 class ParallelEventReceivingStrategyTest(unittest.TestCase):
 
     def testMatchingProcess(self):
@@ -91,22 +181,15 @@ class ParallelEventReceivingStrategyTest(unittest.TestCase):
         ep.handle(event1)
         ep.handle(event2)
 
-        # both filters must have been called
+        # both filters must have been called once per event,
+        # regardless of the number of handlers
         with matchingRecordingFilter1.condition:
-            while len(matchingRecordingFilter1.events) < 4:
-                matchingRecordingFilter1.condition.wait()
-
-            self.assertEqual(4, len(matchingRecordingFilter1.events))
-            self.assertTrue(event1 in matchingRecordingFilter1.events)
-            self.assertTrue(event2 in matchingRecordingFilter1.events)
+            self.assertEqual([event1, event2],
+                             matchingRecordingFilter1.events)
 
         with matchingRecordingFilter2.condition:
-            while len(matchingRecordingFilter2.events) < 4:
-                matchingRecordingFilter2.condition.wait()
-
-            self.assertEqual(4, len(matchingRecordingFilter2.events))
-            self.assertTrue(event1 in matchingRecordingFilter2.events)
-            self.assertTrue(event2 in matchingRecordingFilter2.events)
+            self.assertEqual([event1, event2],
+                             matchingRecordingFilter2.events)
 
         # both actions must have been called
         with mc1Cond:
@@ -123,6 +206,9 @@ class ParallelEventReceivingStrategyTest(unittest.TestCase):
             self.assertTrue(event1 in matchingCalls2)
             self.assertTrue(event2 in matchingCalls2)
 
+        self.assertEqual(2, len(matchingRecordingFilter1.events))
+        self.assertEqual(2, len(matchingRecordingFilter2.events))
+
         ep.removeFilter(matchingRecordingFilter2)
         ep.removeFilter(matchingRecordingFilter1)
 
@@ -178,6 +264,46 @@ class ParallelEventReceivingStrategyTest(unittest.TestCase):
             ep.removeHandler(h2, wait=True)
             ep.removeHandler(h1, wait=True)
 
+    def testUnreliable(self):
+        ep = rsb.eventprocessing.ParallelEventReceivingStrategy(
+            1, unreliableCapacity=2)
+        ep.setQualityOfServiceSpec(rsb.QualityOfServiceSpec(
+            reliability=rsb.QualityOfServiceSpec.Reliability.UNRELIABLE))
+
+        condition = Condition()
+        state = {'blocked': True, 'calls': []}
+
+        def blockingAction(event):
+            with condition:
+                state['calls'].append(event.metaData.userInfos['n'])
+                condition.notifyAll()
+                while state['blocked']:
+                    condition.wait()
+
+        ep.addHandler(blockingAction, wait=True)
+
+        # The first event blocks the handler, two of the remaining
+        # nine events are queued and the others are dropped.
+        for i in range(10):
+            event = Event(EventId(uuid.uuid4(), i))
+            event.metaData.setUserInfo('n', i)
+            ep.handle(event)
+            if i == 0:
+                with condition:
+                    while not state['calls']:
+                        condition.wait()
+        self.assertEqual(7, ep.getDroppedEvents())
+
+        with condition:
+            state['blocked'] = False
+            condition.notifyAll()
+            while len(state['calls']) < 3:
+                condition.wait()
+        self.assertEqual([0, 8, 9], state['calls'])
+
+        ep.deactivate()
+        self.assertEqual(7, ep.getDroppedEvents())
+
 
 class MockConnector(object):
     def activate(self):
@@ -437,3 +563,106 @@ class FullyParallelEventReceivingStrategyTest(unittest.TestCase):
                 self.fail("Impossible to be called in parallel again")
             else:
                 self.assertEqual(3, maxParallelCalls.value)
+
+    def testUnreliable(self):
+
+        condition = Condition()
+        state = {'blocked': True, 'calls': 0}
+
+        def blockingHandler(event):
+            with condition:
+                state['calls'] += 1
+                condition.notifyAll()
+                while state['blocked']:
+                    condition.wait()
+
+        strategy = FullyParallelEventReceivingStrategy(maxWorkers=2,
+                                                       queueCapacity=1)
+        strategy.setQualityOfServiceSpec(rsb.QualityOfServiceSpec(
+            reliability=rsb.QualityOfServiceSpec.Reliability.UNRELIABLE))
+        strategy.addHandler(blockingHandler, True)
+
+        # Two events are being processed, one is queued and the
+        # remaining ones are dropped.
+        for i in range(2):
+            strategy.handle(Event(id=i))
+            with condition:
+                while state['calls'] < i + 1:
+                    condition.wait()
+        for i in range(2, 6):
+            strategy.handle(Event(id=i))
+        self.assertEqual(3, strategy.getDroppedEvents())
+        self.assertEqual(2, strategy.executor.active)
+        self.assertEqual(1, strategy.executor.queued)
+        self.assertEqual(3, strategy.executor.rejected)
+
+        with condition:
+            state['blocked'] = False
+            condition.notifyAll()
+            while state['calls'] < 3:
+                condition.wait()
+        strategy.deactivate()
+
+
+class InlineEventReceivingStrategyTest(unittest.TestCase):
+
+    def testDispatchInCallingThread(self):
+        strategy = InlineEventReceivingStrategy()
+        calls = []
+
+        def handler(event):
+            calls.append((event, threading.current_thread()))
+
+        def failingHandler(event):
+            raise RuntimeError('intentional failure')
+
+        strategy.addHandler(failingHandler, True)
+        strategy.addHandler(handler, True)
+
+        event = Event(id=42)
+        strategy.handle(event)
+        self.assertEqual([(event, threading.current_thread())], calls)
+        self.assertTrue(event.metaData.deliverTime is not None)
+
+        falseFilter = RecordingFalseFilter()
+        strategy.addFilter(falseFilter)
+        strategy.handle(Event(id=43))
+        self.assertEqual(1, len(calls))
+        self.assertEqual(1, len(falseFilter.events))
+
+        strategy.removeFilter(falseFilter)
+        strategy.removeHandler(handler, True)
+        strategy.handle(Event(id=44))
+        self.assertEqual(1, len(calls))
+
+    def testRemoveHandlerWait(self):
+        strategy = InlineEventReceivingStrategy()
+        entered = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def blockingHandler(event):
+            entered.set()
+            release.wait()
+            calls.append(event)
+
+        def selfRemovingHandler(event):
+            strategy.removeHandler(selfRemovingHandler, True)
+
+        strategy.addHandler(blockingHandler, True)
+        strategy.addHandler(selfRemovingHandler, True)
+        publisher = threading.Thread(target=strategy.handle,
+                                     args=(Event(id=42),))
+        publisher.start()
+        self.assertTrue(entered.wait(5))
+
+        # Removing with wait blocks until the running dispatch is done.
+        remover = threading.Thread(target=strategy.removeHandler,
+                                   args=(blockingHandler, True))
+        remover.start()
+        remover.join(0.1)
+        self.assertTrue(remover.is_alive())
+        release.set()
+        remover.join()
+        publisher.join()
+        self.assertEqual(1, len(calls))
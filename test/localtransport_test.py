@@ -22,13 +22,16 @@
 #
 # ============================================================
 
+import threading
 import unittest
 
+import rsb.util
+
 from rsb.transport.local import (Bus,
                                  OutConnector,
                                  InPushConnector,
                                  InPullConnector)
-from rsb import Scope, Event
+from rsb import Scope, Event, QualityOfServiceSpec
 import time
 from test.transporttest import TransportCheck
 
@@ -75,6 +78,67 @@ class BusTest(unittest.TestCase):
             self.assertTrue(event in sink.events)
             self.assertEqual(1, len(sink.events))
 
+    def testRemoveSink(self):
+        bus = Bus()
+
+        scope = Scope("/this/is/a/test")
+        sink1 = StubSink(scope)
+        sink2 = StubSink(scope)
+        sink3 = StubSink(Scope("/this"))
+        for sink in [sink1, sink2, sink3]:
+            bus.addSink(sink)
+        self.assertEqual(2, len(bus))
+
+        bus.removeSink(sink1)
+        bus.handle(Event(scope=scope))
+        self.assertEqual([0, 1, 1],
+                         [len(sink.events) for sink in [sink1, sink2, sink3]])
+
+        # Scopes without sinks are removed.
+        bus.removeSink(sink2)
+        self.assertEqual(1, len(bus))
+        bus.removeSink(sink3)
+        self.assertEqual(0, len(bus))
+
+        bus.removeSink(sink3)
+        bus.handle(Event(scope=scope))
+        self.assertEqual([0, 1, 1],
+                         [len(sink.events) for sink in [sink1, sink2, sink3]])
+
+    def testChangeSinksDuringDispatch(self):
+        bus = Bus()
+
+        class BlockingSink(StubSink):
+
+            def __init__(self, scope):
+                super(BlockingSink, self).__init__(scope)
+                self.entered = threading.Event()
+                self.release = threading.Event()
+
+            def handle(self, event):
+                self.entered.set()
+                self.release.wait()
+                super(BlockingSink, self).handle(event)
+
+        blocking = BlockingSink(Scope("/blocking"))
+        bus.addSink(blocking)
+        publisher = threading.Thread(
+            target=bus.handle, args=(Event(scope=Scope("/blocking")),))
+        publisher.start()
+        self.assertTrue(blocking.entered.wait(5))
+
+        # Neither changing sinks nor publishing in other scopes waits
+        # for the blocked dispatch.
+        other = StubSink(Scope("/other"))
+        bus.addSink(other)
+        bus.handle(Event(scope=Scope("/other")))
+        bus.removeSink(other)
+        self.assertEqual(1, len(other.events))
+
+        blocking.release.set()
+        publisher.join()
+        self.assertEqual(1, len(blocking.events))
+
 
 class OutConnectorTest(unittest.TestCase):
 
@@ -126,6 +190,137 @@ class InPushConnectorTest(unittest.TestCase):
         self.assertTrue(e in action.events)
 
 
+class InPullConnectorTest(unittest.TestCase):
+
+    def makeConnector(self, bus, **options):
+        connector = InPullConnector(bus=bus, options=options)
+        connector.setScope(Scope("/"))
+        connector.activate()
+        return connector
+
+    def publish(self, bus, *scopes):
+        for (i, scope) in enumerate(scopes):
+            bus.handle(Event(scope=Scope(scope), data=i))
+
+    def testDropPolicies(self):
+        for (policy, expected) in [('drop-oldest', [3, 4]),
+                                   ('drop-newest', [0, 1])]:
+            bus = Bus()
+            connector = self.makeConnector(bus, pullcapacity='2',
+                                           pullpolicy=policy)
+            self.publish(bus, *['/a'] * 5)
+            self.assertEqual(2, connector.queue.depth)
+            self.assertEqual(3, connector.getDroppedEvents())
+            self.assertEqual(expected,
+                             [e.data for e in connector.raiseEvents()])
+            connector.deactivate()
+
+    def testKeepLatest(self):
+        bus = Bus()
+        connector = self.makeConnector(bus, pullcapacity='2',
+                                       pullpolicy='keep-latest')
+        self.publish(bus, '/a', '/b', '/a', '/a')
+        self.assertEqual(2, connector.getDroppedEvents())
+        self.assertEqual([(Scope('/a'), 3)],
+                         [(e.scope, e.data)
+                          for e in connector.raiseEvents(maxEvents=1)])
+
+        # Replacing events keeps their position in the buffer.
+        self.publish(bus, '/c', '/b', '/d')
+        self.assertEqual(4, connector.getDroppedEvents())
+        self.assertEqual([(Scope('/c'), 0), (Scope('/d'), 2)],
+                         [(e.scope, e.data) for e in connector.raiseEvents()])
+        connector.deactivate()
+
+    def testBlock(self):
+        bus = Bus()
+        connector = self.makeConnector(bus, pullcapacity='1',
+                                       pullpolicy='block')
+        self.publish(bus, '/a')
+        publisher = threading.Thread(target=self.publish,
+                                     args=(bus, '/b'))
+        publisher.start()
+        publisher.join(0.1)
+        self.assertTrue(publisher.is_alive())
+        self.assertEqual(Scope('/a'), connector.raiseEvent(True).scope)
+        publisher.join()
+        self.assertEqual(Scope('/b'), connector.raiseEvent(True).scope)
+        self.assertEqual(0, connector.getDroppedEvents())
+        connector.deactivate()
+
+    def testTimeoutsAndDraining(self):
+        bus = Bus()
+        connector = self.makeConnector(bus)
+        self.assertEqual(None, connector.raiseEvent(False))
+        start = time.time()
+        self.assertEqual(None, connector.raiseEvent(True, timeout=0.05))
+        self.assertTrue(time.time() - start >= 0.05)
+        self.assertEqual([], connector.raiseEvents(timeout=0.01))
+
+        self.publish(bus, *['/a'] * 5)
+        self.assertEqual([0, 1],
+                         [e.data for e in connector.raiseEvents(maxEvents=2)])
+        self.assertEqual([2, 3, 4],
+                         [e.data for e in connector.raiseEvents()])
+        self.assertEqual(5, connector.queue.enqueued)
+        self.assertEqual(5, connector.queue.highWaterMark)
+
+        # Deactivating wakes up blocked readers.
+        reader = threading.Thread(target=connector.raiseEvent, args=(True,))
+        reader.start()
+        connector.deactivate()
+        reader.join()
+
+    def testDefaultPolicy(self):
+        Policy = rsb.util.BoundedQueue.OverflowPolicy
+        unreliable = QualityOfServiceSpec(
+            reliability=QualityOfServiceSpec.Reliability.UNRELIABLE)
+
+        # Unbounded unless unreliable delivery is requested.
+        connector = InPullConnector()
+        self.assertEqual(None, connector.queue.capacity)
+        connector.setQualityOfServiceSpec(QualityOfServiceSpec())
+        self.assertEqual(None, connector.queue.capacity)
+        connector.setQualityOfServiceSpec(unreliable)
+        self.assertEqual(Policy.DROP_OLDEST, connector.queue.policy)
+        self.assertEqual(1000, connector.queue.capacity)
+        connector.setQualityOfServiceSpec(QualityOfServiceSpec())
+        self.assertEqual(None, connector.queue.capacity)
+
+        # An explicit capacity bounds the buffer without dropping
+        # events.
+        connector = InPullConnector(options={'pullcapacity': '10'})
+        connector.setQualityOfServiceSpec(QualityOfServiceSpec())
+        self.assertEqual(Policy.BLOCK, connector.queue.policy)
+        self.assertEqual(10, connector.queue.capacity)
+        connector.setQualityOfServiceSpec(unreliable)
+        self.assertEqual(Policy.DROP_OLDEST, connector.queue.policy)
+        self.assertEqual(10, connector.queue.capacity)
+
+        # An explicit policy is not overridden.
+        connector = InPullConnector(options={'pullpolicy': 'drop-newest'})
+        connector.setQualityOfServiceSpec(unreliable)
+        self.assertEqual(Policy.DROP_NEWEST, connector.queue.policy)
+
+    def testDefaultDoesNotBlockPublisher(self):
+        bus = Bus()
+        connector = self.makeConnector(bus)
+        connector.setQualityOfServiceSpec(QualityOfServiceSpec())
+        publisher = threading.Thread(target=self.publish,
+                                     args=(bus,) + ('/a',) * 1500)
+        publisher.start()
+        publisher.join(5)
+        self.assertFalse(publisher.is_alive())
+        self.assertEqual(list(range(1500)),
+                         [e.data for e in connector.raiseEvents()])
+        self.assertEqual(0, connector.getDroppedEvents())
+        connector.deactivate()
+
+    def testInvalidPolicy(self):
+        self.assertRaises(TypeError, InPullConnector,
+                          options={'pullpolicy': 'drop-all'})
+
+
 class LocalTransportTest(TransportCheck, unittest.TestCase):
 
     def _getInPushConnector(self, scope, activate=True):
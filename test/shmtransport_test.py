@@ -0,0 +1,250 @@
+# ============================================================
+#
+# Copyright (C) 2012 Jan Moringen <jmoringe@techfak.uni-bielefeld.de>
+#
+# This file may be licensed under the terms of the
+# GNU Lesser General Public License Version 3 (the ``LGPL''),
+# or (at your option) any later version.
+#
+# Software distributed under the License is distributed
+# on an ``AS IS'' basis, WITHOUT WARRANTY OF ANY KIND, either
+# express or implied. See the LGPL for the specific language
+# governing rights and limitations.
+#
+# You should have received a copy of the LGPL along with this
+# program. If not, go to http://www.gnu.org/licenses/lgpl.html
+# or write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# The development of this software was supported by:
+#   CoR-Lab, Research Institute for Cognition and Robotics
+#     Bielefeld University
+#
+# ============================================================
+
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+import uuid
+
+from rsb import QualityOfServiceSpec, Scope
+from rsb.converter import getGlobalConverterMap
+from rsb.util import BoundedQueue
+from rsb.protocol.Notification_pb2 import Notification
+from rsb.transport.shm import (RingBuffer,
+                               OutConnector,
+                               InPullConnector,
+                               InPushConnector)
+
+from test.transporttest import TransportCheck
+
+
+def makeSegmentPath():
+    return os.path.join(tempfile.gettempdir(),
+                        'rsb-shm-test-' + uuid.uuid4().hex)
+
+
+def makeNotification(scope, size):
+    notification = Notification()
+    notification.event_id.sender_id = uuid.uuid4().bytes
+    notification.event_id.sequence_number = 0
+    notification.scope = scope
+    notification.wire_schema = b'bytes'
+    notification.data = b'x' * size
+    return notification
+
+
+class ShmTransportTest(TransportCheck, unittest.TestCase):
+
+    def setUp(self):
+        self.__path = makeSegmentPath()
+
+    def tearDown(self):
+        if os.path.exists(self.__path):
+            os.unlink(self.__path)
+
+    def __getConnector(self, clazz, scope, activate):
+        connector = clazz(converters=getGlobalConverterMap(bytes),
+                          options={'path': self.__path,
+                                   'size': str(1024 * 1024)})
+        connector.setScope(scope)
+        if activate:
+            connector.activate()
+        return connector
+
+    def _getInPushConnector(self, scope, activate=True):
+        return self.__getConnector(InPushConnector, scope, activate)
+
+    def _getInPullConnector(self, scope, activate=True):
+        return self.__getConnector(InPullConnector, scope, activate)
+
+    def _getOutConnector(self, scope, activate=True):
+        return self.__getConnector(OutConnector, scope, activate)
+
+
+class RingBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = makeSegmentPath()
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def readAll(self, ring, position):
+        records = []
+        while position < ring.committed:
+            record = ring.read(position)
+            if record is None:
+                return records, None
+            _, data, position = record
+            records.append(bytes(data))
+        return records, position
+
+    def testWrap(self):
+        ring = RingBuffer(self.path, 256)
+        position = 0
+        for i in range(50):
+            data = bytes([i]) * (10 + i % 30)
+            ring.write(data)
+            records, position = self.readAll(ring, position)
+            self.assertEqual([data], records)
+        self.assertTrue(ring.committed > ring.capacity)
+        ring.close()
+
+    def testSharedSegment(self):
+        writer = RingBuffer(self.path, 1024)
+        reader = RingBuffer(self.path, 4096)
+        self.assertEqual(1024, reader.capacity)
+
+        writer.write(b'foo')
+        self.assertEqual(([b'foo'], reader.committed),
+                         self.readAll(reader, 0))
+        writer.close()
+        reader.close()
+
+    def testOverrun(self):
+        ring = RingBuffer(self.path, 256)
+        position = ring.committed
+        for _ in range(10):
+            ring.write(b'x' * 60)
+        self.assertFalse(ring.isIntact(position))
+        self.assertEqual(None, ring.read(position))
+        ring.close()
+
+    def testTooLarge(self):
+        ring = RingBuffer(self.path, 256)
+        self.assertRaises(ValueError, ring.write, b'x' * 200)
+        ring.close()
+
+
+class BusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = makeSegmentPath()
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def makeConnector(self, clazz=InPushConnector, **options):
+        options['path'] = self.path
+        connector = clazz(converters=getGlobalConverterMap(bytes),
+                          options=options)
+        connector.setScope(Scope('/foo'))
+        return connector
+
+    def testReceiveOnlyNewMatchingRecords(self):
+        writer = RingBuffer(self.path, 4096)
+        # Records written before the bus is activated are not
+        # delivered, even if the ring buffer wrapped around.
+        for _ in range(100):
+            writer.write(makeNotification(b'/foo/', 100)
+                         .SerializeToString())
+
+        received = []
+        condition = threading.Condition()
+
+        def handle(event):
+            with condition:
+                received.append(event)
+                condition.notify()
+
+        connector = InPushConnector(converters=getGlobalConverterMap(bytes),
+                                    options={'path': self.path})
+        connector.setScope(Scope('/foo'))
+        connector.setObserverAction(handle)
+        connector.activate()
+
+        writer.write(makeNotification(b'/bar/', 1).SerializeToString())
+        writer.write(makeNotification(b'/foo/', 1).SerializeToString())
+        with condition:
+            condition.wait_for(lambda: received, timeout=10)
+        self.assertEqual(0, connector.bus.overruns)
+        connector.deactivate()
+        writer.close()
+
+        self.assertEqual(1, len(received))
+        self.assertEqual(Scope('/foo'), received[0].scope)
+        self.assertEqual(b'x', received[0].data)
+
+    def testRemoveSegment(self):
+        connectors = [self.makeConnector() for _ in range(2)]
+        for connector in connectors:
+            connector.activate()
+        self.assertTrue(os.path.exists(self.path))
+        self.assertEqual('shm://', connectors[0].getTransportURL()[:6])
+        self.assertEqual(connectors[0].bus.getTransportURL(),
+                         connectors[0].getTransportURL())
+
+        connectors[0].deactivate()
+        self.assertTrue(os.path.exists(self.path))
+        connectors[1].deactivate()
+        self.assertFalse(os.path.exists(self.path))
+
+    def testKeepSegmentUsedByOtherProcess(self):
+        process = subprocess.Popen(
+            [sys.executable, '-c',
+             'import sys\n'
+             'from rsb.transport.shm import RingBuffer\n'
+             'ring = RingBuffer(sys.argv[1], 4096)\n'
+             'print("ready", flush=True)\n'
+             'sys.stdin.read()\n'
+             'ring.close(unlink=True)\n',
+             self.path],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        try:
+            self.assertEqual(b'ready\n', process.stdout.readline())
+            connector = self.makeConnector()
+            connector.activate()
+            connector.deactivate()
+            self.assertTrue(os.path.exists(self.path))
+        finally:
+            process.communicate()
+        self.assertEqual(0, process.returncode)
+        self.assertFalse(os.path.exists(self.path))
+
+    def testPullPolicy(self):
+        unreliable = QualityOfServiceSpec(
+            reliability=QualityOfServiceSpec.Reliability.UNRELIABLE)
+
+        # Unbounded unless unreliable delivery is requested.
+        connector = self.makeConnector(InPullConnector)
+        self.assertEqual(None, connector.queue.capacity)
+        connector.setQualityOfServiceSpec(QualityOfServiceSpec())
+        self.assertEqual(None, connector.queue.capacity)
+        connector.setQualityOfServiceSpec(unreliable)
+        self.assertEqual(BoundedQueue.OverflowPolicy.DROP_OLDEST,
+                         connector.queue.policy)
+        self.assertEqual(1000, connector.queue.capacity)
+
+        connector = self.makeConnector(InPullConnector,
+                                       pullpolicy='drop-newest')
+        connector.setQualityOfServiceSpec(unreliable)
+        self.assertEqual(BoundedQueue.OverflowPolicy.DROP_NEWEST,
+                         connector.queue.policy)
+        self.assertRaises(TypeError, self.makeConnector, InPullConnector,
+                          pullpolicy='drop-all')
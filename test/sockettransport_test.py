@@ -22,20 +22,49 @@
 #
 # ============================================================
 
+import os
+import socket
+import threading
+import time
 import unittest
+import uuid
+import zlib
 
-from rsb import ParticipantConfig
+from testconfig import config
+
+import rsb
+from rsb import ParticipantConfig, QualityOfServiceSpec, Scope
+from rsb.filter import FilterAction, MethodFilter
 from rsb.converter import getGlobalConverterMap
-from rsb.transport.socket import OutConnector, InPushConnector
+from rsb.util import BoundedQueue
+from rsb.protocol.Notification_pb2 import Notification
+from rsb.transport.socket import (BusClient,
+                                  BusConnection,
+                                  BusServer,
+                                  NotificationFrame,
+                                  OutConnector,
+                                  defaultUnixSocketPath,
+                                  InPullConnector,
+                                  InPushConnector)
 
 from test.transporttest import TransportCheck
 
 
-def getConnector(clazz, scope, activate=True):
+def getTestPort(offset):
+    try:
+        port = int(config['socket']['port'])
+    except KeyError:
+        port = 55666
+    return port + offset
+
+
+def getConnector(clazz, scope, activate=True, io=None):
+    options = dict(ParticipantConfig.fromFile(
+        'test/with-socket.conf').getTransport('socket').options)
+    if io is not None:
+        options['io'] = io
     connector = clazz(converters=getGlobalConverterMap(bytes),
-                      options=ParticipantConfig.fromFile(
-                          'test/with-socket.conf').getTransport(
-                              'socket').options)
+                      options=options)
     connector.setScope(scope)
     if activate:
         connector.activate()
@@ -47,5 +76,954 @@ class SocketTransportTest(TransportCheck, unittest.TestCase):
     def _getInPushConnector(self, scope, activate=True):
         return getConnector(InPushConnector, scope, activate=activate)
 
+    def _getInPullConnector(self, scope, activate=True):
+        return getConnector(InPullConnector, scope, activate=activate)
+
     def _getOutConnector(self, scope, activate=True):
         return getConnector(OutConnector, scope, activate=activate)
+
+
+class SelectorSocketTransportTest(TransportCheck, unittest.TestCase):
+
+    def _getInPushConnector(self, scope, activate=True):
+        return getConnector(InPushConnector, scope, activate=activate,
+                            io='selector')
+
+    def _getInPullConnector(self, scope, activate=True):
+        return getConnector(InPullConnector, scope, activate=activate,
+                            io='selector')
+
+    def _getOutConnector(self, scope, activate=True):
+        return getConnector(OutConnector, scope, activate=activate,
+                            io='selector')
+
+
+class RecordingHandler(object):
+
+    # Connections look for this attribute when removing bus handlers.
+    bus = None
+
+    def __init__(self):
+        self.notifications = []
+        self.condition = threading.Condition()
+
+    def __call__(self, notification):
+        with self.condition:
+            self.notifications.append(notification.detach())
+            self.condition.notifyAll()
+
+    def waitFor(self, count, timeout=5):
+        with self.condition:
+            end = time.time() + timeout
+            while len(self.notifications) < count and time.time() < end:
+                self.condition.wait(end - time.time())
+            return list(self.notifications)
+
+
+def makeNotification(scope='/test/', data=b'payload'):
+    notification = Notification()
+    notification.event_id.sender_id = uuid.uuid4().bytes
+    notification.event_id.sequence_number = 0
+    notification.scope = scope.encode('ASCII')
+    notification.wire_schema = b'bytes'
+    notification.data = data
+    notification.meta_data.create_time = 0
+    notification.meta_data.send_time = 0
+    return notification
+
+
+def connectStalledClient(port):
+    # A client which performs the handshake but never reads, so that
+    # its receive window fills up eventually.
+    client = socket.create_connection(('localhost', port))
+    client.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    client.recv(4)
+    return client
+
+
+def waitForConnections(bus, count, timeout=5):
+    end = time.time() + timeout
+    while len(bus.connections) < count and time.time() < end:
+        time.sleep(0.01)
+    return len(bus.connections)
+
+
+def connectedSocketPair():
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    client = socket.create_connection(listener.getsockname())
+    server, _ = listener.accept()
+    listener.close()
+    return client, server
+
+
+class BusConnectionTest(unittest.TestCase):
+
+    def testReceiveFrames(self):
+        sender, receiver = connectedSocketPair()
+        connection = BusConnection(socket_=receiver, isServer=True)
+        self.assertEqual(b'\0\0\0\0', sender.recv(4))
+
+        # Include notifications larger than the initial receive
+        # buffer to force growing it.
+        notifications = [
+            makeNotification(data=b'x' * size)
+            for size in [0, 10, 1000, BusConnection.RECEIVE_BUFFER_SIZE,
+                         10, 3 * BusConnection.RECEIVE_BUFFER_SIZE, 5]]
+        frames = [NotificationFrame(notification=notification).frame
+                  for notification in notifications]
+
+        def send():
+            # Send all frames in chunks which do not coincide with
+            # frame boundaries.
+            data = b''.join(frames)
+            for i in range(0, len(data), 1000):
+                sender.sendall(data[i:i + 1000])
+            sender.shutdown(socket.SHUT_WR)
+        thread = threading.Thread(target=send)
+        thread.start()
+
+        for (frame, notification) in zip(frames, notifications):
+            received = connection.receiveFrame()
+            self.assertTrue(isinstance(received, memoryview))
+            self.assertEqual(frame, bytes(received))
+            self.assertEqual(notification,
+                             NotificationFrame(frame=received).notification)
+        self.assertRaises(EOFError, connection.receiveFrame)
+
+        thread.join()
+        sender.close()
+        receiver.close()
+
+    def testCoalesceFrames(self):
+        sender, receiver = connectedSocketPair()
+        connection = BusConnection(socket_=sender, isServer=True,
+                                   coalesce=True, coalesceBytes=1000)
+        self.assertEqual(b'\0\0\0\0', receiver.recv(4))
+
+        # Queue the frames before the writer thread starts so that
+        # they are gathered into batches limited by the byte budget.
+        frames = [NotificationFrame(
+            notification=makeNotification(data=b'x' * 100)).frame
+            for _ in range(100)]
+        for frame in frames:
+            connection.sendFrame(frame)
+        connection.activate()
+
+        expected = b''.join(frames)
+        data = b''
+        while len(data) < len(expected):
+            data += receiver.recv(len(expected) - len(data))
+        self.assertEqual(expected, data)
+
+        connection.deactivate()
+        connection.waitForDeactivation()
+        receiver.close()
+
+        statistics = connection.batchStatistics
+        self.assertEqual(100, statistics.frames)
+        self.assertEqual(len(expected), statistics.bytes)
+        self.assertTrue(statistics.batches < 100)
+        self.assertTrue(statistics.maxFrames * len(frames[0]) <= 1000)
+
+    def makeConnectionPair(self, serverCompression, clientCompression,
+                           **kwargs):
+        first, second = connectedSocketPair()
+        server = BusConnection(socket_=first, isServer=True,
+                               compression=serverCompression,
+                               compressionThreshold=1000, **kwargs)
+        client = BusConnection(socket_=second,
+                               compression=clientCompression,
+                               compressionThreshold=1000, **kwargs)
+        handler = RecordingHandler()
+        client.addHandler(handler)
+        serverHandler = RecordingHandler()
+        server.addHandler(serverHandler)
+        server.activate()
+        client.activate()
+        return server, client, handler, serverHandler
+
+    def waitForNegotiation(self, connection):
+        end = time.time() + 5
+        while connection.peerAcceptsCompression is None \
+                and time.time() < end:
+            time.sleep(0.01)
+        return connection.peerAcceptsCompression
+
+    def closeConnections(self, *connections):
+        for connection in connections:
+            connection.deactivate()
+            connection.waitForDeactivation()
+
+    def testCompression(self):
+        server, client, handler, _ = self.makeConnectionPair(True, True)
+        self.assertTrue(self.waitForNegotiation(server))
+
+        notifications = [makeNotification(data=b'x' * 100000),
+                         makeNotification(data=b'small'),
+                         makeNotification(data=os.urandom(100000)),
+                         makeNotification(data=os.urandom(2000))]
+        for notification in notifications:
+            server.sendNotification(
+                BusConnection.notificationToBuffer(notification))
+
+        received = handler.waitFor(len(notifications))
+        self.assertEqual(notifications,
+                         [frame.notification for frame in received])
+        self.closeConnections(server, client)
+
+        compressor = server.compressor
+        self.assertEqual(1, compressor.compressedFrames)
+        self.assertEqual(2, compressor.skippedFrames)
+        self.assertTrue(compressor.ratio < 0.1)
+        self.assertTrue(compressor.compressTime > 0)
+        self.assertEqual(1, client.compressor.decompressedFrames)
+
+    def testCompressionNotAccepted(self):
+        server, client, handler, serverHandler = \
+            self.makeConnectionPair(True, False)
+
+        # The client does not announce compression, so the server
+        # learns this from the first ordinary frame.
+        client.sendNotification(
+            BusConnection.notificationToBuffer(makeNotification()))
+        self.assertEqual(1, len(serverHandler.waitFor(1)))
+        self.assertFalse(server.peerAcceptsCompression)
+
+        notification = makeNotification(data=b'x' * 100000)
+        server.sendNotification(
+            BusConnection.notificationToBuffer(notification))
+
+        # The compression announcement of the server is not
+        # dispatched.
+        received = handler.waitFor(1)
+        self.assertEqual([notification],
+                         [frame.notification for frame in received])
+        self.closeConnections(server, client)
+
+        self.assertEqual(0, server.compressor.compressedFrames)
+        self.assertEqual(None, client.compressor)
+
+    def testFragmentation(self):
+        for compression in [False, True]:
+            server, client, handler, _ = self.makeConnectionPair(
+                compression, compression, maxFrameSize=1000)
+            self.waitForNegotiation(server)
+            self.assertTrue(server.peerAcceptsFragments)
+
+            large = makeNotification(data=os.urandom(100000))
+            small = makeNotification(data=b'small')
+            for notification in [large, small]:
+                server.sendNotification(
+                    BusConnection.notificationToBuffer(notification))
+
+            # The small notification overtakes the large one.
+            received = handler.waitFor(2)
+            self.assertEqual([small, large],
+                             [frame.notification for frame in received])
+            self.assertTrue(client.peerAcceptsFragments)
+            self.closeConnections(server, client)
+
+
+class BusTest(unittest.TestCase):
+
+    def testSerializeOnceForAllConnections(self):
+        port = getTestPort(1)
+        server = BusServer('localhost', port, True)
+        server.activate()
+        clients = [BusClient('localhost', port, True) for _ in range(3)]
+        handlers = []
+        for client in clients:
+            client.activate()
+            handler = RecordingHandler()
+            client.connections[0].addHandler(handler)
+            handlers.append(handler)
+        self.assertEqual(3, waitForConnections(server, 3))
+
+        serializations = []
+        original = BusConnection.notificationToBuffer
+
+        def countingToBuffer(notification):
+            serializations.append(notification)
+            return original(notification)
+        BusConnection.notificationToBuffer = staticmethod(countingToBuffer)
+        try:
+            notification = makeNotification()
+            server.handleOutgoing(notification)
+        finally:
+            BusConnection.notificationToBuffer = staticmethod(original)
+
+        self.assertEqual(1, len(serializations))
+        for handler in handlers:
+            received = handler.waitFor(1)
+            self.assertEqual([notification],
+                             [frame.notification for frame in received])
+
+        for client in clients:
+            client.deactivate()
+        server.deactivate()
+
+    def testCompressOnceForAllConnections(self):
+        port = getTestPort(15)
+        server = BusServer('localhost', port, True, compression=True)
+        server.activate()
+        clients = [BusClient('localhost', port, True, compression=True)
+                   for _ in range(3)]
+        handlers = []
+        for client in clients:
+            client.activate()
+            handler = RecordingHandler()
+            client.connections[0].addHandler(handler)
+            handlers.append(handler)
+        self.assertEqual(3, waitForConnections(server, 3))
+        end = time.time() + 5
+        while not all(connection.peerAcceptsCompression
+                      for connection in server.connections) \
+                and time.time() < end:
+            time.sleep(0.01)
+
+        compressions = []
+        original = zlib.compress
+
+        def countingCompress(data, *args):
+            compressions.append(len(data))
+            return original(data, *args)
+        zlib.compress = countingCompress
+        try:
+            notification = makeNotification(data=b'x' * 100000)
+            server.handleOutgoing(notification)
+            for handler in handlers:
+                received = handler.waitFor(1)
+                self.assertEqual([notification],
+                                 [frame.notification for frame in received])
+        finally:
+            zlib.compress = original
+
+        # One sample and the whole payload are compressed once for
+        # all connections.
+        self.assertEqual(2, len(compressions))
+        for connection in server.connections:
+            self.assertEqual(1, connection.compressor.compressedFrames)
+
+        for client in clients:
+            client.deactivate()
+        server.deactivate()
+
+    def testForwardFramesVerbatim(self):
+        port = getTestPort(2)
+        server = BusServer('localhost', port, True)
+        server.activate()
+        sender = BusClient('localhost', port, True)
+        sender.activate()
+        receiver = BusClient('localhost', port, True)
+        receiver.activate()
+        handler = RecordingHandler()
+        receiver.connections[0].addHandler(handler)
+        self.assertEqual(2, waitForConnections(server, 2))
+
+        parses = []
+        original = BusConnection.bufferToNotification
+
+        def countingToNotification(serialized):
+            parses.append(serialized)
+            return original(serialized)
+        BusConnection.bufferToNotification = staticmethod(
+            countingToNotification)
+        try:
+            notification = makeNotification()
+            sent = NotificationFrame(notification=notification)
+            sender.handleOutgoing(notification)
+            received = handler.waitFor(1)
+        finally:
+            BusConnection.bufferToNotification = staticmethod(original)
+
+        # Neither the server nor the receiving client have connectors,
+        # so nobody should have parsed the notification.
+        self.assertEqual([], parses)
+        self.assertEqual([bytes(sent.frame)],
+                         [bytes(frame.frame) for frame in received])
+        self.assertEqual(notification, received[0].notification)
+
+        sender.deactivate()
+        receiver.deactivate()
+        server.deactivate()
+
+    def testParseOnlyMatchingFrames(self):
+        port = getTestPort(3)
+        server = BusServer('localhost', port, True)
+        server.activate()
+        client = BusClient('localhost', port, True)
+        client.activate()
+        handler = RecordingHandler()
+        client.connections[0].addHandler(handler)
+        connector = InPushConnector(converters=getGlobalConverterMap(bytes))
+        connector.setScope(Scope('/other'))
+        events = []
+        connector.setObserverAction(events.append)
+        client.addConnector(connector)
+        self.assertEqual(1, waitForConnections(server, 1))
+
+        parses = []
+        original = BusConnection.bufferToNotification
+
+        def countingToNotification(serialized):
+            parses.append(serialized)
+            return original(serialized)
+        BusConnection.bufferToNotification = staticmethod(
+            countingToNotification)
+        try:
+            server.handleOutgoing(makeNotification(scope='/test/'))
+            server.handleOutgoing(makeNotification(scope='/other/sub/'))
+            handler.waitFor(2)
+        finally:
+            BusConnection.bufferToNotification = staticmethod(original)
+
+        self.assertEqual(1, len(parses))
+        self.assertEqual([Scope('/other/sub')],
+                         [event.scope for event in events])
+
+        client.removeConnector(connector)
+        client.deactivate()
+        server.deactivate()
+
+    def testFilterPushdown(self):
+        connector = InPushConnector(converters=getGlobalConverterMap(bytes))
+        connector.setScope(Scope('/test'))
+        events = []
+        connector.setObserverAction(events.append)
+        replies = MethodFilter(method='REPLY')
+        connector.filterNotify(replies, FilterAction.ADD)
+
+        # The request cannot be converted since there is no converter
+        # for its wire-schema. It has to be rejected before conversion.
+        request = makeNotification()
+        request.method = b'REQUEST'
+        request.wire_schema = b'no-such-wire-schema'
+        connector.handle(request)
+        reply = makeNotification()
+        reply.method = b'REPLY'
+        connector.handle(reply)
+        self.assertEqual(['REPLY'], [event.method for event in events])
+
+        connector.filterNotify(replies, FilterAction.REMOVE)
+        connector.handle(makeNotification())
+        self.assertEqual(2, len(events))
+
+    def testSelectorServer(self):
+        port = getTestPort(4)
+        server = BusServer('localhost', port, True, selector=True)
+        server.activate()
+        sender = BusClient('localhost', port, True)
+        sender.activate()
+        receivers = [BusClient('localhost', port, True, selector=True)
+                     for _ in range(2)]
+        handlers = []
+        for receiver in receivers:
+            receiver.activate()
+            handler = RecordingHandler()
+            receiver.connections[0].addHandler(handler)
+            handlers.append(handler)
+        self.assertEqual(3, waitForConnections(server, 3))
+
+        # Large notifications cannot be written without blocking and
+        # have to be buffered by the selector-based connections.
+        notifications = [makeNotification(data=bytes([i]) * 1000000)
+                         for i in range(5)]
+        for notification in notifications:
+            sender.handleOutgoing(notification)
+
+        for handler in handlers:
+            received = handler.waitFor(len(notifications))
+            self.assertEqual(notifications,
+                             [frame.notification for frame in received])
+
+        sender.deactivate()
+        for receiver in receivers:
+            receiver.deactivate()
+        server.deactivate()
+
+    def testInvalidIOOption(self):
+        self.assertRaises(TypeError, InPushConnector,
+                          converters=getGlobalConverterMap(bytes),
+                          options={'io': 'fibers'})
+
+    def testSlowClientDoesNotStallBus(self):
+        port = getTestPort(5)
+        server = BusServer(
+            'localhost', port, True,
+            queueCapacity=10,
+            queuePolicy=BoundedQueue.OverflowPolicy.DROP_OLDEST)
+        server.activate()
+        stalled = connectStalledClient(port)
+        client = BusClient('localhost', port, True)
+        client.activate()
+        handler = RecordingHandler()
+        client.connections[0].addHandler(handler)
+        self.assertEqual(2, waitForConnections(server, 2))
+
+        # Publishing does not block although the stalled client does
+        # not read. Pacing the publisher by the empty queue ensures
+        # that the healthy client keeps up.
+        count = 200
+        for _ in range(count):
+            server.handleOutgoing(makeNotification(data=b'x' * 100000))
+            while min(connection.outboundQueue.depth
+                      for connection in server.connections):
+                time.sleep(0.001)
+        self.assertEqual(count, len(handler.waitFor(count)))
+
+        queues = sorted((connection.outboundQueue
+                         for connection in server.connections),
+                        key=lambda queue: queue.dropped)
+        self.assertEqual(0, queues[0].dropped)
+        self.assertTrue(queues[1].dropped > 0)
+        self.assertTrue(queues[1].highWaterMark <= 10)
+        self.assertEqual(queues[1].dropped, server.droppedFrames)
+
+        stalled.close()
+        client.deactivate()
+        server.deactivate()
+
+    def testSelectorSlowClient(self):
+        port = getTestPort(14)
+        server = BusServer(
+            'localhost', port, True, selector=True,
+            queueCapacity=10,
+            queuePolicy=BoundedQueue.OverflowPolicy.DROP_OLDEST)
+        server.activate()
+        stalled = connectStalledClient(port)
+        client = BusClient('localhost', port, True, selector=True)
+        client.activate()
+        handler = RecordingHandler()
+        client.connections[0].addHandler(handler)
+        self.assertEqual(2, waitForConnections(server, 2))
+
+        # The output for the stalled client is bounded by the
+        # outbound queue.
+        count = 200
+        for _ in range(count):
+            server.handleOutgoing(makeNotification(data=b'x' * 100000))
+            while min(connection.outboundQueue.depth
+                      for connection in server.connections):
+                time.sleep(0.001)
+        self.assertEqual(count, len(handler.waitFor(count)))
+
+        queues = sorted((connection.outboundQueue
+                         for connection in server.connections),
+                        key=lambda queue: queue.dropped)
+        self.assertEqual(0, queues[0].dropped)
+        self.assertTrue(queues[1].dropped > 0)
+        self.assertTrue(queues[1].highWaterMark <= 10)
+
+        stalled.close()
+        client.deactivate()
+        server.deactivate()
+
+    def testSelectorUnsupportedOptions(self):
+        self.assertRaises(ValueError, BusServer, 'localhost', getTestPort(14),
+                          True, selector=True, compression=True)
+        for option in ['coalesce', 'compression', 'maxframesize']:
+            self.assertRaises(TypeError, InPushConnector,
+                              converters=getGlobalConverterMap(bytes),
+                              options={'io': 'selector', option: '1'})
+
+    def testDisconnectSlowClient(self):
+        port = getTestPort(6)
+        server = BusServer('localhost', port, True,
+                           queueCapacity=10,
+                           queuePolicy=BoundedQueue.OverflowPolicy.FAIL)
+        server.activate()
+        stalled = connectStalledClient(port)
+        self.assertEqual(1, waitForConnections(server, 1))
+
+        for _ in range(200):
+            server.handleOutgoing(makeNotification(data=b'x' * 100000))
+        self.assertEqual([], server.connections)
+
+        stalled.close()
+        server.deactivate()
+
+    def testUnreliableQueuePolicy(self):
+        port = getTestPort(13)
+        connector = OutConnector(
+            converters=getGlobalConverterMap(bytes),
+            options={'port': str(port), 'server': '1'})
+        connector.setQualityOfServiceSpec(QualityOfServiceSpec(
+            reliability=QualityOfServiceSpec.Reliability.UNRELIABLE))
+        connector.setScope(Scope('/foo'))
+        connector.activate()
+        stalled = connectStalledClient(port)
+        self.assertEqual(1, waitForConnections(connector.bus, 1))
+        self.assertEqual(BoundedQueue.OverflowPolicy.DROP_OLDEST,
+                         connector.bus.connections[0].outboundQueue.policy)
+
+        stalled.close()
+        connector.deactivate()
+
+    def testSharedBusQueuePolicy(self):
+        port = getTestPort(16)
+        options = {'port': str(port), 'server': '1'}
+        reliable = OutConnector(converters=getGlobalConverterMap(bytes),
+                                options=options)
+        reliable.setScope(Scope('/foo'))
+        reliable.activate()
+        unreliable = OutConnector(converters=getGlobalConverterMap(bytes),
+                                  options=options)
+        unreliable.setQualityOfServiceSpec(QualityOfServiceSpec(
+            reliability=QualityOfServiceSpec.Reliability.UNRELIABLE))
+        unreliable.setScope(Scope('/foo'))
+        unreliable.activate()
+        self.assertTrue(reliable.bus is unreliable.bus)
+
+        # The bus has been created by the reliable connector, so the
+        # outbound queues block.
+        stalled = connectStalledClient(port)
+        self.assertEqual(1, waitForConnections(unreliable.bus, 1))
+        self.assertEqual(BoundedQueue.OverflowPolicy.BLOCK,
+                         unreliable.bus.connections[0].outboundQueue.policy)
+
+        stalled.close()
+        unreliable.deactivate()
+        reliable.deactivate()
+
+    def testOutConnectorDroppedEvents(self):
+        port = getTestPort(17)
+        connector = OutConnector(
+            converters=getGlobalConverterMap(bytes),
+            options={'port': str(port), 'server': '1',
+                     'queuecapacity': '10', 'queuepolicy': 'drop-oldest'})
+        connector.setScope(Scope('/foo'))
+        self.assertEqual(0, connector.getDroppedEvents())
+        connector.activate()
+        stalled = connectStalledClient(port)
+        self.assertEqual(1, waitForConnections(connector.bus, 1))
+
+        for _ in range(100):
+            connector.bus.handleOutgoing(makeNotification(data=b'x' * 100000))
+        dropped = connector.getDroppedEvents()
+        self.assertTrue(dropped > 0)
+        self.assertEqual(connector.bus.droppedFrames, dropped)
+
+        # Frames dropped by removed connections are still counted.
+        connector.bus.removeConnection(connector.bus.connections[0])
+        self.assertTrue(connector.getDroppedEvents() >= dropped)
+
+        stalled.close()
+        connector.deactivate()
+
+    def testPullConnector(self):
+        port = getTestPort(7)
+        server = BusServer('localhost', port, True)
+        server.activate()
+        client = BusClient('localhost', port, True)
+        client.activate()
+        self.assertEqual(1, waitForConnections(server, 1))
+
+        def makeConnector(options):
+            connector = InPullConnector(
+                converters=getGlobalConverterMap(bytes),
+                options=options)
+            connector.setScope(Scope('/test'))
+            client.addConnector(connector)
+            return connector
+        lazy = makeConnector({'pullcapacity': '2',
+                              'pullpolicy': 'drop-oldest'})
+        eager = makeConnector({'pulllazy': '0', 'pullcapacity': '2',
+                               'pullpolicy': 'drop-newest'})
+
+        parses = []
+        original = BusConnection.bufferToNotification
+
+        def countingToNotification(serialized):
+            parses.append(serialized)
+            return original(serialized)
+        BusConnection.bufferToNotification = staticmethod(
+            countingToNotification)
+        try:
+            for i in range(3):
+                server.handleOutgoing(makeNotification(data=bytes([i])))
+            while eager.queue.enqueued + eager.queue.dropped < 3:
+                time.sleep(0.01)
+            # Only the eager connector has parsed the notifications.
+            self.assertEqual(3, len(parses))
+
+            self.assertEqual([b'\1', b'\2'],
+                             [lazy.raiseEvent(True).data for _ in range(2)])
+            self.assertEqual(5, len(parses))
+        finally:
+            BusConnection.bufferToNotification = staticmethod(original)
+        self.assertEqual(1, lazy.queue.dropped)
+        self.assertIsNone(lazy.raiseEvent(False))
+
+        self.assertEqual([b'\0', b'\1'],
+                         [eager.raiseEvent(False).data for _ in range(2)])
+        self.assertEqual(1, eager.queue.dropped)
+        self.assertIsNone(eager.raiseEvent(False))
+
+        # Deactivating wakes up blocked readers.
+        lazy.queue.close()
+        self.assertIsNone(lazy.raiseEvent(True))
+
+        client.removeConnector(lazy)
+        client.removeConnector(eager)
+        client.deactivate()
+        server.deactivate()
+
+    def testPullConnectorDefaultPolicy(self):
+        Policy = BoundedQueue.OverflowPolicy
+        unreliable = QualityOfServiceSpec(
+            reliability=QualityOfServiceSpec.Reliability.UNRELIABLE)
+
+        # Unbounded unless unreliable delivery is requested.
+        connector = InPullConnector(converters=getGlobalConverterMap(bytes))
+        self.assertEqual(None, connector.queue.capacity)
+        connector.setQualityOfServiceSpec(QualityOfServiceSpec())
+        self.assertEqual(None, connector.queue.capacity)
+        connector.setQualityOfServiceSpec(unreliable)
+        self.assertEqual(Policy.DROP_OLDEST, connector.queue.policy)
+        self.assertEqual(1000, connector.queue.capacity)
+
+        # An explicit policy is not overridden.
+        connector = InPullConnector(converters=getGlobalConverterMap(bytes),
+                                    options={'pullpolicy': 'block'})
+        connector.setQualityOfServiceSpec(unreliable)
+        self.assertEqual(Policy.BLOCK, connector.queue.policy)
+        self.assertEqual(1000, connector.queue.capacity)
+
+    def testBlockedPullConnectorDoesNotStallBus(self):
+        port = getTestPort(18)
+        server = BusServer('localhost', port, True)
+        server.activate()
+        clients = [BusClient('localhost', port, True) for _ in range(3)]
+        for client in clients:
+            client.activate()
+        handler = RecordingHandler()
+        clients[2].connections[0].addHandler(handler)
+        self.assertEqual(3, waitForConnections(server, 3))
+
+        connector = InPullConnector(converters=getGlobalConverterMap(bytes),
+                                    options={'pullcapacity': '1',
+                                             'pullpolicy': 'block'})
+        connector.setScope(Scope('/slow'))
+        server.addConnector(connector)
+
+        # The second notification blocks the connection of the first
+        # client on the full buffer, but not the other connections.
+        for _ in range(2):
+            clients[0].handleOutgoing(makeNotification(scope='/slow/'))
+        while not connector.queue.depth:
+            time.sleep(0.01)
+        notification = makeNotification(scope='/other/')
+        clients[1].handleOutgoing(notification)
+        received = [frame.notification for frame in handler.waitFor(2)]
+        self.assertTrue(notification in received)
+
+        for _ in range(2):
+            self.assertEqual(Scope('/slow'), connector.raiseEvent(True).scope)
+
+        server.removeConnector(connector)
+        for client in clients:
+            client.deactivate()
+        server.deactivate()
+
+    def testSubscriptionRouting(self):
+        port = getTestPort(8)
+        server = BusServer('localhost', port, True)
+        server.activate()
+        subscriber = BusClient('localhost', port, True, subscriptions=True)
+        subscriber.activate()
+        subscriberHandler = RecordingHandler()
+        subscriber.connections[0].addHandler(subscriberHandler)
+        broadcast = BusClient('localhost', port, True)
+        broadcast.activate()
+        broadcastHandler = RecordingHandler()
+        broadcast.connections[0].addHandler(broadcastHandler)
+        self.assertEqual(2, waitForConnections(server, 2))
+
+        connector = InPushConnector(converters=getGlobalConverterMap(bytes))
+        connector.setScope(Scope('/a'))
+        events = []
+        connector.setObserverAction(events.append)
+        subscriber.addConnector(connector)
+
+        def subscriptions():
+            return [server.getSubscriptions(connection)
+                    for connection in server.connections]
+        while not any(subscriptions()):
+            time.sleep(0.01)
+        trie = [trie for trie in subscriptions() if trie][0]
+        self.assertEqual([(Scope('/a'), True)], list(trie.items()))
+
+        for scope in ['/b/', '/a/', '/a/b/', '/']:
+            server.handleOutgoing(makeNotification(scope=scope))
+
+        # The client which did not announce subscriptions receives all
+        # notifications, the other one only matching notifications.
+        self.assertEqual(4, len(broadcastHandler.waitFor(4)))
+        self.assertEqual([b'/a/', b'/a/b/'],
+                         [frame.scope
+                          for frame in subscriberHandler.waitFor(2)])
+        self.assertEqual(2, len(events))
+
+        # Selecting connections for known scope strings does not parse
+        # them again.
+        parses = []
+        original = rsb.Scope
+
+        def countingScope(*args, **kwargs):
+            parses.append(args)
+            return original(*args, **kwargs)
+        rsb.Scope = countingScope
+        try:
+            server.handleOutgoing(makeNotification(scope='/a/b/'))
+        finally:
+            rsb.Scope = original
+        self.assertEqual([], parses)
+        subscriberHandler.waitFor(3)
+
+        # Changed subscriptions take effect for cached scope strings.
+        other = InPushConnector(converters=getGlobalConverterMap(bytes))
+        other.setScope(Scope('/b'))
+        other.setObserverAction(events.append)
+        subscriber.addConnector(other)
+        while len(list(trie.items())) == 1:
+            trie = [trie for trie in subscriptions() if trie][0]
+            time.sleep(0.01)
+        server.handleOutgoing(makeNotification(scope='/b/'))
+        self.assertEqual(b'/b/', subscriberHandler.waitFor(4)[-1].scope)
+
+        subscriber.removeConnector(other)
+        subscriber.removeConnector(connector)
+        subscriber.deactivate()
+        broadcast.deactivate()
+        server.deactivate()
+
+    def testUnixDomainSocket(self):
+        port = getTestPort(9)
+        path = defaultUnixSocketPath(port)
+        for selector in [False, True]:
+            server = BusServer('localhost', port + selector, True,
+                               selector=selector, unixPath=path)
+            server.activate()
+
+            # The bus server accepts clients on the Unix domain socket.
+            raw = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            raw.connect(path)
+            self.assertEqual(b'\0\0\0\0', raw.recv(4))
+            self.assertEqual(1, waitForConnections(server, 1))
+
+            client = BusClient('localhost', port + selector, True,
+                               selector=selector, unixPath=path)
+            client.activate()
+            handler = RecordingHandler()
+            client.connections[0].addHandler(handler)
+            self.assertEqual(2, waitForConnections(server, 2))
+
+            notification = makeNotification()
+            server.handleOutgoing(notification)
+            self.assertEqual([notification],
+                             [frame.notification
+                              for frame in handler.waitFor(1)])
+
+            raw.close()
+            client.deactivate()
+            server.deactivate()
+
+    def testUnixDomainSocketFallback(self):
+        port = getTestPort(11)
+        server = BusServer('localhost', port, True)
+        server.activate()
+        client = BusClient('localhost', port, True,
+                           unixPath=defaultUnixSocketPath(port))
+        client.activate()
+        self.assertEqual(1, waitForConnections(server, 1))
+        client.deactivate()
+        server.deactivate()
+
+    def testDeactivateWhileReconnecting(self):
+        port = getTestPort(19)
+        server = BusServer('localhost', port, True)
+        server.activate()
+        client = BusClient('localhost', port, True, reconnect=True,
+                           reconnectDelay=0.05)
+        client.activate()
+        self.assertEqual(1, waitForConnections(server, 1))
+        server.deactivate()
+
+        # A listening socket with a full backlog makes connection
+        # attempts hang instead of failing.
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(('localhost', port))
+        listener.listen(0)
+        pending = []
+        for _ in range(3):
+            pending.append(socket.socket(socket.AF_INET, socket.SOCK_STREAM))
+            pending[-1].setblocking(False)
+            pending[-1].connect_ex(('localhost', port))
+
+        end = time.time() + 5
+        while not client.isReconnecting() and time.time() < end:
+            time.sleep(0.01)
+        self.assertTrue(client.isReconnecting())
+        time.sleep(0.5)
+
+        start = time.time()
+        client.deactivate()
+        self.assertTrue(time.time() - start < 2)
+
+        for socket_ in pending + [listener]:
+            socket_.close()
+
+    def testReconnect(self):
+        port = getTestPort(12)
+        server = BusServer('localhost', port, True)
+        server.activate()
+        frameSize = len(NotificationFrame(
+            notification=makeNotification(data=b'x' * 100)).frame)
+        client = BusClient('localhost', port, True, reconnect=True,
+                           reconnectDelay=0.05, replayBytes=3 * frameSize)
+        client.activate()
+        self.assertEqual(1, waitForConnections(server, 1))
+
+        # Restart the bus server and publish while the client is
+        # disconnected.
+        server.deactivate()
+        end = time.time() + 5
+        while not client.isReconnecting() and time.time() < end:
+            time.sleep(0.01)
+        self.assertTrue(client.isReconnecting())
+        notifications = [makeNotification(data=b'x' * 100)
+                         for _ in range(5)]
+        for notification in notifications:
+            client.handleOutgoing(notification)
+        self.assertEqual(3 * frameSize, client.replayBufferBytes)
+        self.assertEqual(2, client.replayDropped)
+
+        received = []
+        condition = threading.Condition()
+
+        def handle(event):
+            with condition:
+                received.append(event)
+                condition.notifyAll()
+        connector = getConnector(InPushConnector, Scope('/test'),
+                                 activate=False)
+        connector.setObserverAction(handle)
+        server = BusServer('localhost', port, True)
+        server.activate()
+        server.addConnector(connector)
+
+        # The oldest notifications have been dropped, the others are
+        # replayed after reconnecting.
+        with condition:
+            condition.wait_for(lambda: len(received) == 3, timeout=5)
+        self.assertEqual([notification.event_id.sender_id
+                          for notification in notifications[2:]],
+                         [event.senderId.bytes for event in received])
+        self.assertEqual(1, client.reconnects)
+        self.assertEqual(0, client.replayBufferBytes)
+
+        client.deactivate()
+        server.deactivate()
@@ -25,10 +25,11 @@
 import unittest
 
 import rsb.util
-from threading import Condition
+from threading import Condition, Thread
 import time
 import random
-from rsb.util import OrderedQueueDispatcherPool
+from rsb.util import (BoundedExecutor, BoundedQueue, InterruptedError,
+                      OrderedQueueDispatcherPool, QueueFullError)
 
 
 class EnumValueTest(unittest.TestCase):
@@ -87,6 +88,161 @@ class EnumTest(unittest.TestCase):
         self.assertRaises(ValueError, e.fromString, 'D')
 
 
+class BoundedQueueTest(unittest.TestCase):
+
+    Policy = BoundedQueue.OverflowPolicy
+
+    def testUnbounded(self):
+        queue = BoundedQueue()
+        for i in range(100):
+            self.assertTrue(queue.put(i))
+        self.assertEqual(100, queue.depth)
+        self.assertEqual(list(range(100)), queue.getAll())
+        self.assertEqual(0, queue.depth)
+        self.assertEqual(100, queue.highWaterMark)
+
+    def testDropOldest(self):
+        queue = BoundedQueue(2, self.Policy.DROP_OLDEST)
+        for i in range(5):
+            self.assertTrue(queue.put(i))
+        self.assertEqual([3, 4], queue.getAll())
+        self.assertEqual(5, queue.enqueued)
+        self.assertEqual(3, queue.dropped)
+
+    def testDropNewest(self):
+        queue = BoundedQueue(2, self.Policy.DROP_NEWEST)
+        self.assertEqual([True, True, False],
+                         [queue.put(i) for i in range(3)])
+        self.assertEqual([0, 1], queue.getAll())
+        self.assertEqual(1, queue.dropped)
+
+    def testFail(self):
+        queue = BoundedQueue(1, self.Policy.FAIL)
+        queue.put(0)
+        self.assertRaises(QueueFullError, queue.put, 1)
+
+    def testBlock(self):
+        queue = BoundedQueue(1)
+        queue.put(0)
+        self.assertRaises(QueueFullError, queue.put, 1, timeout=0.01)
+
+        putter = Thread(target=queue.put, args=(1,))
+        putter.start()
+        self.assertEqual(0, queue.get())
+        putter.join()
+        self.assertEqual(1, queue.get())
+        self.assertEqual(1, queue.highWaterMark)
+
+    def testGetAll(self):
+        queue = BoundedQueue()
+        self.assertEqual([], queue.getAll(timeout=0))
+        for i in range(5):
+            queue.put(i)
+        self.assertEqual([0, 1], queue.getAll(maxItems=2))
+        self.assertEqual([2, 3, 4], queue.getAll(maxItems=10))
+
+    def testKeyFunction(self):
+        queue = BoundedQueue(2, self.Policy.DROP_OLDEST,
+                             keyFunction=lambda item: item[0])
+        for item in [('a', 1), ('b', 1), ('a', 2), ('a', 3)]:
+            self.assertTrue(queue.put(item))
+        self.assertEqual(2, queue.depth)
+        self.assertEqual(2, queue.dropped)
+        self.assertEqual([('a', 3)], queue.getAll(maxItems=1))
+
+        # Items of removed keys are queued again.
+        queue.put(('a', 4))
+        queue.put(('c', 1))
+        self.assertEqual(3, queue.dropped)
+        self.assertEqual([('a', 4), ('c', 1)], queue.getAll())
+
+    def testClose(self):
+        queue = BoundedQueue()
+        queue.put(0)
+        queue.close()
+        self.assertRaises(InterruptedError, queue.put, 1)
+        self.assertEqual([0], queue.getAll())
+        self.assertEqual([], queue.getAll())
+        self.assertRaises(InterruptedError, queue.get)
+
+
+class BoundedExecutorTest(unittest.TestCase):
+
+    def testExecution(self):
+        executor = BoundedExecutor(maxWorkers=2, queueCapacity=2,
+                                   idleTimeout=0.05)
+        condition = Condition()
+        state = {'blocked': True, 'running': 0, 'maxRunning': 0, 'done': 0}
+
+        def work():
+            with condition:
+                state['running'] += 1
+                state['maxRunning'] = max(state['maxRunning'],
+                                          state['running'])
+                condition.notify_all()
+                while state['blocked']:
+                    condition.wait()
+                state['running'] -= 1
+                state['done'] += 1
+                condition.notify_all()
+
+        for _ in range(2):
+            executor.submit(work)
+        with condition:
+            while state['running'] < 2:
+                condition.wait()
+
+        # Both workers are busy, so two calls are queued and further
+        # calls are rejected.
+        executor.submit(work)
+        executor.submit(work)
+        self.assertRaises(QueueFullError, executor.submit, work, timeout=0)
+        self.assertEqual((2, 2, 2, 1),
+                         (executor.workers, executor.active,
+                          executor.queued, executor.rejected))
+
+        with condition:
+            state['blocked'] = False
+            condition.notify_all()
+            while state['done'] < 4:
+                condition.wait()
+        self.assertEqual(2, state['maxRunning'])
+
+        # Idle workers terminate and are started again on demand.
+        start = time.time()
+        while executor.workers and time.time() < start + 5:
+            time.sleep(0.01)
+        self.assertEqual(0, executor.workers)
+        executor.submit(work)
+        with condition:
+            while state['done'] < 5:
+                condition.wait()
+        self.assertEqual(5, executor.completed)
+
+        executor.shutdown()
+        self.assertRaises(InterruptedError, executor.submit, work)
+
+    def testFailingCallable(self):
+        executor = BoundedExecutor(maxWorkers=1)
+        done = Condition()
+        results = []
+
+        def fail():
+            raise RuntimeError('intentional failure')
+
+        def succeed():
+            with done:
+                results.append(True)
+                done.notify_all()
+
+        executor.submit(fail)
+        executor.submit(succeed)
+        with done:
+            while not results:
+                done.wait()
+        executor.shutdown()
+
+
 class OrderedQueueDispatcherPoolTest(unittest.TestCase):
 
     class StubReciever(object):
@@ -209,3 +365,90 @@ class OrderedQueueDispatcherPoolTest(unittest.TestCase):
         time.sleep(0.1)
 
         self.assertEqual(0, len(receiver.messages))
+
+    def testBatches(self):
+
+        deliveries = []
+        finished = Condition()
+
+        def deliver(receiver, message):
+            with finished:
+                deliveries.append((receiver, message))
+                finished.notify_all()
+
+        pool = OrderedQueueDispatcherPool(1, deliver, batchSize=2)
+        pool.registerReceiver('a')
+        pool.registerReceiver('b')
+        for i in range(4):
+            pool.push(i)
+
+        # A single worker alternates between the ready receivers,
+        # delivering up to two messages per turn.
+        pool.start()
+        with finished:
+            while len(deliveries) < 8:
+                finished.wait()
+        pool.stop()
+        self.assertEqual([('a', 0), ('a', 1), ('b', 0), ('b', 1),
+                          ('a', 2), ('a', 3), ('b', 2), ('b', 3)],
+                         deliveries)
+
+        self.assertRaises(ValueError, OrderedQueueDispatcherPool,
+                          1, deliver, batchSize=0)
+
+    def testFailingDelivery(self):
+
+        deliveries = []
+        finished = Condition()
+
+        def deliver(receiver, message):
+            if message == 1:
+                raise RuntimeError('intentional failure')
+            with finished:
+                deliveries.append(message)
+                finished.notify_all()
+
+        pool = OrderedQueueDispatcherPool(1, deliver, batchSize=3)
+        pool.registerReceiver('a')
+        for i in range(5):
+            pool.push(i)
+
+        # The failure in the middle of the first batch affects neither
+        # the rest of the batch nor the worker.
+        pool.start()
+        with finished:
+            while len(deliveries) < 4:
+                finished.wait()
+        pool.stop()
+        self.assertEqual([0, 2, 3, 4], deliveries)
+
+    def testQueueLimits(self):
+
+        for policy, expected in [
+                (BoundedQueue.OverflowPolicy.DROP_OLDEST, [3, 4]),
+                (BoundedQueue.OverflowPolicy.DROP_NEWEST, [-1, 0])]:
+            pool = OrderedQueueDispatcherPool(1, self.deliver)
+            receiver = self.StubReciever()
+            pool.registerReceiver(receiver)
+
+            # Pending messages are kept when limiting the queues.
+            pool.push(-1)
+            pool.setQueueLimits(2, policy)
+            self.assertEqual(2, pool.queueCapacity)
+            self.assertEqual(0, pool.dropped)
+
+            for i in range(5):
+                pool.push(i)
+            self.assertEqual(4, pool.dropped)
+
+            pool.start()
+            with receiver.condition:
+                while len(receiver.messages) < 2:
+                    receiver.condition.wait()
+            pool.stop()
+
+            self.assertEqual(expected, receiver.messages)
+
+        self.assertRaises(ValueError, OrderedQueueDispatcherPool,
+                          1, self.deliver,
+                          queuePolicy=BoundedQueue.OverflowPolicy.BLOCK)